@@ -0,0 +1,166 @@
+"""
+Artifact Store Module for Selenium Test Automation
+Stores failure screenshots and page sources once per distinct content, compressed, under their SHA-256 hash.
+"""
+
+import atexit
+import gzip
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from test_report import current_step
+
+# Screenshots wider than this are downscaled and re-encoded as JPEG when Pillow is installed
+SCREENSHOT_MAX_WIDTH = 1280
+SCREENSHOT_JPEG_QUALITY = 70
+
+class ArtifactStore:
+    """Content-addressed store: objects/<2-char prefix>/<sha256>.<ext>, shared by every run under root.
+
+    Callers only hash the raw bytes they grabbed from the browser; encoding,
+    compression and file writes run on one background writer thread fed by a
+    bounded queue, so a burst of captures blocks the caller instead of
+    growing memory without limit.
+    """
+
+    def __init__(self, root, max_width=SCREENSHOT_MAX_WIDTH, jpeg_quality=SCREENSHOT_JPEG_QUALITY, max_pending=16):
+        self.root = root
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self._known = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = None
+        self.stats = {"stored": 0, "duplicates": 0, "failed": 0, "enqueue_wait": 0.0}
+        atexit.register(self.flush)
+
+    def object_path(self, digest, extension):
+        """Get the path an object with this hash and extension is stored at."""
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.{extension}")
+
+    def _claim(self, path):
+        """Return True if the caller should write path, False if the content is already stored."""
+        with self._lock:
+            if path in self._known:
+                self.stats["duplicates"] += 1
+                return False
+            self._known.add(path)
+        if os.path.exists(path):
+            # Reused objects count as fresh, so retention does not take them for orphans of a crashed run
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.stats["duplicates"] += 1
+            return False
+        return True
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _encode_screenshot(self, png_bytes):
+        """Downscale and re-encode a PNG screenshot as JPEG."""
+        with Image.open(io.BytesIO(png_bytes)) as image:
+            image = image.convert("RGB")
+            if image.width > self.max_width:
+                image = image.resize((self.max_width, round(image.height * self.max_width / image.width)))
+            output = io.BytesIO()
+            image.save(output, "JPEG", quality=self.jpeg_quality, optimize=True)
+            return output.getvalue()
+
+    def _write_screenshot(self, path, png_bytes):
+        self._write(path, self._encode_screenshot(png_bytes) if Image is not None else png_bytes)
+
+    def _write_compressed(self, path, data):
+        self._write(path, gzip.compress(data, compresslevel=6))
+
+    def _drain(self):
+        while True:
+            function, path, data = self._queue.get()
+            try:
+                function(path, data)
+                self.stats["stored"] += 1
+            except Exception as e:
+                print(f"⚠️ Failed to write artifact {os.path.basename(path)}: {e}")
+                self.stats["failed"] += 1
+                with self._lock:
+                    self._known.discard(path)
+            finally:
+                self._queue.task_done()
+
+    def _enqueue(self, function, path, data):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._drain, name="artifact-writer", daemon=True)
+                self._writer.start()
+        start = time.perf_counter()
+        # Blocks while the queue is full, which is the backpressure on capture bursts
+        self._queue.put((function, path, data))
+        self.stats["enqueue_wait"] += time.perf_counter() - start
+
+    def add_screenshot(self, png_bytes):
+        """Queue a PNG screenshot for storage and return (sha256, path); duplicates return the stored object."""
+        digest = hashlib.sha256(png_bytes).hexdigest()
+        path = self.object_path(digest, "jpg" if Image is not None else "png")
+        if self._claim(path):
+            self._enqueue(self._write_screenshot, path, png_bytes)
+        return digest, path
+
+    def add_page_source(self, page_source):
+        """Queue a page source for gzip storage and return (sha256, path); duplicates return the stored object."""
+        data = page_source.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest, "html.gz")
+        if self._claim(path):
+            self._enqueue(self._write_compressed, path, data)
+        return digest, path
+
+    def add_dom_snapshot(self, snapshot):
+        """Queue a DevTools DOM snapshot for gzip storage as JSON and return (sha256, path)."""
+        data = json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest, "json.gz")
+        if self._claim(path):
+            self._enqueue(self._write_compressed, path, data)
+        return digest, path
+
+    def add_file(self, data, extension):
+        """Queue already-encoded bytes (e.g. a JPEG frame) for storage as-is and return (sha256, path)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest, extension)
+        if self._claim(path):
+            self._enqueue(self._write, path, data)
+        return digest, path
+
+    def flush(self):
+        """Wait until every queued artifact has been written."""
+        if self._writer is not None:
+            self._queue.join()
+
+def attach_artifact(test_case, kind, label, digest, path):
+    """Link a stored artifact to the active step, or to the test case when no step is running."""
+    artifact = {"kind": kind, "label": label, "sha256": digest, "path": path}
+    step = current_step()
+    owner = step if step is not None else test_case
+    if owner is None:
+        return artifact
+    # Nested failure handlers capture the same broken page again; link it once
+    for existing in owner.artifacts or ():
+        if existing["sha256"] == digest:
+            return existing
+    owner.add_artifact(artifact)
+    return artifact
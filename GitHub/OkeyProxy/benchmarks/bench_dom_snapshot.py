@@ -0,0 +1,47 @@
+"""
+DOM Snapshot Benchmark
+Times driver.page_source against a DevTools DOM snapshot on a live page, including the artifact store's hashing.
+
+Usage: python benchmarks/bench_dom_snapshot.py <url> [repeats]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from selenium import webdriver
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artifact_store import ArtifactStore
+from dom_snapshot import capture_dom_snapshot
+
+def time_capture(capture, repeats):
+    """Get the median seconds of capture() over repeats runs."""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        capture()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    url = sys.argv[1]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    driver = webdriver.Chrome()
+    try:
+        driver.get(url)
+        with tempfile.TemporaryDirectory() as artifact_dir:
+            store = ArtifactStore(artifact_dir)
+            source_time = time_capture(lambda: store.add_page_source(driver.page_source), repeats)
+            snapshot_time = time_capture(lambda: store.add_dom_snapshot(capture_dom_snapshot(driver)), repeats)
+            store.flush()
+        print(f"{'Capture':<16}{'Median (ms)':>12}")
+        print(f"{'page_source':<16}{source_time * 1000:>12.1f}")
+        print(f"{'DOM snapshot':<16}{snapshot_time * 1000:>12.1f}")
+    finally:
+        driver.quit()
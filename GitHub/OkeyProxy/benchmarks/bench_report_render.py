@@ -0,0 +1,70 @@
+"""
+Report Rendering Benchmark
+Renders synthetic reports of growing size and prints time per step and the renderer's peak extra memory.
+
+Usage: python benchmarks/bench_report_render.py [max_steps]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from test_report import TestReport, TestCase, TestStep
+
+STEPS_PER_CASE = 50
+
+def build_report(report_dir, total_steps):
+    """Build a finished report with total_steps steps, every tenth one failed."""
+    report = TestReport(report_dir)
+    report.start()
+    for case_number in range(total_steps // STEPS_PER_CASE):
+        test_case = TestCase(f"Synthetic Case {case_number}", "Synthetic test case for the render benchmark")
+        report.add_test_case(test_case)
+        test_case.start()
+        for step_number in range(STEPS_PER_CASE):
+            step = TestStep(f"Step {step_number}", "Click <button> & wait for the page")
+            test_case.add_step(step)
+            step.start()
+            step.record_command("findElement", 0.01)
+            step.record_time("sleep", 0.001 * (step_number % 7))
+            if step_number % 10 == 9:
+                step.complete(False, "Element <div class='x'> not found", "Traceback (most recent call last):\n  ...")
+            else:
+                step.complete(True)
+            test_case.step_completed(step)
+        test_case.complete()
+    report.complete()
+    return report
+
+def measure(report, render):
+    """Return the render time and the peak memory allocated while rendering."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    render()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    max_steps = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    sizes = [size for size in (1000, 10000, 25000, 50000, 100000) if size <= max_steps]
+
+    print(f"{'Steps':>8} {'HTML (s)':>10} {'us/step':>8} {'Peak MB':>8} {'Text (s)':>10} {'File MB':>8}")
+    with tempfile.TemporaryDirectory() as report_dir:
+        for size in sizes:
+            report = build_report(report_dir, size)
+            html_path = os.path.join(report_dir, "bench.html")
+            html_time, html_peak = measure(report, lambda: report.generate_html_report("bench"))
+            text_time, _ = measure(report, lambda: report.generate_text_report("", "bench"))
+            print(f"{size:>8} {html_time:>10.3f} {html_time / size * 1e6:>8.1f} "
+                  f"{html_peak / 1024 / 1024:>8.2f} {text_time:>10.3f} "
+                  f"{os.path.getsize(html_path) / 1024 / 1024:>8.1f}")
+            report.event_log.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Step Memory Benchmark
+Compares the memory held per step by the original TestStep and the current one, with and without profiling data.
+
+Usage: python benchmarks/bench_step_memory.py [steps]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from test_report import TestStep
+
+class BaselineStep:
+    """The original TestStep, copied unchanged: an instance dict with wall-clock timestamps."""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.start_time = None
+        self.end_time = None
+        self.status = "NOT_STARTED"
+        self.error_message = None
+
+    def start(self):
+        self.start_time = time.time()
+        self.status = "RUNNING"
+
+    def complete(self, success=True, error_message=None, stack_trace=None):
+        self.end_time = time.time()
+        self.status = "PASSED" if success else "FAILED"
+        self.error_message = error_message
+        self.stack_trace = stack_trace
+
+# Step names and failure messages repeat across a monitoring run, so they are shared rather than measured per step
+NAMES = [(f"Step {i}", f"Description of step {i}") for i in range(50)]
+FAILURE = "Element not found"
+
+def build_objects(step_class, count, profiled=False):
+    """Build count completed steps, one in ten failed, as the report keeps them."""
+    steps = []
+    for i in range(count):
+        name, description = NAMES[i % len(NAMES)]
+        step = step_class(name, description)
+        step.start()
+        if profiled:
+            step.record_command("findElement", 0.01)
+            step.record_time("command", 0.01)
+        failed = i % 10 == 9
+        step.complete(not failed, FAILURE if failed else None)
+        steps.append(step)
+    return steps
+
+def measure(build, count):
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build(count)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size, elapsed
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"Steps: {count} (10% failed)")
+    print(f"{'Layout':<26} {'MB':>8} {'Bytes/step':>11} {'Build (s)':>10}")
+    baseline = None
+    for label, build in (
+        ("Baseline TestStep", lambda n: build_objects(BaselineStep, n)),
+        ("TestStep", lambda n: build_objects(TestStep, n)),
+        ("TestStep, profiled", lambda n: build_objects(TestStep, n, profiled=True))
+    ):
+        size, elapsed = measure(build, count)
+        baseline = baseline or size
+        print(f"{label:<26} {size / 1024 / 1024:>8.1f} {size / count:>11.0f} {elapsed:>10.2f}"
+              f"  ({size / baseline * 100:.0f}% of baseline)")
+
+if __name__ == "__main__":
+    main()
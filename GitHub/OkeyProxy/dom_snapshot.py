@@ -0,0 +1,91 @@
+"""
+DOM Snapshot Module for Selenium Test Automation
+Captures the page through the DevTools DOMSnapshot domain: every document including iframes and shadow roots,
+with layout boxes and the computed styles that decide whether an element is visible and clickable.
+
+Usage: python dom_snapshot.py <snapshot.json.gz> [text to match in tag names and attributes]
+"""
+
+import gzip
+import json
+import os
+import sys
+
+# Computed styles captured per laid-out node; enough to explain "element not clickable" offline
+SNAPSHOT_COMPUTED_STYLES = ["display", "visibility", "opacity", "pointer-events", "z-index", "position", "overflow"]
+
+# "dom" stores a DOMSnapshot when the browser supports it, "source" always stores driver.page_source
+PAGE_SNAPSHOT_MODE = os.environ.get("OKEYPROXY_PAGE_SNAPSHOT", "dom")
+
+def capture_dom_snapshot(driver):
+    """Capture all documents, layout boxes, paint order and SNAPSHOT_COMPUTED_STYLES in one DevTools call."""
+    return driver.execute_cdp_cmd("DOMSnapshot.captureSnapshot", {
+        "computedStyles": SNAPSHOT_COMPUTED_STYLES,
+        "includeDOMRects": True,
+        "includePaintOrder": True
+    })
+
+def save_page_state(driver, artifact_store):
+    """Store a DOM snapshot, or the page source when snapshots are off or unsupported; returns (kind, sha256, path)."""
+    if PAGE_SNAPSHOT_MODE == "dom" and hasattr(driver, "execute_cdp_cmd"):
+        try:
+            digest, path = artifact_store.add_dom_snapshot(capture_dom_snapshot(driver))
+            return "dom snapshot", digest, path
+        except Exception as e:
+            print(f"⚠️ DOM snapshot failed, falling back to page source: {e}")
+    digest, path = artifact_store.add_page_source(driver.page_source)
+    return "page source", digest, path
+
+def load_snapshot(path):
+    """Read a stored snapshot, gzip-compressed or not."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def _string(strings, index):
+    return strings[index] if index is not None and index >= 0 else None
+
+def iter_layout_nodes(snapshot):
+    """Yield every laid-out element with its document, tag, attributes, bounds and computed styles."""
+    strings = snapshot["strings"]
+    for document in snapshot["documents"]:
+        document_url = _string(strings, document.get("documentURL"))
+        nodes = document["nodes"]
+        layout = document["layout"]
+        paint_orders = layout.get("paintOrders") or []
+        for position, node_index in enumerate(layout["nodeIndex"]):
+            if nodes["nodeType"][node_index] != 1:
+                continue
+            attributes = nodes["attributes"][node_index]
+            yield {
+                "document": document_url,
+                "node": _string(strings, nodes["nodeName"][node_index]),
+                "backend_node_id": nodes["backendNodeId"][node_index],
+                "attributes": {_string(strings, attributes[i]): _string(strings, attributes[i + 1])
+                               for i in range(0, len(attributes), 2)},
+                "bounds": layout["bounds"][position],
+                "styles": dict(zip(SNAPSHOT_COMPUTED_STYLES,
+                                   (_string(strings, index) for index in layout["styles"][position]))),
+                "paint_order": paint_orders[position] if position < len(paint_orders) else None
+            }
+
+def is_visible(node):
+    """Whether a laid-out node has a box and is not hidden by its own computed styles."""
+    x, y, width, height = node["bounds"]
+    styles = node["styles"]
+    return (width > 0 and height > 0 and styles.get("display") != "none"
+            and styles.get("visibility") not in ("hidden", "collapse") and styles.get("opacity") != "0")
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    pattern = sys.argv[2].lower() if len(sys.argv) > 2 else None
+    snapshot_nodes = iter_layout_nodes(load_snapshot(sys.argv[1]))
+    for layout_node in snapshot_nodes:
+        text = " ".join([layout_node["node"] or ""] + [f"{name}={value}" for name, value in layout_node["attributes"].items()])
+        if pattern and pattern not in text.lower():
+            continue
+        x, y, width, height = layout_node["bounds"]
+        print(f"{'visible' if is_visible(layout_node) else 'hidden ':7} {x:7.0f},{y:<7.0f} {width:6.0f}x{height:<6.0f} "
+              f"paint={layout_node['paint_order']} pointer-events={layout_node['styles'].get('pointer-events')} {text[:120]}")
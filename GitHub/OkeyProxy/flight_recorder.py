@@ -0,0 +1,223 @@
+"""
+Flight Recorder Module for Selenium Test Automation
+Keeps the last few seconds of page state in a fixed-size in-memory ring buffer per browser and writes it out only when a step fails.
+
+Enable with OKEYPROXY_FLIGHT_RECORDER=screenshot (downscaled JPEG frames) or OKEYPROXY_FLIGHT_RECORDER=dom (page sources).
+"""
+
+import base64
+import os
+import threading
+import time
+from collections import deque
+
+from step_profiler import add_wait_listener, unprofiled
+from test_report import add_step_failure_listener, current_step
+
+FLIGHT_RECORDER_MODES = ("screenshot", "dom")
+# Defaults keep about 10 seconds of history in well under 1 MB per browser
+RECORDER_CAPACITY = 10
+RECORDER_INTERVAL = 1.0
+RECORDER_MAX_WIDTH = 640
+RECORDER_JPEG_QUALITY = 40
+
+# Commands after which the page can no longer be captured
+_SKIP_COMMANDS = ("quit", "close", "deleteSession")
+
+class FlightRecorder:
+    """Captures page state at most every interval seconds on the test's own WebDriver commands, and around waits.
+
+    Capturing from the command hook instead of a timer thread keeps the
+    recorder on the thread that owns the browser and costs nothing while
+    the test is idle; a timer could not capture during a wait anyway, since
+    the browser answers a session's commands one at a time and an in-page
+    wait is a single long script call. So a wait is framed by a capture when
+    it starts and one when it ends, which for a timeout is the page as it
+    was when the wait gave up. Frames are kept encoded (base64 JPEG from the
+    CDP) so the buffer stays bounded by capacity frames.
+    """
+
+    def __init__(self, driver, mode="screenshot", capacity=RECORDER_CAPACITY, interval=RECORDER_INTERVAL,
+                 max_width=RECORDER_MAX_WIDTH, jpeg_quality=RECORDER_JPEG_QUALITY):
+        if mode not in FLIGHT_RECORDER_MODES:
+            raise ValueError(f"Unknown flight recorder mode: {mode}")
+        self.driver = driver
+        self.mode = mode
+        self.interval = interval
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.frames = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._capturing = False
+        self._last_capture = 0.0
+        self._wait_started = None
+        self._use_cdp = hasattr(driver, "execute_cdp_cmd")
+        self.started_at = time.perf_counter()
+        self.stats = {"captures": 0, "capture_failures": 0, "capture_time": 0.0,
+                      "buffered_bytes": 0, "peak_buffered_bytes": 0, "dumps": 0, "dumped_frames": 0}
+
+    def _grab(self):
+        if self.mode == "dom":
+            return self.driver.page_source
+        if not self._use_cdp:
+            return self.driver.get_screenshot_as_base64()
+        viewport = self.driver.execute_cdp_cmd("Page.getLayoutMetrics", {})["cssVisualViewport"]
+        scale = min(1.0, self.max_width / max(viewport["clientWidth"], 1))
+        return self.driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "jpeg",
+            "quality": self.jpeg_quality,
+            "optimizeForSpeed": True,
+            "clip": {"x": viewport["pageX"], "y": viewport["pageY"], "width": viewport["clientWidth"],
+                     "height": viewport["clientHeight"], "scale": scale}
+        })["data"]
+
+    def capture(self):
+        """Add one frame to the ring buffer, evicting the oldest when full."""
+        if self._capturing:
+            return
+        self._capturing = True
+        start = time.perf_counter()
+        try:
+            # Captures are the recorder's overhead, reported separately, not the active step's commands
+            with unprofiled():
+                payload = self._grab()
+        except Exception:
+            self.stats["capture_failures"] += 1
+            return
+        finally:
+            self._capturing = False
+            self._last_capture = time.perf_counter()
+            self.stats["capture_time"] += self._last_capture - start
+
+        step = current_step()
+        with self._lock:
+            if len(self.frames) == self.frames.maxlen:
+                self.stats["buffered_bytes"] -= len(self.frames[0][2])
+            self.frames.append((time.perf_counter_ns(), step.name if step is not None else None, payload))
+            self.stats["buffered_bytes"] += len(payload)
+            self.stats["peak_buffered_bytes"] = max(self.stats["peak_buffered_bytes"], self.stats["buffered_bytes"])
+            self.stats["captures"] += 1
+
+    def after_command(self, command):
+        """Capture if the interval has passed since the last frame."""
+        if command in _SKIP_COMMANDS or self._capturing:
+            return
+        if time.perf_counter() - self._last_capture >= self.interval:
+            self.capture()
+
+    def on_wait(self, driver, phase):
+        """Capture when a wait of this browser starts, and when it ends unless a command already captured since."""
+        if driver is not None and driver is not self.driver:
+            return
+        if phase == "start":
+            self.after_command(None)
+            self._wait_started = time.perf_counter()
+        elif self._wait_started is None or self._last_capture < self._wait_started:
+            self._wait_started = None
+            self.capture()
+        else:
+            self._wait_started = None
+
+    def dump(self, artifact_store, test_case, label):
+        """Write the buffered frames to the artifact store, attach them to the failing step and clear the buffer."""
+        from artifact_store import attach_artifact
+
+        with self._lock:
+            frames = list(self.frames)
+            self.frames.clear()
+            self.stats["buffered_bytes"] = 0
+        now_ns = time.perf_counter_ns()
+        attached = []
+        for captured_ns, step_name, payload in frames:
+            frame_label = f"{label} -{(now_ns - captured_ns) / 1e9:.1f}s" + (f" in {step_name}" if step_name else "")
+            if self.mode == "dom":
+                digest, path = artifact_store.add_page_source(payload)
+                kind = "recorded page source"
+            else:
+                extension = "jpg" if self._use_cdp else "png"
+                digest, path = artifact_store.add_file(base64.b64decode(payload), extension)
+                kind = "recorded frame"
+            attached.append(attach_artifact(test_case, kind, frame_label, digest, path))
+        self.stats["dumps"] += 1
+        self.stats["dumped_frames"] += len(attached)
+        return attached
+
+    def get_overhead(self):
+        """Get the share of wall time spent capturing since the recorder was attached."""
+        elapsed = time.perf_counter() - self.started_at
+        return self.stats["capture_time"] / elapsed if elapsed > 0 else 0.0
+
+    def print_stats(self):
+        captures = self.stats["captures"]
+        average_ms = self.stats["capture_time"] / captures * 1000 if captures else 0.0
+        print(f"📊 Flight recorder ({self.mode}): {captures} captures, {average_ms:.1f} ms avg, "
+              f"{self.get_overhead() * 100:.2f}% overhead, peak buffer {self.stats['peak_buffered_bytes'] / 1024:.0f} KB, "
+              f"{self.stats['dumped_frames']} frames written in {self.stats['dumps']} dumps")
+
+    def add_report_section(self, report):
+        """Add the recorder's overhead to the report so it can be watched in CI."""
+        captures = self.stats["captures"]
+        report.add_section(
+            "Flight Recorder",
+            ["Mode", "Captures", "Failed", "Avg Capture (ms)", "Overhead", "Peak Buffer (KB)", "Frames Written"],
+            [[self.mode, captures, self.stats["capture_failures"],
+              f"{self.stats['capture_time'] / captures * 1000:.1f}" if captures else "N/A",
+              f"{self.get_overhead() * 100:.2f}%", f"{self.stats['peak_buffered_bytes'] / 1024:.0f}",
+              self.stats["dumped_frames"]]]
+        )
+
+def attach_flight_recorder(driver, mode=None, artifact_store=None, **options):
+    """Attach a recorder to the driver's command executor; mode defaults to OKEYPROXY_FLIGHT_RECORDER.
+
+    With an artifact_store the recording is written whenever a tracked step fails.
+    Returns None when recording is disabled.
+    """
+    mode = mode or os.environ.get("OKEYPROXY_FLIGHT_RECORDER")
+    if not mode:
+        return None
+    executor = driver.command_executor
+    recorder = getattr(executor, "_flight_recorder", None)
+    if recorder is not None:
+        return recorder
+
+    recorder = FlightRecorder(driver, mode, **options)
+    original_execute = executor.execute
+
+    def execute(command, params):
+        try:
+            return original_execute(command, params)
+        finally:
+            recorder.after_command(command)
+
+    executor.execute = execute
+    executor._flight_recorder = recorder
+    add_wait_listener(recorder.on_wait)
+    if artifact_store is not None:
+        add_step_failure_listener(
+            lambda test_case, step: dump_flight_recording(driver, artifact_store, test_case, f"{step.name} failed"))
+    return recorder
+
+def get_flight_recorder(driver):
+    """Get the recorder attached to the driver, or None."""
+    if driver is None:
+        return None
+    return getattr(driver.command_executor, "_flight_recorder", None)
+
+def dump_flight_recording(driver, artifact_store, test_case, label):
+    """Write the driver's recording for a failure; a no-op when no recorder is attached."""
+    recorder = get_flight_recorder(driver)
+    if recorder is None:
+        return []
+    try:
+        return recorder.dump(artifact_store, test_case, label)
+    except Exception as e:
+        print(f"⚠️ Failed to write flight recording: {e}")
+        return []
+
+def report_flight_recording(driver, report):
+    """Print the recorder's overhead and add it to the report; a no-op when no recorder is attached."""
+    recorder = get_flight_recorder(driver)
+    if recorder is None:
+        return
+    recorder.print_stats()
+    recorder.add_report_section(report)
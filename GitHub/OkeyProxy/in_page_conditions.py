@@ -0,0 +1,98 @@
+"""
+In-Page Conditions Module for Selenium Test Automation
+Drop-in replacements for the expected_conditions the suites use, which InPageWait evaluates inside the page:
+a MutationObserver re-checks the condition on every DOM change and the async script returns the moment it holds,
+instead of a full WebDriver round trip every 500 ms.
+
+Usage: import in_page_conditions as EC; wait = InPageWait(driver, 20); wait.until(EC.element_to_be_clickable(locator))
+"""
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from page_helpers import get_page_helpers
+
+# Locator strategies the helper bundle can evaluate; other conditions are polled from Python
+IN_PAGE_STRATEGIES = (By.XPATH, By.CSS_SELECTOR, By.ID)
+
+class InPageCondition:
+    """An expected condition that also carries a spec the helper bundle can evaluate in the page.
+
+    Calling it with a driver evaluates the Selenium equivalent, so it still works with WebDriverWait.
+    """
+
+    def __init__(self, spec, fallback):
+        self.spec = spec
+        self.fallback = fallback
+
+    def __call__(self, driver):
+        return self.fallback(driver)
+
+    def __repr__(self):
+        return f"InPageCondition({self.spec})"
+
+def _element_condition(kind, locator, fallback, **fields):
+    spec = dict(fields, kind=kind, locator=tuple(locator)) if locator[0] in IN_PAGE_STRATEGIES else None
+    return InPageCondition(spec, fallback)
+
+def presence_of_element_located(locator):
+    return _element_condition("presence", locator, expected_conditions.presence_of_element_located(locator))
+
+def visibility_of_element_located(locator):
+    return _element_condition("visible", locator, expected_conditions.visibility_of_element_located(locator))
+
+def element_to_be_clickable(locator):
+    return _element_condition("clickable", locator, expected_conditions.element_to_be_clickable(locator))
+
+def text_to_be_present_in_element(locator, text_):
+    return _element_condition("text", locator, expected_conditions.text_to_be_present_in_element(locator, text_),
+                              value=text_)
+
+def element_attribute_to_include(locator, attribute_):
+    return _element_condition("attribute", locator, expected_conditions.element_attribute_to_include(locator, attribute_),
+                              attribute=attribute_)
+
+def text_to_be_present_in_element_attribute(locator, attribute_, text_):
+    return _element_condition("attribute_text", locator,
+                              expected_conditions.text_to_be_present_in_element_attribute(locator, attribute_, text_),
+                              attribute=attribute_, value=text_)
+
+def url_contains(url):
+    return InPageCondition({"kind": "url_contains", "value": url}, expected_conditions.url_contains(url))
+
+def url_to_be(url):
+    return InPageCondition({"kind": "url_to_be", "value": url}, expected_conditions.url_to_be(url))
+
+def url_matches(pattern):
+    return InPageCondition({"kind": "url_matches", "value": pattern}, expected_conditions.url_matches(pattern))
+
+class InPageWait:
+    """WebDriverWait look-alike: in_page_conditions resolve in the page, anything else is polled as usual."""
+
+    def __init__(self, driver, timeout, poll_frequency=0.5):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.stats = {"in_page": 0, "polled": 0}
+
+    def until(self, method, message=""):
+        """Wait until method holds and return its value; raises TimeoutException after timeout seconds."""
+        spec = getattr(method, "spec", None)
+        if spec is None:
+            self.stats["polled"] += 1
+            return WebDriverWait(self.driver, self.timeout, self.poll_frequency).until(method, message)
+
+        self.stats["in_page"] += 1
+        result = get_page_helpers(self.driver).wait_for(spec, self.timeout)
+        if result["ok"]:
+            return result["value"]
+        if result["error"] != "not found":
+            raise WebDriverException(f"In-page wait for {spec['kind']} failed: {result['error']}")
+        raise TimeoutException(message or f"In-page wait for {spec} timed out after {self.timeout}s")
+
+    def until_not(self, method, message=""):
+        """Polled like WebDriverWait.until_not; the in-page observer only waits for conditions to become true."""
+        self.stats["polled"] += 1
+        return WebDriverWait(self.driver, self.timeout, self.poll_frequency).until_not(method, message)
@@ -0,0 +1,146 @@
+"""
+Package Provisioning Module for OkeyProxy Test Data Setup
+Creates customer packages in bulk through the admin backend instead of the admin UI.
+The backend path is experimental and opt-in; the admin UI flow remains the default way packages are created.
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+class ProvisioningError(Exception):
+    """Raised when the admin backend rejects a package creation request."""
+
+class AdminApiProvisioner:
+    """EXPERIMENTAL: replays the HTTP call the admin "开套餐" dialog submits, as recorded from the browser.
+
+    The endpoint, the session header and the body fields are not hardcoded: they come from a request recorded
+    with the browser's devtools, stored as JSON {"url", "token_header", "body"}. String values of the recorded
+    body written as "{customer_id}" or "{<spec key>}" are replaced with the customer id and the spec's values.
+    """
+
+    def __init__(self, recorded_request, token, timeout=30):
+        self.url = recorded_request["url"]
+        self.token_header = recorded_request["token_header"]
+        self.body_template = recorded_request["body"]
+        self.token = token
+        self.timeout = timeout
+
+    @classmethod
+    def from_file(cls, path, token, timeout=30):
+        """Create a provisioner from a recorded request JSON file."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), token, timeout)
+
+    def build_payload(self, customer_id, spec):
+        """Fill the recorded request body with the customer id and the spec's values."""
+        values = dict(spec, customer_id=customer_id)
+        payload = {}
+        for field, template in self.body_template.items():
+            if isinstance(template, str) and template.startswith("{") and template.endswith("}"):
+                key = template[1:-1]
+                if values.get(key) is None:
+                    raise ProvisioningError(f"Package spec {spec['package_type']} has no value for {field} ({key})")
+                payload[field] = values[key]
+            else:
+                payload[field] = template
+        return payload
+
+    def create_package(self, customer_id, spec):
+        """Create a single package and return the backend response."""
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.build_payload(customer_id, spec)).encode("utf-8"),
+            headers={
+                "Content-Type": "application/json;charset=UTF-8",
+                self.token_header: self.token
+            },
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.loads(response.read().decode("utf-8") or "{}")
+        except urllib.error.HTTPError as e:
+            raise ProvisioningError(f"HTTP {e.code} creating {spec['package_type']}: {e.reason}")
+        except urllib.error.URLError as e:
+            raise ProvisioningError(f"Admin backend unreachable: {e.reason}")
+
+        # The admin backend answers 200 with an application-level code
+        if body.get("code") not in (None, 0, 200, "0", "200"):
+            raise ProvisioningError(f"Backend rejected {spec['package_type']}: {body.get('msg') or body}")
+        return body
+
+class LocalProvisioner:
+    """In-process stand-in for the admin backend, used in tests and dry runs."""
+
+    def __init__(self, latency=0.0, fail_types=None):
+        self.latency = latency
+        self.fail_types = set(fail_types or [])
+        self.packages = []
+        self._lock = threading.Lock()
+
+    def create_package(self, customer_id, spec):
+        """Record the package in memory and return a backend-like response."""
+        if self.latency:
+            time.sleep(self.latency)
+        if spec["package_type"] in self.fail_types:
+            raise ProvisioningError(f"Backend rejected {spec['package_type']}: simulated failure")
+        with self._lock:
+            package = {
+                "id": len(self.packages) + 1,
+                "customerId": customer_id,
+                "packageType": spec["package_type"],
+                "amount": spec.get("amount", "0")
+            }
+            self.packages.append(package)
+        return {"code": 200, "data": package}
+
+def provision_packages(provisioner, customer_id, specs, max_workers=4):
+    """Create all package specs for a customer concurrently and return one result per spec."""
+    def create(spec):
+        start = time.perf_counter()
+        try:
+            response = provisioner.create_package(customer_id, spec)
+            return {
+                "spec": spec,
+                "success": True,
+                "response": response,
+                "error": None,
+                "duration": time.perf_counter() - start
+            }
+        except Exception as e:
+            return {
+                "spec": spec,
+                "success": False,
+                "response": None,
+                "error": str(e),
+                "duration": time.perf_counter() - start
+            }
+
+    if not specs:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(specs)))) as executor:
+        return list(executor.map(create, specs))
+
+if __name__ == "__main__":
+    # Self-check of the payload builder and the local stand-in: python package_provisioning.py
+    recorded = {"url": "https://admin.example/api/open", "token_header": "token",
+                "body": {"customerId": "{customer_id}", "price": "{original_price}", "remark": "test"}}
+    spec = {"package_type": "datacenter", "original_price": 9.9, "amount": "0"}
+    assert AdminApiProvisioner(recorded, "t").build_payload("1723", spec) == \
+        {"customerId": "1723", "price": 9.9, "remark": "test"}
+    try:
+        AdminApiProvisioner(recorded, "t").build_payload("1723", dict(spec, original_price=None))
+        raise AssertionError("missing spec value was not rejected")
+    except ProvisioningError:
+        pass
+
+    provisioner = LocalProvisioner(fail_types=["datacenter"])
+    specs = [{"package_type": "static_residential", "amount": "1"}, spec]
+    results = provision_packages(provisioner, "1723", specs)
+    assert [result["success"] for result in results] == [True, False]
+    assert [package["packageType"] for package in provisioner.packages] == ["static_residential"]
+    print("✅ package_provisioning self-check passed")
@@ -0,0 +1,482 @@
+"""
+Page Helpers Module for Selenium Test Automation
+Injects a small JavaScript helper bundle into every document, so that find-scroll-click, wait-for-any,
+fill-input, hide-overlays, condition waits and network-idle readiness each cost one asynchronous WebDriver round trip
+instead of four or five.
+
+The bundle is registered once per browser with Page.addScriptToEvaluateOnNewDocument; documents
+loaded before that, and browsers without DevTools, get it injected on first use.
+"""
+
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+
+from step_profiler import profiled_wait
+
+DEFAULT_TIMEOUT = 20
+# Slack between the in-page timeout and the WebDriver script timeout, so the page always answers first
+SCRIPT_TIMEOUT_MARGIN = 5
+# Fallback re-check interval of in-page waits, for changes no DOM mutation reports
+IN_PAGE_POLL_INTERVAL = 0.1
+# A page is ready after this long without counted network activity
+NETWORK_IDLE_TIME = 0.5
+# Upper bound of a readiness wait; pages that never go idle continue after it with a warning
+NETWORK_IDLE_TIMEOUT = 10
+# Requests that never settle or do not affect the page's readiness (regular expressions on the URL)
+NETWORK_IDLE_IGNORE = (
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"doubleclick\.net",
+    r"hm\.baidu\.com",
+    r"clarity\.ms",
+    r"facebook\.(com|net)",
+    r"chat",
+    r"[/.](logger|beacon|collect|telemetry)\b",
+)
+# Chat widgets that intercept clicks
+OVERLAY_SELECTORS = (
+    "#s-chat-plugin",
+    'iframe[title*="Contact"]',
+    'iframe[id*="chat"]',
+    'iframe[title*="chat"]',
+    '[style*="fixed"][title="Contact us"]',
+    '[style*="fixed"][title="Contact"]',
+)
+# Hidden only when they hold an iframe
+OVERLAY_CONTAINER_SELECTORS = ('[class*="chat"]', '[id*="chat"]')
+
+HELPER_BUNDLE = """
+(function () {
+    if (window.__okeyproxyHelpers) {
+        return;
+    }
+    var POLL_INTERVAL = 50;
+    var MAX_FINISHED_REQUESTS = 200;
+
+    // In-flight fetch/XHR requests and recently finished resources, tracked from document start
+    // when the bundle is registered through DevTools
+    var network = {nextId: 0, pending: {}, finished: [], fromStart: document.readyState === 'loading'};
+    function requestStarted(url) {
+        var id = ++network.nextId;
+        network.pending[id] = String(url);
+        return id;
+    }
+    function requestFinished(id) {
+        delete network.pending[id];
+    }
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function (input) {
+            var id = requestStarted(input && input.url ? input.url : input);
+            var promise = originalFetch.apply(this, arguments);
+            promise.then(function () { requestFinished(id); }, function () { requestFinished(id); });
+            return promise;
+        };
+    }
+    var originalOpen = XMLHttpRequest.prototype.open;
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__okeyproxyUrl = url;
+        return originalOpen.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function () {
+        var id = requestStarted(this.__okeyproxyUrl);
+        this.addEventListener('loadend', function () { requestFinished(id); });
+        try {
+            return originalSend.apply(this, arguments);
+        } catch (error) {
+            requestFinished(id);
+            throw error;
+        }
+    };
+    // Observers see every resource (scripts and route chunks too), even once the timing buffer is full
+    if (window.PerformanceObserver) {
+        new PerformanceObserver(function (list) {
+            list.getEntries().forEach(function (entry) {
+                network.finished.push({url: entry.name, end: entry.responseEnd || entry.startTime + entry.duration});
+            });
+            if (network.finished.length > MAX_FINISHED_REQUESTS) {
+                network.finished.splice(0, network.finished.length - MAX_FINISHED_REQUESTS);
+            }
+        }).observe({type: 'resource', buffered: true});
+    }
+    function networkState(options) {
+        var ignore = options.ignore.map(function (pattern) { return new RegExp(pattern); });
+        function counted(url) {
+            return !ignore.some(function (pattern) { return pattern.test(url); });
+        }
+        var pending = Object.keys(network.pending).map(function (id) { return network.pending[id]; }).filter(counted);
+        var now = performance.now();
+        var recent = network.finished.some(function (request) {
+            return counted(request.url) && now - request.end < options.idle;
+        });
+        return {idle: document.readyState === 'complete' && !pending.length && !recent, pending: pending};
+    }
+
+    function find(locator) {
+        if (locator.by === 'xpath') {
+            return document.evaluate(locator.value, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        }
+        return document.querySelector(locator.value);
+    }
+    function isDisplayed(element) {
+        return !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length)
+            && getComputedStyle(element).visibility !== 'hidden';
+    }
+    function usable(element, options) {
+        return !!element && (!options.displayed || isDisplayed(element)) && !(options.enabled && element.disabled);
+    }
+    // First usable match of the locators in order, as {index, element}, or null
+    function findAny(locators, options) {
+        for (var i = 0; i < locators.length; i++) {
+            var element = find(locators[i]);
+            if (usable(element, options)) {
+                return {index: i, element: element};
+            }
+        }
+        return null;
+    }
+    function poll(check, timeout) {
+        var start = performance.now();
+        return new Promise(function (resolve) {
+            (function tick() {
+                var value = check();
+                if (value || performance.now() - start >= timeout) {
+                    resolve(value);
+                } else {
+                    setTimeout(tick, POLL_INTERVAL);
+                }
+            })();
+        });
+    }
+    function result(start, match, fields) {
+        fields.elapsed_ms = Math.round(performance.now() - start);
+        if (match) {
+            fields.index = match.index;
+            fields.element = match.element;
+            fields.tag = match.element.tagName.toLowerCase();
+            fields.text = (match.element.innerText || match.element.value || '').trim().slice(0, 100);
+        }
+        return fields;
+    }
+    function evaluateCondition(condition) {
+        if (condition.kind === 'url_contains') {
+            return location.href.indexOf(condition.value) !== -1;
+        }
+        if (condition.kind === 'url_to_be') {
+            return location.href === condition.value;
+        }
+        if (condition.kind === 'url_matches') {
+            return new RegExp(condition.value).test(location.href);
+        }
+        var element = find(condition.locator);
+        if (!element) {
+            return null;
+        }
+        switch (condition.kind) {
+            case 'presence':
+                return element;
+            case 'visible':
+                return isDisplayed(element) ? element : null;
+            case 'clickable':
+                return isDisplayed(element) && !element.disabled ? element : null;
+            case 'text':
+                return (element.innerText || '').indexOf(condition.value) !== -1;
+            case 'attribute':
+                return element.hasAttribute(condition.attribute);
+            case 'attribute_text':
+                return (element.getAttribute(condition.attribute) || '').indexOf(condition.value) !== -1;
+        }
+        throw new Error('Unknown condition ' + condition.kind);
+    }
+    function hide(element) {
+        element.style.setProperty('display', 'none', 'important');
+        element.style.setProperty('visibility', 'hidden', 'important');
+    }
+
+    window.__okeyproxyHelpers = {
+        findScrollClick: function (locators, options) {
+            var start = performance.now();
+            return poll(function () { return findAny(locators, options); }, options.timeout).then(function (match) {
+                if (!match) {
+                    return result(start, null, {ok: false, error: 'not found'});
+                }
+                match.element.scrollIntoView({block: 'center'});
+                match.element.click();
+                return result(start, match, {ok: true});
+            });
+        },
+        waitForAny: function (locators, options) {
+            var start = performance.now();
+            return poll(function () { return findAny(locators, options); }, options.timeout).then(function (match) {
+                return result(start, match, match ? {ok: true} : {ok: false, error: 'not found'});
+            });
+        },
+        fillInput: function (locators, text, options) {
+            var start = performance.now();
+            return poll(function () { return findAny(locators, options); }, options.timeout).then(function (match) {
+                if (!match) {
+                    return result(start, null, {ok: false, error: 'not found'});
+                }
+                var element = match.element;
+                // The prototype's setter, so frameworks that wrap the value property see the change
+                var setter = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(element), 'value').set;
+                element.focus();
+                setter.call(element, text);
+                element.dispatchEvent(new Event('input', {bubbles: true}));
+                element.dispatchEvent(new Event('change', {bubbles: true}));
+                return result(start, match, element.value === text ? {ok: true} : {ok: false, error: 'value not accepted'});
+            });
+        },
+        // Re-checks on every DOM mutation, on history navigation and on a slow timer for what mutations
+        // do not report (pushState URL changes, stylesheet-driven visibility); requestAnimationFrame
+        // is not used since it stops in background windows
+        waitForCondition: function (condition, options) {
+            var start = performance.now();
+            return new Promise(function (resolve) {
+                var settled = false, checks = 0, interval = null, timer = null;
+                var observer = new MutationObserver(check);
+                function finish(value, error) {
+                    settled = true;
+                    observer.disconnect();
+                    clearInterval(interval);
+                    clearTimeout(timer);
+                    window.removeEventListener('popstate', check);
+                    window.removeEventListener('hashchange', check);
+                    resolve(result(start, null, value ? {ok: true, value: value, checks: checks}
+                                                      : {ok: false, error: error || 'not found', checks: checks}));
+                }
+                function check() {
+                    if (settled) {
+                        return;
+                    }
+                    checks++;
+                    var value;
+                    try {
+                        value = evaluateCondition(condition);
+                    } catch (error) {
+                        finish(null, String(error));
+                        return;
+                    }
+                    if (value) {
+                        finish(value);
+                    }
+                }
+                check();
+                if (settled) {
+                    return;
+                }
+                observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+                window.addEventListener('popstate', check);
+                window.addEventListener('hashchange', check);
+                interval = setInterval(check, options.poll);
+                timer = setTimeout(function () { finish(null); }, options.timeout);
+            });
+        },
+        // Ready once the document is complete and no counted request has been in flight or finished for options.idle ms
+        waitForNetworkIdle: function (options) {
+            var start = performance.now();
+            return poll(function () {
+                return networkState(options).idle;
+            }, options.timeout).then(function (idle) {
+                var state = networkState(options);
+                return result(start, null, {
+                    ok: idle, error: idle ? null : 'not idle', pending: state.pending.slice(0, 20), tracked_from_start: network.fromStart
+                });
+            });
+        },
+        hideOverlays: function (closeLocators, selectors, containerSelectors) {
+            var start = performance.now();
+            var closed = findAny(closeLocators, {displayed: true});
+            if (closed) {
+                closed.element.click();
+            }
+            var hidden = 0;
+            selectors.forEach(function (selector) {
+                document.querySelectorAll(selector).forEach(function (element) {
+                    hide(element);
+                    hidden++;
+                });
+            });
+            containerSelectors.forEach(function (selector) {
+                document.querySelectorAll(selector).forEach(function (element) {
+                    if (element.querySelector('iframe')) {
+                        hide(element);
+                        hidden++;
+                    }
+                });
+            });
+            return Promise.resolve({
+                ok: true,
+                closed: closed ? closed.index : null,
+                tried: closed ? closed.index + 1 : closeLocators.length,
+                hidden: hidden,
+                elapsed_ms: Math.round(performance.now() - start)
+            });
+        }
+    };
+})();
+"""
+
+CALL_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var helpers = window.__okeyproxyHelpers;
+if (!helpers) {
+    done({ok: false, missing: true});
+    return;
+}
+helpers[arguments[0]].apply(null, arguments[1]).then(done, function (error) {
+    done({ok: false, error: String(error)});
+});
+"""
+
+def _locator(locator):
+    """Convert a (By, value) locator, or a bare XPath or CSS string, to the bundle's {"by", "value"} form."""
+    if isinstance(locator, str):
+        by = By.XPATH if locator.startswith(("/", "(")) else By.CSS_SELECTOR
+        value = locator
+    else:
+        by, value = locator
+    if by == By.ID:
+        by, value = By.CSS_SELECTOR, f'[id="{value}"]'
+    if by not in (By.XPATH, By.CSS_SELECTOR):
+        raise ValueError(f"Unsupported locator strategy for page helpers: {by}")
+    return {"by": by, "value": value}
+
+def _locators(locators):
+    """Accept one locator or a list of alternatives, in priority order."""
+    if isinstance(locators, list):
+        return [_locator(locator) for locator in locators]
+    return [_locator(locators)]
+
+class PageHelpers:
+    """Runs the helper bundle's actions, one async script call each, returning their result dicts."""
+
+    def __init__(self, driver, timeout=DEFAULT_TIMEOUT):
+        self.driver = driver
+        self.timeout = timeout
+        self.registered = False
+        self.script_timeout = None
+        self.stats = {"calls": 0, "injections": 0, "reloads": 0}
+
+    def register(self):
+        """Register the bundle for every new document of the browser through DevTools."""
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HELPER_BUNDLE})
+            self.registered = True
+        except Exception as e:
+            print(f"⚠️ Page helpers not registered through DevTools, injecting them with every call: {e}")
+        return self.registered
+
+    def _call(self, action, args, timeout):
+        script_timeout = timeout + SCRIPT_TIMEOUT_MARGIN
+        if self.script_timeout is None or self.script_timeout < script_timeout:
+            self.driver.set_script_timeout(script_timeout)
+            self.script_timeout = script_timeout
+        self.stats["calls"] += 1
+        if self.registered:
+            result = self.driver.execute_async_script(CALL_SCRIPT, action, args)
+            if not result.get("missing"):
+                return result
+        # Documents loaded before registration (e.g. new windows) and browsers without DevTools
+        self.stats["injections"] += 1
+        return self.driver.execute_async_script(HELPER_BUNDLE + CALL_SCRIPT, action, args)
+
+    def _call_across_navigation(self, action, make_args, timeout):
+        """Like _call for waits, re-installing the call when a navigation unloads the document before it answers."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(deadline - time.monotonic(), 0)
+            try:
+                return self._call(action, make_args(remaining), remaining)
+            except WebDriverException as e:
+                if "unload" in str(e) and time.monotonic() < deadline:
+                    self.stats["reloads"] += 1
+                    continue
+                raise
+
+    def _finish(self, result, action, locators, timeout):
+        if result["ok"]:
+            return result
+        if result["error"] == "not found":
+            raise TimeoutException(f"{action}: no match within {timeout}s for {[locator['value'] for locator in locators]}")
+        raise WebDriverException(f"{action} failed: {result['error']}")
+
+    def click(self, locators, timeout=None, displayed=True, enabled=True):
+        """Wait for the first usable match of the locators, scroll it to the center and click it.
+
+        Raises TimeoutException when nothing matched within timeout seconds.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        locators = _locators(locators)
+        options = {"timeout": timeout * 1000, "displayed": displayed, "enabled": enabled}
+        return self._finish(self._call("findScrollClick", [locators, options], timeout), "click", locators, timeout)
+
+    def wait_for_any(self, locators, timeout=None, displayed=False):
+        """Wait until one of the locators matches; the result's index and element tell which one."""
+        timeout = self.timeout if timeout is None else timeout
+        locators = _locators(locators)
+        options = {"timeout": timeout * 1000, "displayed": displayed, "enabled": False}
+        return self._finish(self._call("waitForAny", [locators, options], timeout), "wait_for_any", locators, timeout)
+
+    def fill(self, locators, text, timeout=None):
+        """Wait for an enabled, displayed input and set its value, firing input and change events."""
+        timeout = self.timeout if timeout is None else timeout
+        locators = _locators(locators)
+        options = {"timeout": timeout * 1000, "displayed": True, "enabled": True}
+        return self._finish(self._call("fillInput", [locators, text, options], timeout), "fill", locators, timeout)
+
+    def wait_for(self, condition, timeout=None, poll=IN_PAGE_POLL_INTERVAL):
+        """Wait in the page until condition (a spec from in_page_conditions) holds; returns the raw result dict."""
+        timeout = self.timeout if timeout is None else timeout
+        condition = dict(condition)
+        if "locator" in condition:
+            condition["locator"] = _locator(condition["locator"])
+        # Booked as a wait, not as the command time of the one async script it takes
+        with profiled_wait(f"wait {condition['kind']}", self.driver) as outcome:
+            try:
+                result = self._call_across_navigation(
+                    "waitForCondition", lambda remaining: [condition, {"timeout": remaining * 1000, "poll": poll * 1000}],
+                    timeout)
+            except TimeoutException:
+                # The script timeout hit before the page answered, e.g. a frozen page; same as not found in time
+                result = {"ok": False, "error": "not found"}
+            outcome["timed_out"] = not result["ok"]
+        return result
+
+    def wait_for_network_idle(self, idle=NETWORK_IDLE_TIME, timeout=NETWORK_IDLE_TIMEOUT, ignore=NETWORK_IDLE_IGNORE):
+        """Wait until the document is complete and no request outside ignore has been active for idle seconds.
+
+        Returns the result dict; when not ok, "pending" lists the requests still in flight.
+        """
+        with profiled_wait("wait network idle", self.driver) as outcome:
+            try:
+                result = self._call_across_navigation(
+                    "waitForNetworkIdle",
+                    lambda remaining: [{"idle": idle * 1000, "timeout": remaining * 1000, "ignore": list(ignore)}], timeout)
+            except TimeoutException:
+                result = {"ok": False, "error": "not idle", "pending": []}
+            outcome["timed_out"] = not result["ok"]
+        return result
+
+    def hide_overlays(self, close_locators=(), selectors=OVERLAY_SELECTORS, container_selectors=OVERLAY_CONTAINER_SELECTORS):
+        """Click the first displayed close button, if any, then hide every overlay matching the selectors."""
+        arguments = [_locators(list(close_locators)), list(selectors), list(container_selectors)]
+        return self._call("hideOverlays", arguments, 0)
+
+def attach_page_helpers(driver, timeout=DEFAULT_TIMEOUT):
+    """Attach helpers to the driver's command executor and register the bundle; returns the helpers."""
+    executor = driver.command_executor
+    helpers = getattr(executor, "_page_helpers", None)
+    if helpers is None:
+        helpers = PageHelpers(driver, timeout)
+        helpers.register()
+        executor._page_helpers = helpers
+    return helpers
+
+def get_page_helpers(driver):
+    """Get the helpers attached to the driver, attaching them on first use."""
+    return attach_page_helpers(driver)
@@ -0,0 +1,180 @@
+"""
+Report History Module for Selenium Test Automation
+Stores finished runs, test cases and steps in SQLite and answers trend and percentile queries across runs.
+
+Usage: python report_history.py <history.db> p95 "OkeyProxy Login" [days]
+       python report_history.py <history.db> trend "OkeyProxy Login" [days]
+"""
+
+import math
+import os
+import sqlite3
+import sys
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    started_at REAL,
+    duration REAL,
+    total_tests INTEGER,
+    passed_tests INTEGER,
+    failed_tests INTEGER,
+    report_dir TEXT
+);
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    description TEXT,
+    status TEXT,
+    started_at REAL,
+    duration REAL,
+    error_message TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    case_id INTEGER NOT NULL REFERENCES cases(id),
+    name TEXT NOT NULL,
+    status TEXT,
+    started_at REAL,
+    duration REAL,
+    exclusive_duration REAL,
+    command_count INTEGER,
+    error_message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_cases_name_started_at ON cases(name, started_at);
+CREATE INDEX IF NOT EXISTS idx_steps_name_started_at ON steps(name, started_at);
+CREATE INDEX IF NOT EXISTS idx_steps_case_id ON steps(case_id);
+"""
+
+class HistoryStore:
+    """SQLite store of finished test runs."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def record_run(self, report, run_name):
+        """Insert a finished report in one transaction and return the run id."""
+        summary = report.get_summary()
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (name, started_at, duration, total_tests, passed_tests, failed_tests, report_dir) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_name, report.start_time, summary["duration"], summary["total_tests"],
+                 summary["passed_tests"], summary["failed_tests"], report.report_dir)
+            ).lastrowid
+            for test_case in report.test_cases:
+                case_id = self.connection.execute(
+                    "INSERT INTO cases (run_id, name, description, status, started_at, duration, error_message) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, test_case.name, test_case.description, test_case.status, test_case.start_time,
+                     test_case.get_duration(), test_case.error_message)
+                ).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO steps (run_id, case_id, name, status, started_at, duration, exclusive_duration, "
+                    "command_count, error_message) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, case_id, step.name, step.status, step.start_time, step.get_duration(),
+                      step.get_exclusive_duration(), step.command_count, step.error_message)
+                     for step in test_case.steps]
+                )
+        return run_id
+
+    def _since(self, days):
+        return time.time() - days * 86400
+
+    def step_durations(self, step_name, days=30, status="PASSED", limit=None, exclude_run_id=None, run_name=None):
+        """Get the durations of a step over the last days, oldest first; status=None includes failures.
+
+        limit keeps only the most recent durations, exclude_run_id leaves out one run (e.g. the current one),
+        run_name keeps only runs of that suite, since suites reuse generic step names.
+        """
+        query = ("SELECT steps.duration FROM steps JOIN runs ON runs.id = steps.run_id "
+                 "WHERE steps.name = ? AND steps.started_at >= ? AND steps.duration IS NOT NULL")
+        params = [step_name, self._since(days)]
+        if status is not None:
+            query += " AND steps.status = ?"
+            params.append(status)
+        if exclude_run_id is not None:
+            query += " AND steps.run_id != ?"
+            params.append(exclude_run_id)
+        if run_name is not None:
+            query += " AND runs.name = ?"
+            params.append(run_name)
+        query += " ORDER BY steps.started_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [row[0] for row in self.connection.execute(query, params)][::-1]
+
+    def step_percentile(self, step_name, percentile, days=30, status="PASSED"):
+        """Get a nearest-rank percentile (0-100) of a step's duration over the last days, or None."""
+        durations = sorted(self.step_durations(step_name, days, status))
+        if not durations:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * len(durations)))
+        return durations[rank - 1]
+
+    def step_trend(self, step_name, days=30):
+        """Get per-day run count, failures, average and maximum duration of a step over the last days."""
+        rows = self.connection.execute(
+            "SELECT date(started_at, 'unixepoch', 'localtime') AS day, COUNT(*), "
+            "SUM(status = 'FAILED'), AVG(duration), MAX(duration) "
+            "FROM steps WHERE name = ? AND started_at >= ? GROUP BY day ORDER BY day",
+            (step_name, self._since(days))
+        )
+        return [
+            {"day": day, "runs": runs, "failures": failures, "avg_duration": avg_duration, "max_duration": max_duration}
+            for day, runs, failures, avg_duration, max_duration in rows
+        ]
+
+    def case_pass_rate(self, case_name, days=30):
+        """Get the share of passed runs of a test case over the last days, or None if it never ran."""
+        total, passed = self.connection.execute(
+            "SELECT COUNT(*), SUM(status = 'PASSED') FROM cases WHERE name = ? AND started_at >= ?",
+            (case_name, self._since(days))
+        ).fetchone()
+        return passed / total if total else None
+
+    def slowest_steps(self, days=30, limit=10):
+        """Get the steps with the highest average duration over the last days."""
+        rows = self.connection.execute(
+            "SELECT name, COUNT(*), AVG(duration), MAX(duration) FROM steps "
+            "WHERE started_at >= ? AND duration IS NOT NULL GROUP BY name ORDER BY AVG(duration) DESC LIMIT ?",
+            (self._since(days), limit)
+        )
+        return [
+            {"name": name, "runs": runs, "avg_duration": avg_duration, "max_duration": max_duration}
+            for name, runs, avg_duration, max_duration in rows
+        ]
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[2] not in ("p95", "trend"):
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    query_days = int(sys.argv[4]) if len(sys.argv) > 4 else 30
+    with HistoryStore(sys.argv[1]) as store:
+        if sys.argv[2] == "p95":
+            p95 = store.step_percentile(sys.argv[3], 95, query_days)
+            print(f"p95 of {sys.argv[3]} over {query_days} days: " + (f"{p95:.2f}s" if p95 is not None else "no runs"))
+        else:
+            for day in store.step_trend(sys.argv[3], query_days):
+                print(f"{day['day']}: {day['runs']} runs, {day['failures']} failed, "
+                      f"avg {day['avg_duration'] or 0:.2f}s, max {day['max_duration'] or 0:.2f}s")
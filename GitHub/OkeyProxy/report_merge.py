@@ -0,0 +1,167 @@
+"""
+Report Merging Module for Selenium Test Automation
+Combines the reports of runs split across processes or machines into one report with parallel efficiency.
+
+Usage: python report_merge.py <output_dir> <shard events.jsonl or .json> [<shard> ...]
+"""
+
+import json
+import os
+import sys
+
+from report_renderer import render_html_report, render_text_report
+from test_report import EventLog, TestReport, read_events
+
+def read_shard_events(path):
+    """Yield the events of a shard: an events.jsonl log, or a JSON dump of a list of events or {"events": [...]}."""
+    if path.endswith(".jsonl"):
+        yield from read_events(path)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        dump = json.load(f)
+    yield from dump["events"] if isinstance(dump, dict) else dump
+
+def shard_label(path):
+    """Name a shard after its report directory, or its file name for a loose log."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name in ("events", "test_report"):
+        name = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return name
+
+class MergedReport:
+    """One report over several shards that loads a single shard at a time.
+
+    test_cases is re-read from the shard files on every pass, so rendering
+    stays linear in the total step count and only one shard is in memory.
+    The wall time, shard timings and execution errors are complete once a
+    pass over test_cases has finished, which is when the renderers read them.
+    """
+
+    def __init__(self, shard_paths, report_dir):
+        self.shard_paths = list(shard_paths)
+        self.report_dir = report_dir
+        self.execution_errors = []
+        self.shard_timings = []
+
+    @property
+    def test_cases(self):
+        self.execution_errors = []
+        self.shard_timings = []
+        for path in self.shard_paths:
+            label = shard_label(path)
+            shard = TestReport.from_events(read_shard_events(path), self.report_dir)
+            summary = shard.get_summary()
+            self.shard_timings.append({
+                "shard": label,
+                "start_time": shard.start_time,
+                "end_time": shard.end_time,
+                "duration": summary["duration"],
+                "tests": summary["total_tests"],
+                "failed_tests": summary["failed_tests"],
+                "steps": summary["total_steps"]
+            })
+            self.execution_errors.extend(dict(error, message=f"[{label}] {error['message']}") for error in shard.execution_errors)
+            for test_case in shard.test_cases:
+                test_case.name = f"[{label}] {test_case.name}"
+                yield test_case
+
+    def get_wall_time(self):
+        """Get the seconds from the earliest shard start to the latest shard end."""
+        starts = [timing["start_time"] for timing in self.shard_timings if timing["start_time"] is not None]
+        ends = [timing["end_time"] for timing in self.shard_timings if timing["end_time"] is not None]
+        if not starts or not ends:
+            return None
+        return max(ends) - min(starts)
+
+    def get_summed_time(self):
+        """Get the sum of all shard durations in seconds."""
+        return sum(timing["duration"] for timing in self.shard_timings if timing["duration"] is not None)
+
+    def get_parallel_efficiency(self):
+        """Get (speedup, efficiency): summed shard time over wall time, and that speedup per shard."""
+        wall_time = self.get_wall_time()
+        if not wall_time or not self.shard_timings:
+            return None, None
+        speedup = self.get_summed_time() / wall_time
+        return speedup, speedup / len(self.shard_timings)
+
+    def get_duration(self):
+        return self.get_wall_time()
+
+    @property
+    def sections(self):
+        rows = [[timing["shard"], f"{timing['duration']:.2f}" if timing["duration"] is not None else "N/A",
+                 timing["tests"], timing["failed_tests"], timing["steps"]] for timing in self.shard_timings]
+        sections = [("Shards", ["Shard", "Duration (s)", "Tests", "Failed", "Steps"], rows, "summary")]
+        speedup, efficiency = self.get_parallel_efficiency()
+        if speedup is not None:
+            sections.append(("Parallel Efficiency", ["Shards", "Wall Time (s)", "Summed Time (s)", "Speedup", "Efficiency"],
+                             [[len(self.shard_timings), f"{self.get_wall_time():.2f}", f"{self.get_summed_time():.2f}",
+                               f"{speedup:.2f}x", f"{efficiency * 100:.0f}%"]], "summary"))
+        return sections
+
+def write_merged_event_log(shard_paths, path):
+    """Stream all shard events into one event log, renumbering test cases so their ids stay unique.
+
+    Each shard's start and end are kept as a "shard" event. The log is written to a temporary file and
+    moved into place, so merging again into the same output replaces it instead of appending.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    event_log = EventLog(temp_path, append=False)
+    case_offset = 0
+    starts, ends = [], []
+    try:
+        for shard_path in shard_paths:
+            label = shard_label(shard_path)
+            shard_cases = 0
+            shard_start = shard_end = None
+            for event in read_shard_events(shard_path):
+                kind = event.get("event")
+                if kind == "report_start":
+                    shard_start = event["start_time"]
+                    continue
+                if kind == "report_end":
+                    shard_end = event["end_time"]
+                    continue
+                if "case" in event:
+                    event["case"] += case_offset
+                if kind == "case_added":
+                    event["name"] = f"[{label}] {event['name']}"
+                    event["shard"] = label
+                    shard_cases += 1
+                event_log.append(event)
+            event_log.append({"event": "shard", "shard": label, "start_time": shard_start, "end_time": shard_end})
+            starts += [shard_start] if shard_start is not None else []
+            ends += [shard_end] if shard_end is not None else []
+            case_offset += shard_cases
+        if starts:
+            event_log.append({"event": "report_start", "start_time": min(starts)})
+        if ends:
+            event_log.append({"event": "report_end", "end_time": max(ends)})
+    except BaseException:
+        event_log.close()
+        os.remove(temp_path)
+        raise
+    event_log.close()
+    os.replace(temp_path, path)
+    return path
+
+def merge_reports(shard_paths, report_dir, filename="merged_report"):
+    """Merge shard reports into one HTML report, text report and event log; returns the MergedReport."""
+    os.makedirs(report_dir, exist_ok=True)
+    merged = MergedReport(shard_paths, report_dir)
+    render_html_report(merged, os.path.join(report_dir, f"{filename}.html"))
+    render_text_report(merged, os.path.join(report_dir, f"{filename}.txt"))
+    write_merged_event_log(shard_paths, os.path.join(report_dir, f"{filename}_events.jsonl"))
+    return merged
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    merged_report = merge_reports(sys.argv[2:], sys.argv[1])
+    speedup, efficiency = merged_report.get_parallel_efficiency()
+    print(f"Merged {len(merged_report.shard_paths)} shards into {sys.argv[1]}")
+    if speedup is not None:
+        print(f"Wall time: {merged_report.get_wall_time():.2f}s | Summed: {merged_report.get_summed_time():.2f}s | "
+              f"Speedup: {speedup:.2f}x | Efficiency: {efficiency * 100:.0f}%")
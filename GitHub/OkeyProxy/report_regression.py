@@ -0,0 +1,120 @@
+"""
+Regression Detection Module for Selenium Test Automation
+Flags steps whose duration in this run is a significant slowdown against their rolling baseline in the run history.
+"""
+
+import statistics
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from report_history import HistoryStore
+
+# Iglewicz-Hoaglin cut-off for robust z-scores
+Z_SCORE_THRESHOLD = 3.5
+# A slowdown must also be noticeable in absolute and relative terms
+MIN_SLOWDOWN_SECONDS = 0.5
+MIN_SLOWDOWN_RATIO = 1.2
+# Baseline: the latest BASELINE_WINDOW passed samples of a step within BASELINE_DAYS, from runs of the same suite;
+# a step that runs several times per run contributes several samples
+BASELINE_WINDOW = 50
+BASELINE_DAYS = 30
+MIN_BASELINE_SAMPLES = 5
+# Floor on the spread so near-constant steps do not flag on noise
+MIN_SPREAD_RATIO = 0.05
+MIN_SPREAD_SECONDS = 0.05
+
+REGRESSION_EXIT_CODE = 3
+
+# Regressions found in this process, used for the exit status
+_detected_regressions = []
+
+def regression_exit_code():
+    """Get REGRESSION_EXIT_CODE if any run in this process regressed, otherwise 0."""
+    return REGRESSION_EXIT_CODE if _detected_regressions else 0
+
+def _current_durations(report):
+    """Get the median duration of every passed step name in the report."""
+    durations = {}
+    for test_case in report.test_cases:
+        for step in test_case.steps:
+            duration = step.get_duration()
+            if step.status == "PASSED" and duration is not None:
+                durations.setdefault(step.name, []).append(duration)
+    return {name: statistics.median(values) for name, values in durations.items()}
+
+def _baseline_stats(baselines):
+    """Get (median, MAD, sample count) per baseline, vectorized across all steps when NumPy is available."""
+    if np is not None:
+        window = max(len(baseline) for baseline in baselines)
+        matrix = np.full((len(baselines), window), np.nan)
+        for row, baseline in enumerate(baselines):
+            matrix[row, :len(baseline)] = baseline
+        medians = np.nanmedian(matrix, axis=1)
+        mads = np.nanmedian(np.abs(matrix - medians[:, None]), axis=1)
+        counts = np.count_nonzero(~np.isnan(matrix), axis=1)
+        return list(zip(medians.tolist(), mads.tolist(), counts.tolist()))
+
+    stats = []
+    for baseline in baselines:
+        median = statistics.median(baseline)
+        stats.append((median, statistics.median(abs(value - median) for value in baseline), len(baseline)))
+    return stats
+
+def detect_regressions(report, history_db, exclude_run_id=None):
+    """Compare each passed step of the report with its history and return the significant slowdowns."""
+    current = _current_durations(report)
+    with HistoryStore(history_db) as store:
+        baselines = {
+            name: store.step_durations(name, BASELINE_DAYS, limit=BASELINE_WINDOW, exclude_run_id=exclude_run_id,
+                                       run_name=report.run_name)
+            for name in current
+        }
+    names = [name for name, baseline in baselines.items() if len(baseline) >= MIN_BASELINE_SAMPLES]
+    if not names:
+        return []
+
+    regressions = []
+    for name, (median, mad, samples) in zip(names, _baseline_stats([baselines[name] for name in names])):
+        duration = current[name]
+        spread = max(1.4826 * mad, MIN_SPREAD_RATIO * median, MIN_SPREAD_SECONDS)
+        z_score = (duration - median) / spread
+        if (z_score >= Z_SCORE_THRESHOLD and duration - median >= MIN_SLOWDOWN_SECONDS
+                and duration >= median * MIN_SLOWDOWN_RATIO):
+            regressions.append({
+                "step": name,
+                "duration": duration,
+                "baseline_median": median,
+                "baseline_mad": mad,
+                "z_score": z_score,
+                "slowdown": duration - median,
+                "samples": samples
+            })
+    regressions.sort(key=lambda regression: regression["z_score"], reverse=True)
+    return regressions
+
+def check_report_for_regressions(report, history_db, exclude_run_id=None):
+    """Detect regressions for a finished report, add them as a report section and record them for the exit status."""
+    try:
+        regressions = detect_regressions(report, history_db, exclude_run_id)
+    except Exception as e:
+        print(f"⚠️ Regression check failed: {e}")
+        return []
+
+    if regressions:
+        _detected_regressions.extend(regressions)
+        print(f"⚠️ {len(regressions)} step duration regression(s) against the last {BASELINE_DAYS} days:")
+        for regression in regressions:
+            print(f"   {regression['step']}: {regression['duration']:.2f}s vs median "
+                  f"{regression['baseline_median']:.2f}s (z={regression['z_score']:.1f})")
+        report.add_section(
+            "Step Duration Regressions",
+            ["Step", "Duration (s)", "Baseline Median (s)", "Slowdown (s)", "Robust Z", "Baseline Samples"],
+            [[regression["step"], f"{regression['duration']:.2f}", f"{regression['baseline_median']:.2f}",
+              f"+{regression['slowdown']:.2f}", f"{regression['z_score']:.1f}", regression["samples"]]
+             for regression in regressions],
+            css_class="execution-errors"
+        )
+    return regressions
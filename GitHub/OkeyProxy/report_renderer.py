@@ -0,0 +1,439 @@
+"""
+Report Rendering Module for Selenium Test Automation
+Writes HTML and text reports straight to disk in chunks from a single pass over the report model.
+"""
+
+import heapq
+import html
+import os
+import shutil
+from datetime import datetime
+
+from test_report import TIME_BUCKET_LABELS
+
+HTML_REPORT_STYLE = """
+        body { font-family: Arial, sans-serif; margin: 20px; }
+        .header { background-color: #f0f0f0; padding: 20px; border-radius: 5px; }
+        .summary { background-color: #e8f5e8; padding: 15px; border-radius: 5px; margin: 20px 0; }
+        .test-case { border: 1px solid #ddd; margin: 10px 0; border-radius: 5px; }
+        .test-case-header { background-color: #f9f9f9; padding: 10px; border-bottom: 1px solid #ddd; }
+        .test-step { margin: 5px 10px; padding: 5px; border-left: 3px solid #ddd; }
+        .passed { border-left-color: #4CAF50; }
+        .failed { border-left-color: #f44336; }
+        .running { border-left-color: #2196F3; }
+        .not-started { border-left-color: #9E9E9E; }
+        .error-details { background-color: #ffebee; padding: 10px; margin: 5px 0; border-radius: 3px; }
+        .stack-trace { background-color: #f5f5f5; padding: 10px; margin: 5px 0; font-family: monospace; font-size: 12px; white-space: pre-wrap; }
+        .execution-errors { background-color: #fff3cd; padding: 15px; border-radius: 5px; margin: 20px 0; }
+        .metrics-table { border-collapse: collapse; margin: 10px 0; }
+        .metrics-table th, .metrics-table td { border: 1px solid #ddd; padding: 5px 10px; text-align: left; }
+        .metrics-table th { background-color: #f0f0f0; }
+        .step-children { margin-left: 20px; }
+        .output-box { background-color: #2d3748; color: #e2e8f0; padding: 10px; border-radius: 4px; font-family: 'Courier New', monospace; font-size: 12px; white-space: pre-wrap; overflow-x: auto; max-height: 300px; overflow-y: auto; }
+"""
+
+class ChunkedWriter:
+    """Collects small writes and hands them to the file in chunks of roughly chunk_size characters."""
+
+    def __init__(self, path, chunk_size=256 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._file = open(path, 'w', encoding='utf-8')
+        self._parts = []
+        self._size = 0
+
+    def write(self, text):
+        """Queue text for writing, flushing a chunk once enough has accumulated."""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the queued text as one chunk."""
+        if self._parts:
+            self._file.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+
+    def copy_from(self, path):
+        """Append the content of another file without loading it into memory."""
+        self.flush()
+        with open(path, 'r', encoding='utf-8') as source:
+            shutil.copyfileobj(source, self._file)
+
+    def close(self):
+        """Flush remaining text and close the file."""
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+def escape(value):
+    """Escape a value for HTML output."""
+    return html.escape(str(value), quote=False)
+
+def format_seconds(value):
+    """Format a duration in seconds, or N/A when it is unknown."""
+    return f"{value:.2f}" if value is not None else "N/A"
+
+class RunMetrics:
+    """Aggregates counts, time buckets and top-N step tables while the steps are rendered."""
+
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.total_tests = 0
+        self.passed_tests = 0
+        self.failed_tests = 0
+        self.total_steps = 0
+        self.passed_steps = 0
+        self.failed_steps = 0
+        self.time_breakdown = dict.fromkeys(TIME_BUCKET_LABELS, 0.0)
+        self._chattiest = []
+        self._fix_first = []
+        self._sequence = 0
+
+    def add_test_case(self, test_case):
+        self.total_tests += 1
+        if test_case.status == "PASSED":
+            self.passed_tests += 1
+        elif test_case.status == "FAILED":
+            self.failed_tests += 1
+
+    def add_step(self, test_case, step, breakdown):
+        self.total_steps += 1
+        if step.status == "PASSED":
+            self.passed_steps += 1
+        elif step.status == "FAILED":
+            self.failed_steps += 1
+        for bucket, duration in breakdown.items():
+            self.time_breakdown[bucket] += duration
+
+        # Bounded heaps keep the top-N tables O(log N) per step
+        self._sequence += 1
+        if step.command_count:
+            self._push(self._chattiest, (step.command_count, self._sequence, test_case, step))
+        wasted = step.time_buckets["sleep"] + step.time_buckets["wait_timeout"]
+        if wasted > 0:
+            self._push(self._fix_first, (wasted, self._sequence, test_case, step))
+
+    def _push(self, heap, item):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+
+    def chattiest_steps(self):
+        return [(test_case, step) for _, _, test_case, step in sorted(self._chattiest, key=lambda item: (-item[0], item[1]))]
+
+    def fix_first_steps(self):
+        return [(wasted, test_case, step) for wasted, _, test_case, step in sorted(self._fix_first, key=lambda item: (-item[0], item[1]))]
+
+def _write_error_details(out, label, error_message, stack_trace, indent):
+    out.write(f"""
+{indent}<div class="error-details">
+{indent}    <p><strong>{label}:</strong> {escape(error_message)}</p>
+""")
+    if stack_trace:
+        out.write(f"""
+{indent}    <div class="stack-trace">{escape(stack_trace)}</div>
+""")
+    out.write("</div>")
+
+def _write_artifacts(out, artifacts, link_base):
+    """Write links to stored artifacts, labelled with their short hash."""
+    links = []
+    for artifact in artifacts:
+        href = os.path.relpath(artifact["path"], link_base).replace(os.sep, "/")
+        links.append(f'<a href="{html.escape(href)}">{escape(artifact["kind"])} {artifact["sha256"][:12]}</a> ({escape(artifact["label"])})')
+    out.write(f"""
+            <p>Artifacts: {" | ".join(links)}</p>
+""")
+
+def _write_step(out, metrics, test_case, step_id, step, children, link_base):
+    duration = step.get_duration()
+    breakdown = step.get_time_breakdown()
+    metrics.add_step(test_case, step, breakdown)
+
+    out.write(f"""
+        <div class="test-step {step.status.lower().replace('_', '-')}">
+            <p><strong>{escape(step.name)}</strong> - {escape(step.description)}</p>
+            <p>Status: {step.status}</p>
+            <p>Duration: {format_seconds(duration)} seconds</p>
+""")
+    nested_steps = children.get(step_id)
+    if nested_steps:
+        out.write(f"""
+            <p>Inclusive: {format_seconds(duration)} seconds | Exclusive: {format_seconds(step.get_exclusive_duration())} seconds</p>
+""")
+    if duration is not None:
+        breakdown_str = " | ".join(f"{TIME_BUCKET_LABELS[bucket]}: {seconds:.2f}s" for bucket, seconds in breakdown.items())
+        out.write(f"""
+            <p>Time Breakdown: {breakdown_str}</p>
+""")
+    if step.command_count:
+        out.write(f"""
+            <p>WebDriver Calls: {step.command_count} | Command Time: {step.command_time:.2f} seconds | Avg Latency: {step.command_time / step.command_count * 1000:.1f} ms</p>
+""")
+    if step.error_message:
+        _write_error_details(out, "Step Error", step.error_message, step.stack_trace, "            ")
+    if step.artifacts:
+        _write_artifacts(out, step.artifacts, link_base)
+
+    # Nested steps render inside their parent so the report reads as a span tree
+    if nested_steps:
+        out.write('<div class="step-children">')
+        for child_id, child in nested_steps:
+            _write_step(out, metrics, test_case, child_id, child, children, link_base)
+        out.write("</div>")
+    out.write("</div>")
+
+def _write_test_case(out, metrics, test_case, link_base):
+    metrics.add_test_case(test_case)
+    out.write(f"""
+    <div class="test-case">
+        <div class="test-case-header">
+            <h3>{escape(test_case.name)}</h3>
+            <p><strong>Status:</strong> {test_case.status}</p>
+            <p><strong>Description:</strong> {escape(test_case.description)}</p>
+            <p><strong>Duration:</strong> {format_seconds(test_case.get_duration())} seconds</p>
+""")
+    if test_case.error_message:
+        _write_error_details(out, "Test Case Error", test_case.error_message, test_case.stack_trace, "            ")
+    for label, text in test_case.details or ():
+        out.write(f"""
+            <h4>{escape(label)}</h4>
+            <div class="output-box">{escape(text)}</div>
+""")
+    if test_case.artifacts:
+        _write_artifacts(out, test_case.artifacts, link_base)
+    out.write("</div>")
+
+    # A step's id is its index in the test case, which is what its children's parent_id refers to
+    children = {}
+    for step_id, step in enumerate(test_case.steps):
+        children.setdefault(step.parent_id, []).append((step_id, step))
+    for step_id, step in children.get(None, []):
+        _write_step(out, metrics, test_case, step_id, step, children, link_base)
+
+    out.write("</div>")
+
+def _write_summary(out, report, metrics):
+    out.write(f"""
+    <div class="summary">
+        <h2>Summary</h2>
+        <p><strong>Total Tests:</strong> {metrics.total_tests}</p>
+        <p><strong>Passed:</strong> {metrics.passed_tests}</p>
+        <p><strong>Failed:</strong> {metrics.failed_tests}</p>
+        <p><strong>Total Steps:</strong> {metrics.total_steps}</p>
+        <p><strong>Passed Steps:</strong> {metrics.passed_steps}</p>
+        <p><strong>Failed Steps:</strong> {metrics.failed_steps}</p>
+        <p><strong>Duration:</strong> {format_seconds(report.get_duration())} seconds</p>
+        <p><strong>Execution Errors:</strong> {len(report.execution_errors)}</p>
+    </div>
+""")
+
+    # Add the run's time breakdown and the steps to fix first
+    tracked_time = sum(metrics.time_breakdown.values())
+    if tracked_time > 0:
+        out.write("""
+    <div class="summary">
+        <h2>Time Breakdown</h2>
+        <table class="metrics-table">
+            <tr><th>Bucket</th><th>Time (s)</th><th>Share</th></tr>
+""")
+        for bucket, label in TIME_BUCKET_LABELS.items():
+            out.write(f"""
+            <tr><td>{label}</td><td>{metrics.time_breakdown[bucket]:.2f}</td><td>{metrics.time_breakdown[bucket] / tracked_time * 100:.1f}%</td></tr>
+""")
+        out.write("""
+        </table>
+""")
+        fix_first_steps = metrics.fix_first_steps()
+        if fix_first_steps:
+            out.write("""
+        <h3>Fix First (Sleep + Wait Timeout)</h3>
+        <table class="metrics-table">
+            <tr><th>Step</th><th>Test Case</th><th>Sleep (s)</th><th>Wait Timeout (s)</th><th>Step Duration (s)</th></tr>
+""")
+            for wasted, test_case, step in fix_first_steps:
+                out.write(f"""
+            <tr><td>{escape(step.name)}</td><td>{escape(test_case.name)}</td><td>{step.time_buckets['sleep']:.2f}</td><td>{step.time_buckets['wait_timeout']:.2f}</td><td>{format_seconds(step.get_duration())}</td></tr>
+""")
+            out.write("""
+        </table>
+""")
+        out.write("</div>")
+
+    # Add the steps with the most WebDriver round trips
+    chattiest_steps = metrics.chattiest_steps()
+    if chattiest_steps:
+        out.write("""
+    <div class="summary">
+        <h2>Chattiest Steps (WebDriver Round Trips)</h2>
+        <table class="metrics-table">
+            <tr><th>Step</th><th>Test Case</th><th>Commands</th><th>Command Time (s)</th><th>Avg Latency (ms)</th><th>Top Commands</th></tr>
+""")
+        for test_case, step in chattiest_steps:
+            top_commands = sorted(step.command_types.items(), key=lambda item: item[1], reverse=True)[:3]
+            top_commands_str = ", ".join(f"{command} ×{count}" for command, count in top_commands)
+            out.write(f"""
+            <tr><td>{escape(step.name)}</td><td>{escape(test_case.name)}</td><td>{step.command_count}</td><td>{step.command_time:.2f}</td><td>{step.command_time / step.command_count * 1000:.1f}</td><td>{escape(top_commands_str)}</td></tr>
+""")
+        out.write("""
+        </table>
+    </div>
+""")
+
+    # Add sections contributed by checks such as regression detection
+    for title, headers, rows, css_class in report.sections:
+        out.write(f"""
+    <div class="{css_class}">
+        <h2>{escape(title)}</h2>
+        <table class="metrics-table">
+            <tr>{"".join(f"<th>{escape(header)}</th>" for header in headers)}</tr>
+""")
+        for row in rows:
+            out.write(f"""
+            <tr>{"".join(f"<td>{escape(cell)}</td>" for cell in row)}</tr>
+""")
+        out.write("""
+        </table>
+    </div>
+""")
+
+    # Add execution errors if any
+    if report.execution_errors:
+        out.write("""
+    <div class="execution-errors">
+        <h2>Execution Errors</h2>
+""")
+        for error in report.execution_errors:
+            out.write(f"""
+        <div class="error-details">
+            <p><strong>Time:</strong> {error['timestamp']}</p>
+            <p><strong>Error:</strong> {escape(error['message'])}</p>
+""")
+            if error['stack_trace']:
+                out.write(f"""
+            <div class="stack-trace">{escape(error['stack_trace'])}</div>
+""")
+            out.write("</div>")
+        out.write("</div>")
+
+def render_html_report(report, report_file, top_n=10, title="Test Execution Report"):
+    """Render a TestReport to an HTML file.
+
+    The test cases are written to a side file while the summary metrics are
+    collected, then the header and summary are written and the side file is
+    streamed in behind them, so the model is walked exactly once.
+    """
+    body_file = report_file + ".part"
+    # Artifact links are relative so a report directory can be moved together with the artifact store
+    link_base = os.path.dirname(os.path.abspath(report_file))
+    metrics = RunMetrics(top_n)
+    try:
+        with ChunkedWriter(body_file) as body:
+            for test_case in report.test_cases:
+                _write_test_case(body, metrics, test_case, link_base)
+
+        with ChunkedWriter(report_file) as out:
+            out.write(f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{escape(title)}</title>
+    <style>{HTML_REPORT_STYLE}    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>{escape(title)}</h1>
+        <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+""")
+            _write_summary(out, report, metrics)
+            out.copy_from(body_file)
+            out.write("""
+</body>
+</html>
+""")
+    finally:
+        if os.path.exists(body_file):
+            os.remove(body_file)
+    return report_file
+
+def render_text_report(report, report_file, console_output="", top_n=5):
+    """Render a TestReport to a text file in a single pass over its test cases."""
+    metrics = RunMetrics(top_n)
+    with ChunkedWriter(report_file) as out:
+        out.write(f"""
+Test Execution Report
+Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+{console_output}
+
+============================================================
+FINAL TEST SUMMARY
+============================================================
+""")
+
+        # Add test case results
+        for test_case in report.test_cases:
+            metrics.add_test_case(test_case)
+            status_icon = "✓" if test_case.status == "PASSED" else "✗" if test_case.status == "FAILED" else "⚠"
+            out.write(f"{status_icon} {test_case.name}: {test_case.status}\n")
+
+            failed_steps_written = False
+            if test_case.status == "FAILED" and test_case.error_message:
+                out.write(f"   Error: {test_case.error_message}\n")
+            for step_number, step in enumerate(test_case.steps, 1):
+                metrics.add_step(test_case, step, step.get_time_breakdown())
+                # Add error details for failed tests
+                if test_case.status == "FAILED" and step.status == "FAILED":
+                    if not failed_steps_written:
+                        out.write("   Failed Steps:\n")
+                        failed_steps_written = True
+                    out.write(f"     Step {step_number}: {step.name}\n")
+                    if step.error_message:
+                        out.write(f"       Error: {step.error_message}\n")
+
+        # Add execution errors if any
+        if report.execution_errors:
+            out.write("\nExecution Errors:\n")
+            for error in report.execution_errors:
+                out.write(f"  {error['timestamp']}: {error['message']}\n")
+
+        # Add the run's time breakdown and the steps to fix first
+        tracked_time = sum(metrics.time_breakdown.values())
+        if tracked_time > 0:
+            out.write("\nTime Breakdown:\n")
+            for bucket, label in TIME_BUCKET_LABELS.items():
+                out.write(f"  {label}: {metrics.time_breakdown[bucket]:.2f}s ({metrics.time_breakdown[bucket] / tracked_time * 100:.1f}%)\n")
+            fix_first_steps = metrics.fix_first_steps()
+            if fix_first_steps:
+                out.write("\nFix First (Sleep + Wait Timeout):\n")
+                for wasted, test_case, step in fix_first_steps:
+                    out.write(f"  {step.name} ({test_case.name}): {wasted:.2f}s\n")
+
+        # Add sections contributed by checks such as regression detection
+        for title, headers, rows, _ in report.sections:
+            out.write(f"\n{title}:\n")
+            for row in rows:
+                out.write("  " + " | ".join(f"{header}: {cell}" for header, cell in zip(headers, row)) + "\n")
+
+        # Add overall results
+        out.write(f"""
+Overall Results:
+  Passed: {metrics.passed_tests}
+  Failed: {metrics.failed_tests}
+  Skipped: 0
+  Total: {metrics.total_tests}
+
+Test reports saved in: {report.report_dir}
+""")
+    return report_file
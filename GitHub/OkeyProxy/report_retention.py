@@ -0,0 +1,345 @@
+"""
+Report Retention Module for Selenium Test Automation
+Keeps the reports directory within a size budget and a maximum age, keeping failing runs longer than passing ones.
+
+Runs are listed in <reports>/index.json with their status, size and the artifact objects they reference,
+so listing and pruning never walk the run directories. Artifact objects are shared between runs and are only
+removed once no remaining run references them; objects no indexed run references (e.g. from a run that crashed
+before registering) are removed once they have not been used for ORPHAN_GRACE_HOURS. Run directories that never
+registered, and report files older suites wrote straight into the reports directory, are indexed by the next prune
+once they finished or are that old, so they are pruned like any other run.
+
+The index is shared by the suites' processes, so every read-modify-write of it holds a lock file next to it.
+
+Usage: python report_retention.py <reports dir> list
+       python report_retention.py <reports dir> prune
+       python report_retention.py <reports dir> rebuild
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+from test_report import read_events
+
+INDEX_FILE = "index.json"
+# Budget for run directories plus artifact objects; history.db and the index are not counted
+RETENTION_MAX_BYTES = int(os.environ.get("OKEYPROXY_REPORTS_MAX_MB", "2048")) * 1024 * 1024
+PASSED_MAX_AGE_DAYS = 7
+FAILED_MAX_AGE_DAYS = 30
+# Unreferenced artifact objects and unindexed run directories younger than this may belong to a run still in progress
+ORPHAN_GRACE_HOURS = 24
+# Report files the connection test used to write straight into the reports directory; group 1 names their run
+LOOSE_REPORT_PATTERN = re.compile(r"^(proxy_connection_test_\d{8}_\d{6})(_[a-z]+)?\.(html|txt|jsonl|json)$")
+
+def directory_size(path):
+    """Get the total size in bytes of the files under path."""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+class RetentionManager:
+    """Indexes the run directories under root and prunes them by age and total size."""
+
+    def __init__(self, root, max_bytes=RETENTION_MAX_BYTES, passed_max_age_days=PASSED_MAX_AGE_DAYS,
+                 failed_max_age_days=FAILED_MAX_AGE_DAYS, artifact_dir="artifacts", orphan_grace_hours=ORPHAN_GRACE_HOURS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.passed_max_age_days = passed_max_age_days
+        self.failed_max_age_days = failed_max_age_days
+        self.artifact_dir = artifact_dir
+        self.orphan_grace_hours = orphan_grace_hours
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.lock_path = f"{self.index_path}.lock"
+        self._lock = threading.Lock()
+        self._prune_thread = None
+
+    @contextmanager
+    def _index_lock(self):
+        """Hold the index for this thread and, through the lock file, against the other suites' processes."""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.lock_path, 'a+b') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                else:
+                    f.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            # LK_LOCK gives up after about 10 seconds
+                            continue
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return self._rebuild_index()
+
+    def load_index(self):
+        """Read index.json, rebuilding it from the tree once if it is missing or unreadable."""
+        with self._index_lock():
+            return self._read_index()
+
+    def _save_index(self, index):
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+        os.replace(temp_path, self.index_path)
+
+    def _relative(self, path):
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def _scan_events(self, run_dir):
+        """Get (created, failed, referenced artifact objects, finished) of a run from its event logs."""
+        created, failed, artifacts, finished = None, False, set(), False
+        for name in os.listdir(run_dir):
+            if not name.endswith(".jsonl"):
+                continue
+            for event in read_events(os.path.join(run_dir, name)):
+                if event.get("event") == "report_start" and created is None:
+                    created = event.get("start_time")
+                if event.get("event") == "report_end":
+                    finished = True
+                if event.get("status") == "FAILED":
+                    failed = True
+                for artifact in event.get("artifacts") or ([event["artifact"]] if "artifact" in event else []):
+                    artifacts.add(self._relative(artifact["path"]))
+        return created, failed, artifacts, finished
+
+    def _index_run_dir(self, index, name, cutoff, created=None):
+        """Index a run directory unless it may still be in progress: unfinished and modified after cutoff."""
+        run_dir = os.path.join(self.root, name)
+        scanned_created, failed, artifacts, finished = self._scan_events(run_dir)
+        if not finished and created is None and os.path.getmtime(run_dir) >= cutoff:
+            return
+        index["runs"][name] = {
+            "created": scanned_created or created or os.path.getmtime(run_dir),
+            "status": "FAILED" if failed else "PASSED",
+            "size": None,
+            "artifacts": sorted(artifacts)
+        }
+
+    def _adopt_loose_reports(self, cutoff):
+        """Move loose report files older than cutoff into a run directory per run; returns {run name: oldest mtime}."""
+        adopted = {}
+        for name in os.listdir(self.root):
+            match = LOOSE_REPORT_PATTERN.match(name)
+            path = os.path.join(self.root, name)
+            if not match or not os.path.isfile(path):
+                continue
+            try:
+                modified = os.path.getmtime(path)
+                if modified >= cutoff:
+                    continue
+                run_dir = os.path.join(self.root, match.group(1))
+                os.makedirs(run_dir, exist_ok=True)
+                os.replace(path, os.path.join(run_dir, name))
+            except OSError:
+                continue
+            adopted[match.group(1)] = min(modified, adopted.get(match.group(1), modified))
+        return adopted
+
+    def _index_unregistered(self, index, cutoff):
+        """Index loose report files older than cutoff and run directories that finished or are older than cutoff."""
+        adopted = self._adopt_loose_reports(cutoff)
+        for name in os.listdir(self.root):
+            run_dir = os.path.join(self.root, name)
+            if name == self.artifact_dir or name in index["runs"] or not os.path.isdir(run_dir):
+                continue
+            try:
+                self._index_run_dir(index, name, cutoff, adopted.get(name))
+            except OSError:
+                continue
+
+    def _rebuild_index(self):
+        index = {"runs": {}}
+        if os.path.isdir(self.root):
+            self._index_unregistered(index, time.time() - self.orphan_grace_hours * 3600)
+            self._save_index(index)
+        return index
+
+    def rebuild_index(self):
+        """Index every run directory under root by reading its event logs."""
+        with self._index_lock():
+            return self._rebuild_index()
+
+    def register_run(self, report):
+        """Add a completed report's run directory to the index."""
+        if report.event_log is not None:
+            report.event_log.sync()
+        run_dir = os.path.abspath(report.report_dir)
+        created, failed, artifacts, finished = self._scan_events(run_dir)
+        summary = report.get_summary()
+        failed = failed or summary["failed_tests"] > 0 or bool(report.execution_errors)
+        with self._index_lock():
+            index = self._read_index()
+            index["runs"][self._relative(run_dir)] = {
+                "created": report.start_time or created or time.time(),
+                "status": "FAILED" if failed else "PASSED",
+                # Sized on the next prune, once the HTML and text reports have been written
+                "size": None,
+                "artifacts": sorted(artifacts)
+            }
+            self._save_index(index)
+
+    def list_runs(self):
+        """Get the indexed runs, newest first."""
+        runs = [dict(entry, name=name) for name, entry in self.load_index()["runs"].items()]
+        return sorted(runs, key=lambda run: run["created"], reverse=True)
+
+    def _remove_run(self, index, name, released):
+        shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        released.update(index["runs"].pop(name)["artifacts"])
+
+    def prune(self, keep=()):
+        """Delete expired runs, then the oldest runs (passing first) until within budget; returns removed run names.
+
+        Runs named in keep, e.g. the one that just finished, are never removed.
+        """
+        with self._index_lock():
+            index = self._read_index()
+            runs = index["runs"]
+            now = time.time()
+            removed = []
+            released = set()
+            self._index_unregistered(index, now - self.orphan_grace_hours * 3600)
+
+            for name, entry in list(runs.items()):
+                if not os.path.isdir(os.path.join(self.root, name)):
+                    del runs[name]
+                    continue
+                max_age_days = self.failed_max_age_days if entry["status"] == "FAILED" else self.passed_max_age_days
+                if name not in keep and now - entry["created"] > max_age_days * 86400:
+                    self._remove_run(index, name, released)
+                    removed.append(name)
+
+            run_sizes = {}
+            reference_counts = {}
+            for name, entry in runs.items():
+                if entry["size"] is None and name not in keep:
+                    entry["size"] = directory_size(os.path.join(self.root, name))
+                # Runs in keep are still writing their reports, so they are measured but not recorded
+                run_sizes[name] = entry["size"] if entry["size"] is not None else directory_size(os.path.join(self.root, name))
+                for path in entry["artifacts"]:
+                    reference_counts[path] = reference_counts.get(path, 0) + 1
+            object_sizes = {}
+            for path in reference_counts:
+                full_path = os.path.join(self.root, path)
+                object_sizes[path] = os.path.getsize(full_path) if os.path.exists(full_path) else 0
+            total = sum(run_sizes.values()) + sum(object_sizes.values())
+
+            # Passing runs go before failing ones, oldest first within each
+            candidates = sorted((name for name in runs if name not in keep),
+                                key=lambda name: (runs[name]["status"] == "FAILED", runs[name]["created"]))
+            for name in candidates:
+                if total <= self.max_bytes:
+                    break
+                total -= run_sizes[name]
+                for path in runs[name]["artifacts"]:
+                    reference_counts[path] -= 1
+                    if reference_counts[path] == 0:
+                        total -= object_sizes[path]
+                self._remove_run(index, name, released)
+                removed.append(name)
+
+            # Objects shared with a remaining run stay; objects of runs still in progress are never touched
+            referenced = {path for entry in runs.values() for path in entry["artifacts"]}
+            for path in released - referenced:
+                try:
+                    os.remove(os.path.join(self.root, path))
+                except OSError:
+                    continue
+            orphans = self._remove_orphan_artifacts(referenced, now)
+
+            self._save_index(index)
+        if removed:
+            print(f"📊 Pruned {len(removed)} old report(s), {total / 1024 / 1024:.0f} MB of {self.max_bytes / 1024 / 1024:.0f} MB used")
+        if orphans:
+            print(f"📊 Removed {orphans} artifact object(s) no indexed run references")
+        return removed
+
+    def _remove_orphan_artifacts(self, referenced, now):
+        """Delete artifact objects no indexed run references and nobody used within the grace period."""
+        removed = 0
+        cutoff = now - self.orphan_grace_hours * 3600
+        for directory, dirs, files in os.walk(os.path.join(self.root, self.artifact_dir)):
+            for name in files:
+                full_path = os.path.join(directory, name)
+                if self._relative(full_path) in referenced:
+                    continue
+                try:
+                    if os.path.getmtime(full_path) < cutoff:
+                        os.remove(full_path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
+
+    def prune_in_background(self, keep=()):
+        """Prune on a worker thread; it is not a daemon, so the process waits for deletions to finish."""
+        def run():
+            try:
+                self.prune(keep)
+            except Exception as e:
+                print(f"⚠️ Report pruning failed: {e}")
+
+        self._prune_thread = threading.Thread(target=run, name="report-retention")
+        self._prune_thread.start()
+        return self._prune_thread
+
+    def on_report_complete(self, report):
+        """Index the finished run and prune the others in the background."""
+        try:
+            self.register_run(report)
+        except Exception as e:
+            print(f"⚠️ Failed to index report {report.report_dir}: {e}")
+            return
+        self.prune_in_background(keep=(self._relative(os.path.abspath(report.report_dir)),))
+
+    def attach(self, report):
+        """Register and prune when the report completes."""
+        report.on_complete(lambda: self.on_report_complete(report))
+        return report
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[2] not in ("list", "prune", "rebuild"):
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    manager = RetentionManager(sys.argv[1])
+    if sys.argv[2] == "rebuild":
+        print(f"Indexed {len(manager.rebuild_index()['runs'])} runs")
+    elif sys.argv[2] == "prune":
+        print(f"Removed {len(manager.prune())} runs")
+    else:
+        for indexed_run in manager.list_runs():
+            size = f"{indexed_run['size'] / 1024 / 1024:.1f} MB" if indexed_run["size"] is not None else "unsized"
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(indexed_run['created']))}  "
+                  f"{indexed_run['status']:<6}  {size:>10}  {indexed_run['name']}")
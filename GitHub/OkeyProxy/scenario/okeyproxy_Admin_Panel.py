@@ -4,7 +4,6 @@ from selenium import webdriver
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
@@ -44,6 +43,9 @@ except ImportError as e:
             self.error_message = error_message
             self.stack_trace = stack_trace
         
+        def fail(self, error_message):
+            self.complete(success=False, error_message=error_message)
+        
         def get_duration(self):
             if self.start_time and self.end_time:
                 return self.end_time - self.start_time
@@ -93,7 +95,8 @@ except ImportError as e:
         step.start()
         try:
             yield step
-            step.complete(success=True)
+            if step.status == "RUNNING":
+                step.complete(success=True)
         except Exception as e:
             error_message = str(e)
             stack_trace = traceback.format_exc()
@@ -101,6 +104,31 @@ except ImportError as e:
             print(f"[ERROR] Step '{step_name}' failed: {error_message}")
             raise
 
+try:
+    from step_profiler import instrument_driver, install_timing_hooks, interval_capture_enabled
+except ImportError:
+    def instrument_driver(driver):
+        return driver
+    
+    def install_timing_hooks(capture_intervals=None):
+        pass
+    
+    def interval_capture_enabled():
+        return False
+
+from package_provisioning import AdminApiProvisioner, LocalProvisioner, provision_packages
+from report_regression import regression_exit_code
+from artifact_store import ArtifactStore, attach_artifact
+from dom_snapshot import save_page_state
+from report_retention import RetentionManager
+from selector_validator import preflight_selectors
+import in_page_conditions as EC
+from in_page_conditions import InPageWait
+from selector_registry import SelectorRegistry, LocatorTable
+from flight_recorder import attach_flight_recorder, dump_flight_recording, report_flight_recording
+from page_helpers import attach_page_helpers, get_page_helpers
+from concurrent.futures import ThreadPoolExecutor
+
 # ===== Driver Configuration =====
 def initialize_driver():
     """Initialize Chrome driver with optimized options"""
@@ -117,6 +145,9 @@ def initialize_driver():
     chrome_options.add_argument("--allow-running-insecure-content")
     
     driver = webdriver.Chrome(options=chrome_options)
+    instrument_driver(driver)
+    attach_flight_recorder(driver, artifact_store=artifact_store)
+    attach_page_helpers(driver)
     driver.maximize_window()
     return driver
 
@@ -127,16 +158,31 @@ wait = None
 def get_driver():
     global driver, wait
     if driver is None:
+        setup_run_services()
         driver = initialize_driver()
-        wait = WebDriverWait(driver, 20)
+        wait = InPageWait(driver, 20)
     return driver, wait
 
 report_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+HISTORY_DB = os.path.join(report_dir, "history.db")
+# Created by setup_run_services() when a run starts, so importing this module has no side effects
+artifact_store = None
+report_retention = None
+selector_registry = None
 
 # ===== OkeyProxy Admin Configuration =====
 SSO_LOGIN_URL = "https://sso.xiaoxitech.com/login?project=lqcjhumd&cb=https%3A%2F%2Ftest-admin-ipglobal.cd.xiaoxigroup.net"
 ADMIN_DASHBOARD_URL = "https://test-admin-ipglobal.cd.xiaoxigroup.net/"
 USER_DETAIL_URL = "https://test-admin-ipglobal.cd.xiaoxigroup.net/customerDetails?id=1723"
+ADMIN_CUSTOMER_ID = "1723"
+
+# Package provisioning for the website phase: unset (default) relies on the packages the admin UI tests create,
+# "local" uses the in-process stand-in, "api" (experimental) replays the request recorded in PACKAGE_PROVISIONING_REQUEST
+PACKAGE_PROVISIONING_MODE = os.environ.get("OKEYPROXY_PACKAGE_PROVISIONING")
+PACKAGE_PROVISIONING_REQUEST = os.environ.get("OKEYPROXY_PROVISIONING_REQUEST")
+
+# Admin session token captured from the SSO redirect after login
+admin_token = None
 
 # Admin Credentials
 USERNAME = "khordichze"
@@ -188,11 +234,64 @@ ADMIN_SELECTORS = {
         "success_alert_general": "//div[contains(@class, 'success')]"
     },
     "package_verification": {
-        "time_span": "//span[contains(text(), ':') and string-length(text()) = 8]",
-        "package_time": "//span[contains(text(), ':') and contains(text(), ':')]"
+        "package_table": ".el-table",
+        "package_table_header": ".el-table__header-wrapper th",
+        "package_table_rows": ".el-table__body-wrapper tbody tr",
+        "package_table_keyword": "套餐"
     }
 }
 
+# ===== Admin Package Type Configuration =====
+# Recognises a newly created package row in the customer package table: the row must contain every keyword
+# of one of the keyword groups and none of the excluded keywords, since types share words such as "Residential"
+ADMIN_PACKAGE_TYPES = {
+    "rotating_residential_advanced": {
+        "name": "Rotating Residential Proxies - Advanced",
+        "keywords": [["动态住宅", "Advanced"], ["Rotating Residential", "Advanced"]],
+        "excludes": ["Premium"]
+    },
+    "rotating_residential_premium": {
+        "name": "Rotating Residential Proxies - Premium",
+        "keywords": [["动态住宅", "Premium"], ["Rotating Residential", "Premium"]],
+        "excludes": ["Advanced"]
+    },
+    "rotating_datacenter": {
+        "name": "Rotating Datacenter Proxies",
+        "keywords": [["动态数据中心"], ["Rotating Datacenter"]],
+        "excludes": []
+    },
+    "static_residential": {
+        "name": "Static Residential Proxies",
+        "keywords": [["静态住宅"], ["Static Residential"], ["ISP"]],
+        "excludes": []
+    },
+    "datacenter": {
+        "name": "Datacenter Proxies",
+        "keywords": [["数据中心"], ["Datacenter"]],
+        "excludes": ["动态", "Rotating"]
+    },
+    "unlimited_residential": {
+        "name": "Unlimited Residential Proxies",
+        "keywords": [["不限量"], ["Unlimited"]],
+        "excludes": []
+    }
+}
+
+# Maximum time to wait for the new package row after confirming
+PACKAGE_VERIFICATION_TIMEOUT = 10
+
+# Packages the website payment phase renews. The *_option values are the dropdown option indexes the admin UI
+# tests select; they are not backend values, so a recorded request can only use package_type and amount until
+# the real type ids and prices are added here
+WEBSITE_TEST_PACKAGE_SPECS = [
+    {"package_type": "rotating_residential_advanced", "meal_type_option": 1, "ip_type_option": 2, "original_price_option": 13, "amount": "1"},
+    {"package_type": "rotating_residential_premium", "meal_type_option": 1, "ip_type_option": 3, "original_price_option": 8, "amount": "12"},
+    {"package_type": "rotating_datacenter", "meal_type_option": 1, "ip_type_option": 1, "original_price_option": 22, "amount": "2"},
+    {"package_type": "static_residential", "meal_type_option": 2, "ip_type_option": 2, "original_price_option": 3, "amount": "0"},
+    {"package_type": "datacenter", "meal_type_option": 3, "ip_type_option": 4, "original_price_option": 19, "amount": "0"},
+    {"package_type": "unlimited_residential", "meal_type_option": 4, "ip_type_option": 10, "original_price_option": None, "amount": "4"}
+]
+
 # ===== OkeyProxy Website Element Selectors =====
 OKEYPROXY_SELECTORS = {
     "login": {
@@ -201,15 +300,11 @@ OKEYPROXY_SELECTORS = {
         "login_button": "//button[contains(@class, 'custom-button')]//span[contains(text(), 'Login')]/.."
     },
     "transactions": {
-        "rotating_residential_advanced_button": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr[1]/td[9]/div/button[1]",
-        "rotating_residential_premium_button": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr[1]/td[9]/div/button[1]",
-        "rotating_datacenter_button": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr[1]/td[9]/div/button[1]",
-        "static_residential_tab": "//div[@data-v-2f3085af and @class='tab' and contains(text(), 'Static Residential Proxies (ISP)')]",
-        "static_residential_button": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr[1]/td[8]/div/button[1]",
-        "datacenter_tab": "//div[@data-v-2f3085af and @class='tab' and contains(text(), 'Datacenter Proxies')]",
-        "datacenter_button": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr[1]/td[8]/div/button[1]",
+        "static_residential_tab": "//div[@data-v-2f3085af and contains(@class, 'tab') and contains(text(), 'Static Residential Proxies (ISP)')]",
+        "datacenter_tab": "//div[@data-v-2f3085af and contains(@class, 'tab') and contains(text(), 'Datacenter Proxies')]",
         "unlimited_residential_tab": "//div[@data-v-2f3085af and contains(@class, 'tab') and contains(text(), 'Unlimited Residential Proxies')]",
-        "unlimited_residential_button": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr[1]/td[9]/div/button[1]"
+        "table_rows": "//*[@id='__layout']/section/section/main/div/div[2]/div[2]/div[1]/div[3]/table/tbody/tr",
+        "loading_mask": "//*[contains(@class, 'el-loading-mask')]"
     },
     "payment": {
         "payment_button": "//*[@id='__layout']/section/section/main/div/div[1]/div/div[2]/div/button",
@@ -223,51 +318,82 @@ OKEYPROXY_SELECTORS = {
     }
 }
 
+# ===== Fallback Selectors =====
+# Alternative locators per element; the selector registry tries the one that matched last time first
+FALLBACK_SELECTORS = {
+    "original_price_dropdown": [
+        ADMIN_SELECTORS["package_selection"]["original_price_dropdown"],
+        "//*[@id='app']/div/div/section/div/div[2]/div[6]/div/div/div[2]/div/form/div[3]/div/div//div[contains(@class, 'el-select')]",
+        "//*[@id='app']/div/div/section/div/div[2]/div[6]/div/div/div[2]/div/form/div[3]/div/div//div[contains(@class, 'el-input')]"
+    ],
+    "chat_close_button": [
+        "//button[contains(@class, 'chat-close')]",
+        "//button[contains(@class, 'close')]",
+        "//div[contains(@class, 'chat')]//button",
+        "//iframe[@id='s-chat-plugin']//..//button",
+        "//*[contains(@class, 'chat')]//*[contains(@class, 'close')]"
+    ],
+    "paypal_success_message": [
+        "//div[@class='payment-success-title']",
+        "//div[contains(@class, 'payment-success')]",
+        "//div[contains(text(), 'processed')]",
+        "//div[contains(text(), 'success')]"
+    ]
+}
+# Logical names resolve to the CSS translations selector_benchmark.py verified, else to the XPaths above
+locators = LocatorTable({"OKEYPROXY_SELECTORS": OKEYPROXY_SELECTORS, "ADMIN_SELECTORS": ADMIN_SELECTORS},
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_overrides.json"))
+
+def setup_run_services():
+    """Install the timing hooks and create the artifact store, report retention and selector registry of this run"""
+    global artifact_store, report_retention, selector_registry
+    if artifact_store is not None:
+        return
+    install_timing_hooks()
+    # Screenshots and page sources of all runs, stored once per distinct content
+    artifact_store = ArtifactStore(os.path.join(report_dir, "artifacts"))
+    # Keeps reports/ within its size budget; failing runs are kept longer
+    report_retention = RetentionManager(report_dir)
+    # One file per scenario, since the scenarios run concurrently and rank different pages
+    selector_registry = SelectorRegistry(os.path.join(report_dir, "selector_registry_admin.json"), FALLBACK_SELECTORS)
+
 # ===== Proxy Type Configuration =====
 PROXY_TYPES = {
     "rotating_residential_advanced": {
         "name": "Rotating Residential Proxies – Advanced",
-        "tab_required": False,
-        "button_xpath": OKEYPROXY_SELECTORS["transactions"]["rotating_residential_advanced_button"]
+        "tab_required": False
     },
     "rotating_residential_premium": {
         "name": "Rotating Residential Proxies – Premium", 
-        "tab_required": False,
-        "button_xpath": OKEYPROXY_SELECTORS["transactions"]["rotating_residential_premium_button"]
+        "tab_required": False
     },
     "rotating_datacenter": {
         "name": "Rotating Datacenter Proxies",
-        "tab_required": False,
-        "button_xpath": OKEYPROXY_SELECTORS["transactions"]["rotating_datacenter_button"]
+        "tab_required": False
     },
     "static_residential": {
         "name": "Static Residential Proxies",
         "tab_required": True,
-        "tab_xpath": OKEYPROXY_SELECTORS["transactions"]["static_residential_tab"],
-        "button_xpath": OKEYPROXY_SELECTORS["transactions"]["static_residential_button"]
+        "tab_xpath": OKEYPROXY_SELECTORS["transactions"]["static_residential_tab"]
     },
     "datacenter": {
         "name": "Datacenter Proxies",
         "tab_required": True,
-        "tab_xpath": OKEYPROXY_SELECTORS["transactions"]["datacenter_tab"],
-        "button_xpath": OKEYPROXY_SELECTORS["transactions"]["datacenter_button"]
+        "tab_xpath": OKEYPROXY_SELECTORS["transactions"]["datacenter_tab"]
     },
     "unlimited_residential": {
         "name": "Unlimited Residential Proxies",
         "tab_required": True,
-        "tab_xpath": OKEYPROXY_SELECTORS["transactions"]["unlimited_residential_tab"],
-        "button_xpath": OKEYPROXY_SELECTORS["transactions"]["unlimited_residential_button"]
+        "tab_xpath": OKEYPROXY_SELECTORS["transactions"]["unlimited_residential_tab"]
     }
 }
 
 # ===== Utility Functions =====
-def wait_for_page_load(driver, wait):
-    """Wait for page to fully load"""
-    try:
-        wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
-    except TimeoutException:
-        print("Warning: Page load timeout, continuing...")
-
+def wait_for_page_load(driver):
+    """Wait until the page has loaded and no network request has been active for a moment"""
+    result = get_page_helpers(driver).wait_for_network_idle()
+    if not result["ok"]:
+        print(f"Warning: Page still loading after timeout, continuing... (pending: {', '.join(result['pending']) or 'none'})")
 
 def create_report():
     """Creates a unique report directory with timestamp"""
@@ -276,12 +402,31 @@ def create_report():
     os.makedirs(test_dir, exist_ok=True)
     return test_dir
 
+def start_session_report(session_test_case, run_name):
+    """Create the session report up front so steps stream to its event log as they run"""
+    setup_run_services()
+    try:
+        report = TestReport(session_test_case.test_dir, history_db=HISTORY_DB, run_name=run_name)
+        report.on_complete(lambda: report_flight_recording(driver, report))
+        report.on_complete(lambda: selector_registry.add_report_section(report))
+        report.on_complete(artifact_store.flush)
+        report_retention.attach(report)
+        report.start()
+        report.add_test_case(session_test_case)
+        session_test_case.start()
+        return report
+    except Exception as e:
+        print(f"[WARNING] Failed to start test report: {e}")
+        return None
+
 def take_screenshot(test_case, step_name):
-    """Take screenshot and save to test directory"""
+    """Take screenshot and store it in the artifact store"""
     try:
         driver, wait = get_driver()
-        screenshot_path = os.path.join(test_case.test_dir, f"{step_name}_{int(time.time())}.png")
-        driver.save_screenshot(screenshot_path)
+        # Frames from the seconds before the failure, then the failure itself
+        dump_flight_recording(driver, artifact_store, test_case, step_name)
+        digest, screenshot_path = artifact_store.add_screenshot(driver.get_screenshot_as_png())
+        attach_artifact(test_case, "screenshot", step_name, digest, screenshot_path)
         print(f"Screenshot saved: {screenshot_path}")
         return screenshot_path
     except Exception as e:
@@ -289,12 +434,11 @@ def take_screenshot(test_case, step_name):
         return None
 
 def save_page_source(test_case, step_name):
-    """Save page source HTML"""
+    """Save a DOM snapshot (or the page source HTML), compressed, in the artifact store"""
     try:
         driver, wait = get_driver()
-        html_path = os.path.join(test_case.test_dir, f"{step_name}_{int(time.time())}.html")
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
+        kind, digest, html_path = save_page_state(driver, artifact_store)
+        attach_artifact(test_case, kind, step_name, digest, html_path)
         print(f"Page source saved: {html_path}")
         return html_path
     except Exception as e:
@@ -304,12 +448,13 @@ def save_page_source(test_case, step_name):
 # ===== Admin Login Function =====
 def login_to_admin_panel(test_case):
     """Login to admin panel using username and password with manual captcha"""
+    global admin_token
     with track_step(test_case, "Admin Login", "Login to admin panel using username/password"):
         try:
             driver, wait = get_driver()
             print("Navigating to SSO login page...")
             driver.get(SSO_LOGIN_URL)
-            time.sleep(3)
+            wait_for_page_load(driver)
             
             # Step 1: Click on username/password login option
             try:
@@ -317,7 +462,6 @@ def login_to_admin_panel(test_case):
                     (By.XPATH, "//span[contains(text(), '用户名密码登录')]")))
                 driver.execute_script("arguments[0].click();", username_login_btn)
                 print("[SUCCESS] Clicked on username/password login")
-                time.sleep(2)
             except Exception as e:
                 print(f"[ERROR] Failed to click username/password login: {str(e)}")
                 return False
@@ -368,6 +512,7 @@ def login_to_admin_panel(test_case):
                     
                     # Check if we've been redirected to admin panel
                     if "test-admin-ipglobal.cd.xiaoxigroup.net/?token" in current_url:
+                        admin_token = current_url.split("token=", 1)[1].split("&", 1)[0]
                         print("[SUCCESS] Successfully logged in to admin panel!")
                         return True
                     
@@ -389,13 +534,11 @@ def navigate_to_user_detail(test_case):
     with track_step(test_case, "Navigate to User Detail", "Navigate to user detail page"):
         try:
             driver, wait = get_driver()
-            print("Waiting 5 seconds before navigating...")
-            time.sleep(5)
+            print("Waiting for the admin panel to finish loading before navigating...")
+            wait_for_page_load(driver)
             print("Navigating to user detail page...")
             driver.get(USER_DETAIL_URL)
-            wait_for_page_load(driver, wait)
-            # Reduced wait time - just wait for page to be ready
-            time.sleep(1)
+            wait_for_page_load(driver)
             print("[SUCCESS] Successfully navigated to user detail page")
             return True
         except Exception as e:
@@ -420,28 +563,14 @@ def click_open_package_button(test_case):
                 "//button//span[contains(text(), '开套餐')]"
             ]
             
-            open_package_btn = None
-            for selector in open_package_selectors:
-                try:
-                    open_package_btn = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    print(f"Found open package button with selector: {selector}")
-                    break
-                except:
-                    continue
-            
-            if open_package_btn is None:
-                raise Exception("Open package button not found with any selector")
-            
-            # Scroll the button into view
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", open_package_btn)
-            
-            # Click the button
-            driver.execute_script("arguments[0].click();", open_package_btn)
+            # The first clickable match is scrolled into view and clicked in one page call
+            result = get_page_helpers(driver).click(open_package_selectors)
+            print(f"Found open package button with selector: {open_package_selectors[result['index']]}")
             print("[SUCCESS] Clicked on open package button")
             
             # Wait for the package selection form to appear
             wait.until(EC.presence_of_element_located(
-                (By.XPATH, ADMIN_SELECTORS["user_detail"]["package_type_label"])))
+                locators["ADMIN_SELECTORS.user_detail.package_type_label"]))
             print("[SUCCESS] Package selection form appeared")
             
             return True
@@ -461,19 +590,7 @@ def click_original_price_dropdown(test_case, arrow_down_count):
             print(f"Clicking Original Price and navigating with {arrow_down_count} Arrow Down presses...")
             
             # Find the dropdown element first
-            dropdown_element = None
-            dropdown_selectors = [
-                "//*[@id='app']/div/div/section/div/div[2]/div[6]/div/div/div[2]/div/form/div[3]/div/div/div[1]/input",
-                "//*[@id='app']/div/div/section/div/div[2]/div[6]/div/div/div[2]/div/form/div[3]/div/div//div[contains(@class, 'el-select')]",
-                "//*[@id='app']/div/div/section/div/div[2]/div[6]/div/div/div[2]/div/form/div[3]/div/div//div[contains(@class, 'el-input')]"
-            ]
-            
-            for selector in dropdown_selectors:
-                try:
-                    dropdown_element = wait.until(EC.presence_of_element_located((By.XPATH, selector)))
-                    break
-                except:
-                    continue
+            dropdown_element = selector_registry.find(driver, "original_price_dropdown", timeout=20)
             
             if not dropdown_element:
                 print(f"[WARNING] Could not find Original Price dropdown, continuing with test...")
@@ -608,7 +725,7 @@ def enter_amount(test_case, amount):
             print(f"Entering amount: {amount}")
             
             amount_field = wait.until(EC.element_to_be_clickable(
-                (By.XPATH, ADMIN_SELECTORS["package_selection"]["amount_input"])))
+                locators["ADMIN_SELECTORS.package_selection.amount_input"]))
             amount_field.clear()
             amount_field.send_keys(amount)
             
@@ -628,17 +745,9 @@ def click_confirm_button(test_case):
             driver, wait = get_driver()
             print("Clicking confirm button...")
             
-            # Use the known working selector
-            confirm_btn = wait.until(EC.element_to_be_clickable(
-                (By.XPATH, ADMIN_SELECTORS["package_selection"]["confirm_button"])))
-            
+            # Find, scroll into view and click in one page call
+            get_page_helpers(driver).click(locators["ADMIN_SELECTORS.package_selection.confirm_button"])
             print(f"Found confirm button with selector: {ADMIN_SELECTORS['package_selection']['confirm_button']}")
-            
-            # Scroll the button into view
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", confirm_btn)
-            
-            # Click the button
-            confirm_btn.click()
             print("[SUCCESS] Clicked confirm button")
             
             return True
@@ -648,132 +757,128 @@ def click_confirm_button(test_case):
             take_screenshot(test_case, "click_confirm_failed")
             return False
 
-def verify_package_creation(test_case):
-    """Verify package creation by looking for time span with time content"""
-    with track_step(test_case, "Verify Package Creation", "Verify new package created by checking time span"):
+PACKAGE_TABLE_SNAPSHOT_SCRIPT = """
+    var selectors = arguments[0];
+    var tables = Array.prototype.slice.call(document.querySelectorAll(selectors.package_table));
+    var table = null;
+    for (var i = 0; i < tables.length; i++) {
+        var headerText = Array.prototype.map.call(
+            tables[i].querySelectorAll(selectors.package_table_header),
+            function (th) { return th.innerText.trim(); }).join(' ');
+        if (headerText.indexOf(selectors.package_table_keyword) !== -1) {
+            table = tables[i];
+            break;
+        }
+    }
+    if (!table && tables.length) {
+        table = tables[0];
+    }
+    if (!table) {
+        return null;
+    }
+    var headers = Array.prototype.map.call(
+        table.querySelectorAll(selectors.package_table_header),
+        function (th) { return th.innerText.trim(); });
+    var rows = Array.prototype.map.call(
+        table.querySelectorAll(selectors.package_table_rows),
+        function (tr) {
+            return Array.prototype.map.call(tr.querySelectorAll('td'),
+                function (td) { return td.innerText.trim(); });
+        });
+    return {headers: headers, rows: rows};
+"""
+
+def snapshot_package_table():
+    """Extract the customer package table as structured rows in a single script call, or None if it cannot be read"""
+    try:
+        driver, wait = get_driver()
+        return driver.execute_script(PACKAGE_TABLE_SNAPSHOT_SCRIPT, ADMIN_SELECTORS["package_verification"])
+    except Exception as e:
+        print(f"[WARNING] Could not snapshot package table: {str(e)}")
+        return None
+
+def matches_package_type(row, package_type):
+    """Check whether a package table row is of the given package type"""
+    row_text = " ".join(row)
+    package_info = ADMIN_PACKAGE_TYPES[package_type]
+    if any(keyword in row_text for keyword in package_info["excludes"]):
+        return False
+    return any(all(keyword in row_text for keyword in group) for group in package_info["keywords"])
+
+def find_new_package_rows(before_snapshot, after_snapshot, package_type):
+    """Return rows present after but not before that match the requested package type"""
+    remaining = {}
+    for row in before_snapshot["rows"]:
+        key = tuple(row)
+        remaining[key] = remaining.get(key, 0) + 1
+    
+    new_rows = []
+    for row in after_snapshot["rows"]:
+        key = tuple(row)
+        if remaining.get(key, 0) > 0:
+            remaining[key] -= 1
+            continue
+        if matches_package_type(row, package_type):
+            new_rows.append(row)
+    return new_rows
+
+def verify_package_creation(test_case, package_type, before_snapshot):
+    """Verify package creation by diffing the package table against a snapshot taken before confirming"""
+    with track_step(test_case, "Verify Package Creation", f"Verify new {ADMIN_PACKAGE_TYPES[package_type]['name']} row in package table") as step:
         try:
             driver, wait = get_driver()
-            print("Verifying package creation by looking for time span...")
             
-            # Wait a bit for the page to update
-            time.sleep(3)
+            # Without the table as it was before confirming, every existing row would look new
+            if before_snapshot is None:
+                print(f"[ERROR] Package table was not read before confirming - cannot verify {package_type} creation")
+                take_screenshot(test_case, "package_verification_failed")
+                step.fail("Package table was not read before confirming")
+                return False
             
-            # Look for any span element that contains time format (HH:MM:SS)
-            try:
-                time_span = wait.until(EC.presence_of_element_located(
-                    (By.XPATH, ADMIN_SELECTORS["package_verification"]["time_span"])))
-                
-                if time_span and time_span.text.strip():
-                    time_text = time_span.text.strip()
-                    # Check if it looks like a time (contains : and has reasonable length)
-                    if ':' in time_text and len(time_text) >= 5:
-                        print(f"[SUCCESS] Package creation verified - Time found: {time_text}")
-                        return True
-                    else:
-                        print(f"[WARNING] Time span found but doesn't look like time: {time_text}")
-                        return False
-                else:
-                    print("[WARNING] Time span found but no text content")
+            print(f"Waiting for new {package_type} row in package table...")
+            
+            verification_start = time.perf_counter()
+            new_rows = []
+            
+            def new_row_appeared(driver):
+                after_snapshot = snapshot_package_table()
+                if after_snapshot is None:
                     return False
-                    
+                new_rows[:] = find_new_package_rows(before_snapshot, after_snapshot, package_type)
+                return bool(new_rows)
+            
+            try:
+                WebDriverWait(driver, PACKAGE_VERIFICATION_TIMEOUT, poll_frequency=0.25).until(new_row_appeared)
             except TimeoutException:
-                print("[WARNING] Time span not found - package may not have been created")
+                elapsed = time.perf_counter() - verification_start
+                print(f"[ERROR] No new {package_type} row appeared within {elapsed:.2f}s - package was not created")
+                take_screenshot(test_case, "package_verification_failed")
+                step.fail(f"No new {package_type} row appeared within {elapsed:.2f}s")
                 return False
+            
+            latency = time.perf_counter() - verification_start
+            print(f"[SUCCESS] Package creation verified in {latency:.2f}s - New row: {' | '.join(new_rows[0])}")
+            return True
                 
         except Exception as e:
             print(f"[ERROR] Failed to verify package creation: {str(e)}")
             take_screenshot(test_case, "package_verification_failed")
+            step.fail(f"Failed to verify package creation: {str(e)}")
             return False
 
 # ===== Website Payment Functions =====
 def handle_iframe_interference():
-    """Handle iframe interference by closing chat widgets and aggressively hiding iframes"""
+    """Close the chat widget and hide chat iframes and their containers in a single page call"""
     try:
         print("Handling iframe interference...")
-        
-        # Try to close any chat widgets or overlays
-        chat_close_selectors = [
-            "//button[contains(@class, 'chat-close')]",
-            "//button[contains(@class, 'close')]",
-            "//div[contains(@class, 'chat')]//button",
-            "//iframe[@id='s-chat-plugin']//..//button",
-            "//*[contains(@class, 'chat')]//*[contains(@class, 'close')]"
-        ]
-        
-        for selector in chat_close_selectors:
-            try:
-                close_button = driver.find_element(By.XPATH, selector)
-                if close_button.is_displayed():
-                    driver.execute_script("arguments[0].click();", close_button)
-                    print("[SUCCESS] Closed chat widget/iframe")
-                    time.sleep(1)
-                    break
-            except:
-                continue
-                
-        # Aggressively hide iframe and all related elements
-        try:
-            driver.execute_script("""
-                // Hide the specific chat iframe that's causing issues
-                var specificChat = document.getElementById('s-chat-plugin');
-                if (specificChat) {
-                    specificChat.style.display = 'none';
-                    specificChat.style.visibility = 'hidden';
-                    specificChat.style.zIndex = '-9999';
-                    specificChat.style.opacity = '0';
-                    specificChat.style.position = 'absolute';
-                    specificChat.style.left = '-9999px';
-                    specificChat.style.top = '-9999px';
-                    specificChat.style.width = '0px';
-                    specificChat.style.height = '0px';
-                }
-                
-                // Hide all chat-related iframes
-                var iframes = document.querySelectorAll('iframe[title*="Contact"], iframe[id*="chat"], iframe[title*="chat"], iframe[id="s-chat-plugin"]');
-                for (var i = 0; i < iframes.length; i++) {
-                    iframes[i].style.display = 'none';
-                    iframes[i].style.visibility = 'hidden';
-                    iframes[i].style.zIndex = '-9999';
-                    iframes[i].style.opacity = '0';
-                    iframes[i].style.position = 'absolute';
-                    iframes[i].style.left = '-9999px';
-                    iframes[i].style.top = '-9999px';
-                    iframes[i].style.width = '0px';
-                    iframes[i].style.height = '0px';
-                }
-                
-                // Hide any parent containers
-                var containers = document.querySelectorAll('[class*="chat"], [id*="chat"]');
-                for (var i = 0; i < containers.length; i++) {
-                    if (containers[i].querySelector('iframe')) {
-                        containers[i].style.display = 'none';
-                        containers[i].style.visibility = 'hidden';
-                        containers[i].style.zIndex = '-9999';
-                        containers[i].style.opacity = '0';
-                    }
-                }
-                
-                // Hide any fixed positioned elements that might interfere
-                var fixedElements = document.querySelectorAll('[style*="position: fixed"], [style*="position:fixed"]');
-                for (var i = 0; i < fixedElements.length; i++) {
-                    var element = fixedElements[i];
-                    if (element.id === 's-chat-plugin' || element.title === 'Contact us' || element.title === 'Contact') {
-                        element.style.display = 'none';
-                        element.style.visibility = 'hidden';
-                        element.style.zIndex = '-9999';
-                        element.style.opacity = '0';
-                        element.style.position = 'absolute';
-                        element.style.left = '-9999px';
-                        element.style.top = '-9999px';
-                    }
-                }
-            """)
-            print("[SUCCESS] Aggressively hidden chat iframes and containers")
-        except Exception as e:
-            print(f"[WARNING] Error hiding iframes: {str(e)}")
-            
-        # Additional wait to ensure iframe is completely hidden
-        time.sleep(2)
+        close_locators = selector_registry.ranked("chat_close_button")
+        result = get_page_helpers(driver).hide_overlays(close_locators)
+        closed = result["closed"]
+        selector_registry.record("chat_close_button", close_locators[:result["tried"]],
+                                 close_locators[closed] if closed is not None else None)
+        if closed is not None:
+            print("[SUCCESS] Closed chat widget/iframe")
+        print(f"[SUCCESS] Hidden {result['hidden']} chat iframes and containers")
             
     except Exception as e:
         print(f"Warning: Could not handle iframe interference: {str(e)}")
@@ -785,98 +890,34 @@ def okeyproxy_login(test_case):
             print("Logging in to OkeyProxy with with_balance account...")
             driver, wait = get_driver()
             driver.get(OKEYPROXY_LOGIN_URL)
-            wait_for_page_load(driver, wait)
+            wait_for_page_load(driver)
             
-            # Enter email
+            # Enter email and password, one page call each
             print("Waiting for email field...")
-            email_field = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["login"]["email_input"]))
-            )
-            time.sleep(1)  # Additional wait
+            page = get_page_helpers(driver)
+            page.fill(locators["OKEYPROXY_SELECTORS.login.email_input"], OKEYPROXY_ACCOUNT["email"])
+            print(f"[SUCCESS] Email entered successfully: {OKEYPROXY_ACCOUNT['email']}")
             
-            # Try multiple methods to enter email
-            try:
-                email_field.clear()
-                time.sleep(0.5)
-                email_field.send_keys(OKEYPROXY_ACCOUNT["email"])
-                time.sleep(1)
-                
-                # Verify email was entered
-                if email_field.get_attribute("value") == OKEYPROXY_ACCOUNT["email"]:
-                    print(f"[SUCCESS] Email entered successfully: {OKEYPROXY_ACCOUNT['email']}")
-                else:
-                    print("[WARNING] Email not entered properly, trying JavaScript method...")
-                    driver.execute_script("arguments[0].value = arguments[1];", email_field, OKEYPROXY_ACCOUNT["email"])
-                    time.sleep(1)
-                    print(f"[SUCCESS] Email entered via JavaScript: {OKEYPROXY_ACCOUNT['email']}")
-                    
-            except Exception as e:
-                print(f"[WARNING] Error entering email: {str(e)}, trying JavaScript method...")
-                driver.execute_script("arguments[0].value = arguments[1];", email_field, OKEYPROXY_ACCOUNT["email"])
-                time.sleep(1)
-                print(f"[SUCCESS] Email entered via JavaScript: {OKEYPROXY_ACCOUNT['email']}")
-            
-            # Enter password
             print("Waiting for password field...")
-            password_field = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["login"]["password_input"]))
-            )
-            time.sleep(1)  # Additional wait
-            
-            # Try multiple methods to enter password
-            try:
-                password_field.clear()
-                time.sleep(0.5)
-                password_field.send_keys(OKEYPROXY_ACCOUNT["password"])
-                time.sleep(1)
-                print("[SUCCESS] Password entered successfully")
-            except Exception as e:
-                print(f"[WARNING] Error entering password: {str(e)}, trying JavaScript method...")
-                driver.execute_script("arguments[0].value = arguments[1];", password_field, OKEYPROXY_ACCOUNT["password"])
-                time.sleep(1)
-                print("[SUCCESS] Password entered via JavaScript")
+            page.fill(locators["OKEYPROXY_SELECTORS.login.password_input"], OKEYPROXY_ACCOUNT["password"])
+            print("[SUCCESS] Password entered successfully")
             
-            # Click login button
-            login_button = None
+            # Find, scroll to and click the first matching login button in one page call
             login_selectors = [
-                OKEYPROXY_SELECTORS["login"]["login_button"],
+                locators["OKEYPROXY_SELECTORS.login.login_button"],
                 "//button[contains(@class, 'custom-button')]//span[contains(text(), 'Login')]/..",
                 "//button[contains(@class, 'el-button')]//span[contains(text(), 'Login')]/..",
                 "//button//span[contains(text(), 'Login')]/..",
                 "//button[contains(text(), 'Login')]"
             ]
-            
-            for selector in login_selectors:
-                try:
-                    login_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    break
-                except:
-                    continue
-            
-            if login_button:
-                print("Clicking login button...")
-                
-                # Scroll the button into view
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", login_button)
-                time.sleep(1)
-                
-                # Try JavaScript click first to avoid any interference
-                try:
-                    driver.execute_script("arguments[0].click();", login_button)
-                    print("[SUCCESS] Login button clicked using JavaScript")
-                except:
-                    # Fallback to regular click
-                    login_button.click()
-                    print("[SUCCESS] Login button clicked using regular click")
-                
-                time.sleep(3)  # Wait for login processing
-            else:
-                raise Exception("Could not find login button with any selector")
+            print("Clicking login button...")
+            page.click(login_selectors)
+            print("[SUCCESS] Login button clicked")
             
             # Wait for redirect to dashboard
             print("Waiting for redirect to dashboard...")
-            wait.until(lambda driver: OKEYPROXY_DASHBOARD_URL in driver.current_url)
-            time.sleep(2)  # Additional wait for page to fully load
+            wait.until(EC.url_contains(OKEYPROXY_DASHBOARD_URL))
+            wait_for_page_load(driver)
             print("[SUCCESS] Successfully logged in to OkeyProxy")
             return True
             
@@ -886,21 +927,152 @@ def okeyproxy_login(test_case):
             save_page_source(test_case, "okeyproxy_login_failed")
             return False
 
-def navigate_to_transactions_and_click_payment(test_case, proxy_type):
+TRANSACTIONS_TAB_STATE_SCRIPT = """
+    function first(xpath) {
+        return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    function marked(element) {
+        return /(^|[\\s_-])(active|selected|current)(\\s|$)/.test(element.className || '')
+            || element.getAttribute('aria-selected') === 'true';
+    }
+    var active = true;
+    if (arguments[0]) {
+        var tab = first(arguments[0]);
+        // Tabs that never carry an active marker are taken as active once they exist
+        var siblings = tab && tab.parentElement ? Array.prototype.slice.call(tab.parentElement.children) : [];
+        active = !!tab && (marked(tab) || (tab.parentElement && marked(tab.parentElement))
+            || !siblings.some(marked));
+    }
+    var mask = first(arguments[2]);
+    var loading = !!mask && !!(mask.offsetWidth || mask.offsetHeight) && getComputedStyle(mask).display !== 'none';
+    var result = document.evaluate(arguments[1], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var rows = [];
+    for (var i = 0; i < result.snapshotLength; i++) {
+        var cells = result.snapshotItem(i).querySelectorAll('td');
+        var renewButton = null;
+        for (var j = cells.length - 1; j >= 0 && !renewButton; j--) {
+            renewButton = cells[j].querySelector('button');
+        }
+        rows.push({
+            index: i + 1,
+            cells: Array.prototype.map.call(cells, function (td) { return td.innerText.trim(); }),
+            renewable: !!renewButton && !renewButton.disabled
+        });
+    }
+    return {active: active, loading: loading, rows: rows};
+"""
+
+CLICK_RENEW_BUTTON_SCRIPT = """
+    var result = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var row = result.snapshotItem(arguments[1] - 1);
+    if (!row) {
+        return false;
+    }
+    var cells = row.querySelectorAll('td');
+    for (var j = cells.length - 1; j >= 0; j--) {
+        var button = cells[j].querySelector('button');
+        if (button) {
+            button.scrollIntoView({block: 'center'});
+            button.click();
+            return true;
+        }
+    }
+    return false;
+"""
+
+# A loaded tab whose rows equal the previous tab's is accepted once it has stayed that way this long
+TAB_ROWS_SETTLE_TIME = 1
+
+def read_tab_state(tab_xpath=None):
+    """Read whether the tab is active, whether the table is loading, and the visible rows, in a single script call"""
+    driver, wait = get_driver()
+    transactions = OKEYPROXY_SELECTORS["transactions"]
+    return driver.execute_script(TRANSACTIONS_TAB_STATE_SCRIPT, tab_xpath, transactions["table_rows"], transactions["loading_mask"])
+
+def wait_for_tab_rows(tab_xpath=None, previous_rows=None, timeout=10):
+    """Wait until the tab is active and its table has loaded rows; returns the rows, or None if none were shown"""
+    driver, wait = get_driver()
+    state = {}
+    settled_since = []
+    
+    def tab_loaded(driver):
+        state.update(read_tab_state(tab_xpath))
+        if not state["active"] or state["loading"] or not state["rows"]:
+            settled_since[:] = []
+            return False
+        if state["rows"] != previous_rows:
+            return True
+        # Same rows as the tab before: either the table has not switched yet or both tabs really match
+        if not settled_since:
+            settled_since.append(time.perf_counter())
+        return time.perf_counter() - settled_since[0] >= TAB_ROWS_SETTLE_TIME
+    
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(tab_loaded)
+    except TimeoutException:
+        return None
+    return state["rows"]
+
+def read_transactions_page(test_case):
+    """Load the transactions page once and read the rows of every proxy tab"""
+    with track_step(test_case, "Read Transactions Page", "Load transactions once and extract rows of every proxy tab"):
+        try:
+            driver, wait = get_driver()
+            print("Reading transactions page for all proxy types...")
+            driver.get(OKEYPROXY_TRANSACTIONS_URL)
+            wait_for_page_load(driver)
+            handle_iframe_interference()
+            
+            # The default tab is read first, other tabs are read in order after clicking them.
+            # Tabs that show no rows are left unknown (None) and checked live when renewing
+            rows_by_tab = {None: wait_for_tab_rows()}
+            for proxy_info in PROXY_TYPES.values():
+                tab_xpath = proxy_info.get("tab_xpath") if proxy_info["tab_required"] else None
+                if tab_xpath in rows_by_tab:
+                    continue
+                tab_element = wait.until(EC.element_to_be_clickable((By.XPATH, tab_xpath)))
+                previous_rows = read_tab_state()["rows"]
+                driver.execute_script("arguments[0].click();", tab_element)
+                rows_by_tab[tab_xpath] = wait_for_tab_rows(tab_xpath, previous_rows)
+            
+            transactions_view = {}
+            for proxy_type, proxy_info in PROXY_TYPES.items():
+                tab_xpath = proxy_info.get("tab_xpath") if proxy_info["tab_required"] else None
+                transactions_view[proxy_type] = rows_by_tab[tab_xpath]
+                if transactions_view[proxy_type] is None:
+                    print(f"{PROXY_TYPES[proxy_type]['name']}: no rows loaded, will check when renewing")
+                else:
+                    status = "renewable" if is_renewable(transactions_view, proxy_type) else "NOT renewable"
+                    print(f"{PROXY_TYPES[proxy_type]['name']}: {len(transactions_view[proxy_type])} rows, {status}")
+            
+            return transactions_view
+            
+        except Exception as e:
+            print(f"[ERROR] Failed to read transactions page: {str(e)}")
+            take_screenshot(test_case, "transactions_read_failed")
+            save_page_source(test_case, "transactions_read_failed")
+            return None
+
+def is_renewable(transactions_view, proxy_type):
+    """Check from the cached transactions view whether row 1 of the proxy type can be renewed"""
+    rows = transactions_view.get(proxy_type)
+    return bool(rows) and rows[0]["renewable"]
+
+def navigate_to_transactions_and_click_payment(test_case, proxy_type, transactions_view=None):
     """Navigate to transactions page and click the appropriate payment button"""
     with track_step(test_case, "Navigate to Transactions", f"Navigate to transactions and click payment for {proxy_type}"):
         try:
             driver, wait = get_driver()
+            
+            # Skip the page load entirely when the cached view shows nothing to renew
+            if (transactions_view is not None and transactions_view.get(proxy_type) is not None
+                    and not is_renewable(transactions_view, proxy_type)):
+                print(f"[ERROR] No renewable {proxy_type} package on transactions page")
+                return False
+            
             print(f"Navigating to transactions page for {proxy_type}...")
             driver.get(OKEYPROXY_TRANSACTIONS_URL)
-            wait_for_page_load(driver, wait)
-            time.sleep(3)  # Wait for page to fully load
-            
-            # Hard refresh to ensure fresh page state
-            print("Performing hard refresh...")
-            driver.refresh()
-            wait_for_page_load(driver, wait)
-            time.sleep(2)  # Wait after refresh
+            wait_for_page_load(driver)
             
             # Handle iframe interference
             handle_iframe_interference()
@@ -912,44 +1084,23 @@ def navigate_to_transactions_and_click_payment(test_case, proxy_type):
                 tab_element = wait.until(
                     EC.element_to_be_clickable((By.XPATH, tab_xpath))
                 )
+                # The rows shown right before the click, so the tab's own rows can be told apart from them
+                previous_rows = read_tab_state()["rows"]
+                driver.execute_script("arguments[0].click();", tab_element)
+                print(f"[SUCCESS] Tab clicked using JavaScript: {proxy_type}")
                 
-                # Scroll tab into view
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", tab_element)
-                time.sleep(1)
-                
-                # Click tab
-                try:
-                    driver.execute_script("arguments[0].click();", tab_element)
-                    print(f"[SUCCESS] Tab clicked using JavaScript: {proxy_type}")
-                except:
-                    tab_element.click()
-                    print(f"[SUCCESS] Tab clicked using regular click: {proxy_type}")
-                
-                time.sleep(3)  # Wait for tab content to load
+                # Row 1 is only clicked once the tab is active and its rows have loaded
+                if wait_for_tab_rows(tab_xpath, previous_rows) is None:
+                    raise Exception(f"{proxy_type} tab did not become active with loaded rows")
             
-            # Click payment button
+            # Click row 1's payment button in the same script call that locates it
             print(f"Clicking payment button for {proxy_type}...")
-            button_xpath = PROXY_TYPES[proxy_type]["button_xpath"]
-            payment_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, button_xpath))
-            )
-            
-            # Scroll button into view
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", payment_button)
-            time.sleep(1)
-            
-            # Click payment button
-            try:
-                driver.execute_script("arguments[0].click();", payment_button)
-                print(f"[SUCCESS] Payment button clicked using JavaScript: {proxy_type}")
-            except:
-                payment_button.click()
-                print(f"[SUCCESS] Payment button clicked using regular click: {proxy_type}")
-            
-            time.sleep(3)  # Wait for redirect to payment page
+            rows_xpath = OKEYPROXY_SELECTORS["transactions"]["table_rows"]
+            wait.until(lambda driver: driver.execute_script(CLICK_RENEW_BUTTON_SCRIPT, rows_xpath, 1))
+            print(f"[SUCCESS] Payment button clicked using JavaScript: {proxy_type}")
             
             # Verify redirect to payment page
-            wait.until(lambda driver: OKEYPROXY_PAYMENT_URL in driver.current_url)
+            wait.until(EC.url_contains(OKEYPROXY_PAYMENT_URL))
             print(f"[SUCCESS] Successfully redirected to payment page for {proxy_type}")
             return True
             
@@ -970,31 +1121,14 @@ def process_paypal_payment(test_case, proxy_type):
             handle_iframe_interference()
             
             # Select PayPal option
-            paypal_option = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["payment"]["paypal_option"]))
-            )
-            paypal_option.click()
-            time.sleep(2)
-            
-            # Click payment button
-            payment_button = wait.until(
-                EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["payment"]["payment_button"]))
-            )
+            get_page_helpers(driver).click(locators["OKEYPROXY_SELECTORS.payment.paypal_option"])
+            wait_for_page_load(driver)
             
-            # Scroll the button into view to avoid iframe interference
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", payment_button)
-            time.sleep(1)
+            # Click payment button, scrolled into view, in one page call
+            get_page_helpers(driver).click(locators["OKEYPROXY_SELECTORS.payment.payment_button"], displayed=False, enabled=False)
+            print("[SUCCESS] PayPal payment button clicked")
             
-            # Try JavaScript click first to avoid iframe interception
-            try:
-                driver.execute_script("arguments[0].click();", payment_button)
-                print("[SUCCESS] PayPal payment button clicked using JavaScript")
-            except:
-                # Fallback to regular click
-                payment_button.click()
-                print("[SUCCESS] PayPal payment button clicked using regular click")
-            
-            time.sleep(5)  # Wait for PayPal redirect
+            wait_for_page_load(driver)  # Wait for PayPal redirect
             
             # Handle PayPal flow based on proxy type
             if proxy_type == "rotating_residential_advanced":
@@ -1009,7 +1143,7 @@ def process_paypal_payment(test_case, proxy_type):
                     
                     # Verify we're on the PayPal sandbox page
                     wait.until(
-                        lambda driver: "https://www.sandbox.paypal.com/checkoutnow?" in driver.current_url
+                        EC.url_contains("https://www.sandbox.paypal.com/checkoutnow?")
                     )
                     print(f"Successfully redirected to PayPal sandbox: {driver.current_url}")
                     
@@ -1032,7 +1166,7 @@ def process_paypal_payment(test_case, proxy_type):
                     
                     # Wait for password field to be present and interactable
                     print("Waiting for password field...")
-                    time.sleep(3)  # Additional wait for page transition
+                    wait_for_page_load(driver)  # Wait for the page transition
                     
                     # Try to find password field in main content and iframes
                     password_field = None
@@ -1078,70 +1212,29 @@ def process_paypal_payment(test_case, proxy_type):
                         # Wait for payment review page and click Continue
                         print("Waiting for payment review page...")
                         wait.until(
-                            lambda driver: "https://www.sandbox.paypal.com/webapps/hermes?" in driver.current_url
+                            EC.url_contains("https://www.sandbox.paypal.com/webapps/hermes?")
                         )
-                        time.sleep(3)  # Additional wait for page to fully load
+                        wait_for_page_load(driver)
                         
                         print("Clicking Continue button...")
                         with track_step(test_case, "Click Continue Button", "Click Continue button in PayPal"):
-                            # Try multiple selectors for the Continue button
-                            continue_button = None
-                            try:
-                                # First try the new XPath
-                                continue_button = wait.until(
-                                    EC.element_to_be_clickable((By.XPATH, "//*[@id='hermione-container']/div[1]/main/div[3]/div[2]/button"))
-                                )
-                            except:
-                                try:
-                                    # Fallback to the old XPath
-                                    continue_button = wait.until(
-                                        EC.element_to_be_clickable((By.XPATH, "//*[@id='button']/button"))
-                                    )
-                                except:
-                                    # Try finding by text content
-                                    continue_button = wait.until(
-                                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Continue')]"))
-                                    )
-                            
-                            if continue_button:
-                                # Scroll the button into view
-                                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", continue_button)
-                                time.sleep(1)
-                                # Try JavaScript click first
-                                try:
-                                    driver.execute_script("arguments[0].click();", continue_button)
-                                except:
-                                    # Fallback to regular click
-                                    continue_button.click()
-                                
-                            else:
-                                raise Exception("Could not find Continue button with any selector")
+                            # The first clickable Continue button (new XPath, old XPath, then by text), clicked in one page call
+                            get_page_helpers(driver).click([
+                                "//*[@id='hermione-container']/div[1]/main/div[3]/div[2]/button",
+                                "//*[@id='button']/button",
+                                "//button[contains(text(), 'Continue')]"
+                            ])
                         
                         # Wait for success page
                         print("Waiting for payment success page...")
                         with track_step(test_case, "Verify Payment Success", "Verify payment success page"):
                             # Wait for redirect back to OkeyProxy
                             wait.until(
-                                lambda driver: "test-ipglobal.cd.xiaoxigroup.net" in driver.current_url
+                                EC.url_contains("test-ipglobal.cd.xiaoxigroup.net")
                             )
                             
                             # Check for success message
-                            success_selectors = [
-                                "//div[@class='payment-success-title']",
-                                "//div[contains(@class, 'payment-success')]",
-                                "//div[contains(text(), 'processed')]",
-                                "//div[contains(text(), 'success')]"
-                            ]
-                            
-                            success_element = None
-                            for selector in success_selectors:
-                                try:
-                                    success_element = wait.until(
-                                        EC.presence_of_element_located((By.XPATH, selector))
-                                    )
-                                    break
-                                except:
-                                    continue
+                            success_element = selector_registry.find(driver, "paypal_success_message", timeout=20)
                             
                             if success_element:
                                 print("[SUCCESS] OkeyProxy PayPal payment completed successfully!")
@@ -1168,55 +1261,29 @@ def process_paypal_payment(test_case, proxy_type):
                     # Verify redirect to sandbox.paypal.com (more flexible)
                     print("Verifying redirect to PayPal sandbox...")
                     wait.until(
-                        lambda driver: "sandbox.paypal.com" in driver.current_url
+                        EC.url_contains("sandbox.paypal.com")
                     )
                     print(f"Successfully redirected to PayPal sandbox: {driver.current_url}")
                     
                     # Wait for page to load and click "Continue to Review Order"
                     print("Waiting for page to load and clicking Continue to Review Order...")
-                    time.sleep(3)  # Wait for page to fully load
+                    wait_for_page_load(driver)
                     
                     with track_step(test_case, "Click Continue to Review Order", "Click Continue to Review Order button"):
-                        # Look for the specific button with the provided selector
-                        continue_button = wait.until(
-                            EC.element_to_be_clickable((By.XPATH, "//button[@data-id='payment-submit-btn' and @data-testid='submit-button-initial']"))
-                        )
-                        
-                        if continue_button:
-                            # Scroll the button into view
-                            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", continue_button)
-                            time.sleep(1)
-                            # Click the button
-                            driver.execute_script("arguments[0].click();", continue_button)
-                            print("[SUCCESS] Clicked 'Continue to Review Order' button")
-                        else:
-                            raise Exception("Could not find 'Continue to Review Order' button")
+                        # Find, scroll into view and click the specific button in one page call
+                        get_page_helpers(driver).click("//button[@data-id='payment-submit-btn' and @data-testid='submit-button-initial']")
+                        print("[SUCCESS] Clicked 'Continue to Review Order' button")
                     
                     # Wait for success page
                     print("Waiting for payment success page...")
                     with track_step(test_case, "Verify Payment Success", "Verify payment success page"):
                         # Wait for redirect back to OkeyProxy
                         wait.until(
-                            lambda driver: "test-ipglobal.cd.xiaoxigroup.net" in driver.current_url
+                            EC.url_contains("test-ipglobal.cd.xiaoxigroup.net")
                         )
                         
                         # Check for success message
-                        success_selectors = [
-                            "//div[@class='payment-success-title']",
-                            "//div[contains(@class, 'payment-success')]",
-                            "//div[contains(text(), 'processed')]",
-                            "//div[contains(text(), 'success')]"
-                        ]
-                        
-                        success_element = None
-                        for selector in success_selectors:
-                            try:
-                                success_element = wait.until(
-                                    EC.presence_of_element_located((By.XPATH, selector))
-                                )
-                                break
-                            except:
-                                continue
+                        success_element = selector_registry.find(driver, "paypal_success_message", timeout=20)
                         
                         if success_element:
                             print("[SUCCESS] OkeyProxy PayPal payment completed successfully!")
@@ -1264,12 +1331,13 @@ def test_rotating_residential_advanced_arrow(test_case):
             if not enter_amount(test_case, "1"):
                 return False
             
-            # Step 5: Click confirm button
+            # Step 5: Snapshot package table, then click confirm button
+            package_snapshot = snapshot_package_table()
             if not click_confirm_button(test_case):
                 return False
             
             # Step 6: Verify package creation
-            if not verify_package_creation(test_case):
+            if not verify_package_creation(test_case, "rotating_residential_advanced", package_snapshot):
                 return False
             
             print("[SUCCESS] Rotating Residential Proxies - Advanced test completed successfully!")
@@ -1307,12 +1375,13 @@ def test_rotating_residential_premium_arrow(test_case):
             if not enter_amount(test_case, "12"):
                 return False
             
-            # Step 5: Click confirm button
+            # Step 5: Snapshot package table, then click confirm button
+            package_snapshot = snapshot_package_table()
             if not click_confirm_button(test_case):
                 return False
             
             # Step 6: Verify package creation
-            if not verify_package_creation(test_case):
+            if not verify_package_creation(test_case, "rotating_residential_premium", package_snapshot):
                 return False
             
             print("[SUCCESS] Rotating Residential Proxies - Premium test completed successfully!")
@@ -1350,12 +1419,13 @@ def test_rotating_datacenter_arrow(test_case):
             if not enter_amount(test_case, "2"):
                 return False
             
-            # Step 5: Click confirm button
+            # Step 5: Snapshot package table, then click confirm button
+            package_snapshot = snapshot_package_table()
             if not click_confirm_button(test_case):
                 return False
             
             # Step 6: Verify package creation
-            if not verify_package_creation(test_case):
+            if not verify_package_creation(test_case, "rotating_datacenter", package_snapshot):
                 return False
             
             print("[SUCCESS] Rotating Datacenter Proxies test completed successfully!")
@@ -1389,12 +1459,13 @@ def test_static_residential_arrow(test_case):
             if not click_original_price_dropdown(test_case, 3):
                 print("[WARNING] Original Price dropdown navigation failed, continuing with test...")
             
-            # Step 4: Click confirm button
+            # Step 4: Snapshot package table, then click confirm button
+            package_snapshot = snapshot_package_table()
             if not click_confirm_button(test_case):
                 return False
             
             # Step 5: Verify package creation
-            if not verify_package_creation(test_case):
+            if not verify_package_creation(test_case, "static_residential", package_snapshot):
                 return False
             
             print("[SUCCESS] Static Residential Proxies test completed successfully!")
@@ -1428,12 +1499,13 @@ def test_datacenter_arrow(test_case):
             if not click_original_price_dropdown(test_case, 19):
                 print("[WARNING] Original Price dropdown navigation failed, continuing with test...")
             
-            # Step 4: Click confirm button
+            # Step 4: Snapshot package table, then click confirm button
+            package_snapshot = snapshot_package_table()
             if not click_confirm_button(test_case):
                 return False
             
             # Step 5: Verify package creation
-            if not verify_package_creation(test_case):
+            if not verify_package_creation(test_case, "datacenter", package_snapshot):
                 return False
             
             print("[SUCCESS] Datacenter Proxies test completed successfully!")
@@ -1467,12 +1539,13 @@ def test_unlimited_residential_arrow(test_case):
             if not enter_amount(test_case, "4"):
                 return False
             
-            # Step 4: Click confirm button
+            # Step 4: Snapshot package table, then click confirm button
+            package_snapshot = snapshot_package_table()
             if not click_confirm_button(test_case):
                 return False
             
             # Step 5: Verify package creation
-            if not verify_package_creation(test_case):
+            if not verify_package_creation(test_case, "unlimited_residential", package_snapshot):
                 return False
             
             print("[SUCCESS] Unlimited Residential Proxies test completed successfully!")
@@ -1484,8 +1557,45 @@ def test_unlimited_residential_arrow(test_case):
             save_page_source(test_case, "unlimited_res_failed")
             return False
 
+# ===== Package Provisioning =====
+def get_package_provisioner():
+    """Return the provisioner selected by PACKAGE_PROVISIONING_MODE, or None if disabled"""
+    if PACKAGE_PROVISIONING_MODE == "local":
+        return LocalProvisioner()
+    if PACKAGE_PROVISIONING_MODE == "api":
+        if not PACKAGE_PROVISIONING_REQUEST or not os.path.exists(PACKAGE_PROVISIONING_REQUEST):
+            print("[WARNING] Experimental API provisioning needs OKEYPROXY_PROVISIONING_REQUEST (a request recorded from the admin UI) - using the admin UI packages")
+            return None
+        if admin_token is None:
+            print("[WARNING] API provisioning requested but no admin token captured - login to admin panel first")
+            return None
+        print("[WARNING] API provisioning is experimental - replaying the recorded admin request")
+        return AdminApiProvisioner.from_file(PACKAGE_PROVISIONING_REQUEST, admin_token)
+    return None
+
+def start_website_package_provisioning():
+    """Start creating the website payment test packages in the background"""
+    provisioner = get_package_provisioner()
+    if provisioner is None:
+        return None
+    print(f"Provisioning {len(WEBSITE_TEST_PACKAGE_SPECS)} packages for customer {ADMIN_CUSTOMER_ID} in background...")
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(provision_packages, provisioner, ADMIN_CUSTOMER_ID, WEBSITE_TEST_PACKAGE_SPECS)
+    executor.shutdown(wait=False)
+    return future
+
+def wait_for_package_provisioning(provisioning_future):
+    """Wait for background provisioning and report the outcome per package"""
+    results = provisioning_future.result()
+    for result in results:
+        if result["success"]:
+            print(f"[SUCCESS] Provisioned {result['spec']['package_type']} in {result['duration']:.2f}s")
+        else:
+            print(f"[ERROR] Failed to provision {result['spec']['package_type']}: {result['error']}")
+    return all(result["success"] for result in results)
+
 # ===== Website Payment Test Functions =====
-def run_complete_website_payment_test_without_login(proxy_type, session_test_case):
+def run_complete_website_payment_test_without_login(proxy_type, session_test_case, transactions_view=None):
     """Run a complete website payment test for a specific proxy type without login (assumes already logged in)"""
     try:
         print(f"\n{'='*60}")
@@ -1493,7 +1603,7 @@ def run_complete_website_payment_test_without_login(proxy_type, session_test_cas
         print(f"{'='*60}")
         
         # Step 1: Navigate to transactions and click payment button
-        if not navigate_to_transactions_and_click_payment(session_test_case, proxy_type):
+        if not navigate_to_transactions_and_click_payment(session_test_case, proxy_type, transactions_view):
             return False
         
         # Step 2: Process PayPal payment
@@ -1556,6 +1666,7 @@ def run_all_admin_panel_tests():
         "OkeyProxy Admin Panel Test Session"
     )
     session_test_case.test_dir = create_report()
+    report = start_session_report(session_test_case, "okeyproxy_admin_panel")
     
     # Define test cases with their functions
     test_cases = [
@@ -1618,12 +1729,9 @@ def run_all_admin_panel_tests():
     
     # Generate HTML report
     try:
-        from test_report import TestReport
-        report = TestReport(session_test_case.test_dir)
-        report.start()
-        
-        # Add the session test case
-        report.add_test_case(session_test_case)
+        if report is None:
+            raise Exception("Test report was not started")
+        session_test_case.complete()
         
         # Create individual test cases for each test that was run
         for result in test_results:
@@ -1639,13 +1747,15 @@ def run_all_admin_panel_tests():
         
         report_file = report.generate_html_report("okeyproxy_admin_report")
         print(f"\n[SUCCESS] HTML Report generated: {report_file}")
+        if interval_capture_enabled():
+            print(f"[SUCCESS] Trace generated: {report.export_trace('okeyproxy_admin_trace')}")
     except Exception as e:
         print(f"[WARNING] Failed to generate HTML report: {e}")
     
     return test_results
 
 # ===== Run All Complete Website Payment Tests =====
-def run_all_complete_website_payment_tests():
+def run_all_complete_website_payment_tests(provisioning_future=None):
     """Run all complete website payment test cases with single login"""
     print("Starting Complete Website Payment Automation Tests...")
     print(f"Base URL: {OKEYPROXY_BASE_URL}")
@@ -1657,6 +1767,7 @@ def run_all_complete_website_payment_tests():
         "Complete Website Payment Test Session"
     )
     session_test_case.test_dir = create_report()
+    report = start_session_report(session_test_case, "okeyproxy_website_payment")
     
     test_results = []
     
@@ -1672,6 +1783,14 @@ def run_all_complete_website_payment_tests():
     
     print("[SUCCESS] Successfully logged in. Proceeding with all tests...")
     
+    # Packages are provisioned concurrently with the login above
+    if provisioning_future is not None:
+        if not wait_for_package_provisioning(provisioning_future):
+            print("[WARNING] Some packages could not be provisioned, affected renewals may fail")
+    
+    # Read every proxy tab once; renewals start from this cached view
+    transactions_view = read_transactions_page(session_test_case)
+    
     # Run tests for all proxy types
     proxy_types = [
         "rotating_residential_advanced",
@@ -1689,7 +1808,7 @@ def run_all_complete_website_payment_tests():
             print(f"{'='*60}")
             
             # For each test, just navigate to transactions (no login needed)
-            result = run_complete_website_payment_test_without_login(proxy_type, session_test_case)
+            result = run_complete_website_payment_test_without_login(proxy_type, session_test_case, transactions_view)
             test_results.append({
                 "proxy_type": proxy_type,
                 "name": PROXY_TYPES[proxy_type]['name'],
@@ -1735,6 +1854,19 @@ def run_all_complete_website_payment_tests():
         status_icon = "[PASS]" if result["result"] == "PASSED" else "[FAIL]"
         print(f"{status_icon} {result['name']}: {result['result']}")
     
+    # Generate HTML and text reports from the session
+    if report is not None:
+        try:
+            session_test_case.complete()
+            report.complete()
+            report_file = report.generate_html_report("okeyproxy_website_payment_report")
+            report.generate_text_report(filename="okeyproxy_website_payment_report")
+            print(f"\n[SUCCESS] HTML Report generated: {report_file}")
+            if interval_capture_enabled():
+                print(f"[SUCCESS] Trace generated: {report.export_trace('okeyproxy_website_payment_trace')}")
+        except Exception as e:
+            print(f"[WARNING] Failed to generate HTML report: {e}")
+    
     return test_results
 
 # ===== Run All Tests (Admin + Payment) =====
@@ -1759,7 +1891,8 @@ def run_all_tests():
     print(f"\n{'='*60}")
     print("PHASE 2: RUNNING COMPLETE WEBSITE PAYMENT TESTS")
     print(f"{'='*60}")
-    payment_results = run_all_complete_website_payment_tests()
+    provisioning_future = start_website_package_provisioning()
+    payment_results = run_all_complete_website_payment_tests(provisioning_future)
     all_results.extend(payment_results)
     
     # Final Summary
@@ -1793,6 +1926,10 @@ def run_all_tests():
 
 # ===== Main Execution =====
 if __name__ == "__main__":
+    # Stored page sources catch drifted selectors in seconds, before the browser starts
+    if not preflight_selectors(__file__):
+        sys.exit(1)
+    setup_run_services()
     try:
         print("OkeyProxy Complete Test Suite - Admin Panel + Website Payment Tests")
         print("=" * 70)
@@ -1824,6 +1961,11 @@ if __name__ == "__main__":
         else:
             print("Overall Success Rate: 0.0%")
         
+        # Step duration regressions fail the process even when every test passed
+        if regression_exit_code():
+            print("[WARNING] Step duration regressions detected, see the Step Duration Regressions report section")
+            sys.exit(regression_exit_code())
+        
     except KeyboardInterrupt:
         print("\n[WARNING] Tests interrupted by user")
     except Exception as e:
@@ -4,7 +4,6 @@ from selenium import webdriver
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pytest
@@ -18,14 +17,30 @@ import subprocess
 import json
 import pyperclip
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from test_report import TestReport, TestCase, TestStep, track_step, create_test_case
+from test_report import TestReport, TestCase, TestStep, track_step, create_test_case, ProgressMonitor
+from step_profiler import instrument_driver, install_timing_hooks, interval_capture_enabled
+from report_regression import regression_exit_code
+from selector_validator import preflight_selectors
+import in_page_conditions as EC
+from in_page_conditions import InPageWait
+from selector_registry import LocatorTable
+from report_retention import RetentionManager
+from page_helpers import attach_page_helpers, get_page_helpers
+
+# Stored page sources catch drifted selectors in seconds, before the browser starts
+if __name__ == "__main__" and not preflight_selectors(__file__):
+    sys.exit(1)
 
 # ===== Global Configuration =====
 driver = webdriver.Chrome()
-wait = WebDriverWait(driver, 20)
+instrument_driver(driver)
+# Registered before the first page so its requests are tracked from document start
+attach_page_helpers(driver)
+wait = InPageWait(driver, 20)
 driver.maximize_window()
 
 report_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+HISTORY_DB = os.path.join(report_dir, "history.db")
 
 # ===== OkeyProxy Configuration =====
 OKEYPROXY_BASE_URL = "https://test-ipglobal.cd.xiaoxigroup.net"
@@ -94,6 +109,15 @@ OKEYPROXY_SELECTORS = {
         "premium_tab": "//div[@class='tab-item' and contains(text(), 'Premium')]"
     }
 }
+# Logical names resolve to the CSS translations selector_benchmark.py verified, else to the XPaths above
+locators = LocatorTable({"OKEYPROXY_SELECTORS": OKEYPROXY_SELECTORS},
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_overrides.json"))
+
+def wait_for_page_load(driver):
+    """Wait until the page has loaded and no network request has been active for a moment"""
+    result = get_page_helpers(driver).wait_for_network_idle()
+    if not result["ok"]:
+        print(f"Warning: Page still loading after timeout, continuing... (pending: {', '.join(result['pending']) or 'none'})")
 
 # ===== Login Function =====
 def login_to_okeyproxy():
@@ -104,20 +128,20 @@ def login_to_okeyproxy():
         print("=" * 60)
         print("Navigating to login page...")
         driver.get(OKEYPROXY_LOGIN_URL)
-        time.sleep(3)
+        wait_for_page_load(driver)
         
         print("Entering email...")
-        email_input = wait.until(EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["login"]["email_input"])))
+        email_input = wait.until(EC.presence_of_element_located(locators["OKEYPROXY_SELECTORS.login.email_input"]))
         email_input.clear()
         email_input.send_keys(OKEYPROXY_ACCOUNT["with_balance"]["email"])
         
         print("Entering password...")
-        password_input = driver.find_element(By.XPATH, OKEYPROXY_SELECTORS["login"]["password_input"])
+        password_input = driver.find_element(*locators["OKEYPROXY_SELECTORS.login.password_input"])
         password_input.clear()
         password_input.send_keys(OKEYPROXY_ACCOUNT["with_balance"]["password"])
         
         print("Clicking login button...")
-        login_button = driver.find_element(By.XPATH, OKEYPROXY_SELECTORS["login"]["login_button"])
+        login_button = driver.find_element(*locators["OKEYPROXY_SELECTORS.login.login_button"])
         login_button.click()
         
         # Wait for redirect to dashboard
@@ -135,7 +159,7 @@ def navigate_to_test_page(url):
     try:
         print(f"Navigating to: {url}")
         driver.get(url)
-        time.sleep(5)  # Wait for page to load completely
+        wait_for_page_load(driver)
         print("[SUCCESS] Successfully navigated to test page!")
         return True
         
@@ -148,7 +172,7 @@ def click_premium_tab():
     """Click on the Premium tab if required"""
     try:
         print("Clicking on Premium tab...")
-        premium_tab = wait.until(EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["code_examples"]["premium_tab"])))
+        premium_tab = wait.until(EC.element_to_be_clickable(locators["OKEYPROXY_SELECTORS.code_examples.premium_tab"]))
         premium_tab.click()
         time.sleep(2)
         print("[SUCCESS] Premium tab clicked successfully!")
@@ -163,7 +187,7 @@ def click_code_examples_tab():
     """Click on the Code examples tab"""
     try:
         print("Clicking on Code examples tab...")
-        code_tab = wait.until(EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["code_examples"]["code_tab"])))
+        code_tab = wait.until(EC.element_to_be_clickable(locators["OKEYPROXY_SELECTORS.code_examples.code_tab"]))
         code_tab.click()
         time.sleep(2)
         print("[SUCCESS] Code examples tab clicked successfully!")
@@ -178,7 +202,7 @@ def click_copy_button():
     """Click the copy button to copy the code"""
     try:
         print("Clicking copy button...")
-        copy_button = wait.until(EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["code_examples"]["copy_button"])))
+        copy_button = wait.until(EC.element_to_be_clickable(locators["OKEYPROXY_SELECTORS.code_examples.copy_button"]))
         copy_button.click()
         time.sleep(1)
         print("[SUCCESS] Copy button clicked successfully!")
@@ -306,206 +330,23 @@ def parse_and_verify_response(response, verification_type):
 
 # ===== HTML Report Generation =====
 def setup_test_report():
-    """Setup test report for connection test"""
+    """Setup test report for connection test in its own run directory, so retention can index and prune it"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_filename = f"proxy_connection_test_{timestamp}.html"
-    report_path = os.path.join(report_dir, report_filename)
+    run_dir = os.path.join(report_dir, f"proxy_connection_test_{timestamp}")
+    os.makedirs(run_dir, exist_ok=True)
+    report_path = os.path.join(run_dir, f"proxy_connection_test_{timestamp}.html")
     return report_path
 
-def generate_html_report(test_results, report_path):
-    """Generate HTML report with test results and outputs"""
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>OkeyProxy Comprehensive Connection Test Report</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                margin: 20px;
-                background-color: #f5f5f5;
-            }}
-            .container {{
-                max-width: 1200px;
-                margin: 0 auto;
-                background-color: white;
-                padding: 20px;
-                border-radius: 8px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }}
-            .header {{
-                text-align: center;
-                color: #333;
-                border-bottom: 2px solid #007bff;
-                padding-bottom: 20px;
-                margin-bottom: 30px;
-            }}
-            .summary {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 20px;
-                margin-bottom: 30px;
-            }}
-            .summary-card {{
-                padding: 20px;
-                border-radius: 8px;
-                text-align: center;
-                color: white;
-            }}
-            .total {{ background-color: #6c757d; }}
-            .passed {{ background-color: #28a745; }}
-            .failed {{ background-color: #dc3545; }}
-            .success-rate {{ background-color: #007bff; }}
-            .test-case {{
-                margin-bottom: 30px;
-                border: 1px solid #ddd;
-                border-radius: 8px;
-                overflow: hidden;
-            }}
-            .test-header {{
-                padding: 15px 20px;
-                font-weight: bold;
-                font-size: 18px;
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-            }}
-            .test-passed {{ background-color: #d4edda; color: #155724; }}
-            .test-failed {{ background-color: #f8d7da; color: #721c24; }}
-            .test-content {{
-                padding: 20px;
-                background-color: #f8f9fa;
-            }}
-            .test-details {{
-                margin-bottom: 15px;
-            }}
-            .test-details h4 {{
-                margin: 0 0 10px 0;
-                color: #495057;
-            }}
-            .output-box {{
-                background-color: #2d3748;
-                color: #e2e8f0;
-                padding: 15px;
-                border-radius: 4px;
-                font-family: 'Courier New', monospace;
-                font-size: 12px;
-                white-space: pre-wrap;
-                overflow-x: auto;
-                max-height: 300px;
-                overflow-y: auto;
-            }}
-            .status-badge {{
-                padding: 5px 15px;
-                border-radius: 20px;
-                font-size: 14px;
-                font-weight: bold;
-            }}
-            .status-passed {{
-                background-color: #28a745;
-                color: white;
-            }}
-            .status-failed {{
-                background-color: #dc3545;
-                color: white;
-            }}
-            .footer {{
-                text-align: center;
-                margin-top: 30px;
-                padding-top: 20px;
-                border-top: 1px solid #ddd;
-                color: #6c757d;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>OkeyProxy Comprehensive Connection Test Report</h1>
-                <p>Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-            </div>
-            
-            <div class="summary">
-                <div class="summary-card total">
-                    <h3>Total Tests</h3>
-                    <h2>{len(test_results)}</h2>
-                </div>
-                <div class="summary-card passed">
-                    <h3>Passed</h3>
-                    <h2>{sum(1 for result in test_results.values() if result['passed'])}</h2>
-                </div>
-                <div class="summary-card failed">
-                    <h3>Failed</h3>
-                    <h2>{sum(1 for result in test_results.values() if not result['passed'])}</h2>
-                </div>
-                <div class="summary-card success-rate">
-                    <h3>Success Rate</h3>
-                    <h2>{(sum(1 for result in test_results.values() if result['passed']) / len(test_results) * 100):.1f}%</h2>
-                </div>
-            </div>
-            
-            <h2>Test Results</h2>
-    """
-    
-    # Add each test case result
-    for test_case_key, test_case_info in TEST_CASES.items():
-        if test_case_key in test_results:
-            result = test_results[test_case_key]
-            status_class = "test-passed" if result['passed'] else "test-failed"
-            status_badge_class = "status-passed" if result['passed'] else "status-failed"
-            status_text = "PASSED" if result['passed'] else "FAILED"
-            
-            html_content += f"""
-            <div class="test-case">
-                <div class="test-header {status_class}">
-                    <span>{test_case_info['name']}</span>
-                    <span class="status-badge {status_badge_class}">{status_text}</span>
-                </div>
-                <div class="test-content">
-                    <div class="test-details">
-                        <h4>Test URL:</h4>
-                        <p>{test_case_info['url']}</p>
-                    </div>
-                    <div class="test-details">
-                        <h4>Verification Type:</h4>
-                        <p>{test_case_info['verification_type'].upper()}</p>
-                    </div>
-                    <div class="test-details">
-                        <h4>Command Executed:</h4>
-                        <div class="output-box">{result.get('command', 'N/A')}</div>
-                    </div>
-                    <div class="test-details">
-                        <h4>Output:</h4>
-                        <div class="output-box">{result.get('output', 'No output')}</div>
-                    </div>
-                    <div class="test-details">
-                        <h4>Error (if any):</h4>
-                        <div class="output-box">{result.get('error', 'No errors')}</div>
-                    </div>
-                </div>
-            </div>
-            """
-    
-    html_content += """
-            <div class="footer">
-                <p>OkeyProxy Comprehensive Connection Test - Automated Test Report</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Write HTML file
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print(f"[SUCCESS] HTML report generated: {report_path}")
-    return report_path
+def add_result_details(test_case, test_case_info, result):
+    """Add the URL, command, output and error of a test to its test case, for the HTML report"""
+    test_case.add_detail("Test URL", test_case_info['url'])
+    test_case.add_detail("Verification Type", test_case_info['verification_type'].upper())
+    test_case.add_detail("Command Executed", result['command'] or 'N/A')
+    test_case.add_detail("Output", result['output'] or 'No output')
+    test_case.add_detail("Error (if any)", result['error'] or 'No errors')
 
 # ===== Run Single Test Case =====
-def run_single_test_case(test_case_key, test_case_info):
+def run_single_test_case(test_case_key, test_case_info, test_case):
     """Run a single test case"""
     print("\n" + "=" * 80)
     print(f"TESTING: {test_case_info['name']}")
@@ -521,33 +362,40 @@ def run_single_test_case(test_case_key, test_case_info):
     
     try:
         # Navigate to test page
-        if not navigate_to_test_page(test_case_info['url']):
-            return result_data
+        with track_step(test_case, "Navigate to Test Page", f"Navigate to {test_case_info['url']}") as step:
+            if not navigate_to_test_page(test_case_info['url']):
+                step.fail(f"Could not open {test_case_info['url']}")
+                return result_data
         
         # Click Premium tab if required
         if test_case_info.get('premium_tab_required', False):
-            if not click_premium_tab():
-                return result_data
-        
-        # Click on Code examples tab
-        if not click_code_examples_tab():
-            return result_data
+            with track_step(test_case, "Click Premium Tab", "Click on the Premium tab") as step:
+                if not click_premium_tab():
+                    step.fail("Could not click the Premium tab")
+                    return result_data
         
-        # Click copy button
-        if not click_copy_button():
-            return result_data
-        
-        # Get copied code
-        copied_code = get_copied_code()
-        if not copied_code:
-            return result_data
+        # Click on Code examples tab and copy the code
+        with track_step(test_case, "Copy Code Example", "Open Code examples tab and copy the code") as step:
+            if not click_code_examples_tab():
+                step.fail("Could not open the Code examples tab")
+                return result_data
+            
+            if not click_copy_button():
+                step.fail("Could not click the copy button")
+                return result_data
+            
+            copied_code = get_copied_code()
+            if not copied_code:
+                step.fail("No code was copied")
+                return result_data
         
         # Store the command for HTML report
         result_data['command'] = copied_code
         
         # Execute copied code
         add_v_flag = test_case_info.get('add_v_flag', False)
-        response = execute_copied_code(copied_code, add_v_flag)
+        with track_step(test_case, "Execute Copied Code", "Execute the copied code in command line"):
+            response = execute_copied_code(copied_code, add_v_flag)
         
         if response is None:
             result_data['error'] = "No response received from command execution"
@@ -557,7 +405,10 @@ def run_single_test_case(test_case_key, test_case_info):
         result_data['output'] = response
         
         # Parse and verify response
-        test_passed = parse_and_verify_response(response, test_case_info['verification_type'])
+        with track_step(test_case, "Verify Response", f"Verify response by {test_case_info['verification_type']}") as step:
+            test_passed = parse_and_verify_response(response, test_case_info['verification_type'])
+            if not test_passed:
+                step.fail(f"Response failed {test_case_info['verification_type']} verification")
         result_data['passed'] = test_passed
         
         if test_passed:
@@ -580,13 +431,24 @@ def run_comprehensive_connection_test():
     print("=" * 80)
     print("OKEYPROXY COMPREHENSIVE CONNECTION TEST")
     print("=" * 80)
+    # Installed per run rather than at import, so importing this module leaves time.sleep alone
+    install_timing_hooks()
     
     # Setup HTML report
     report_path = setup_test_report()
+    report_name = os.path.splitext(os.path.basename(report_path))[0]
+    step_report = TestReport(os.path.dirname(report_path), history_db=HISTORY_DB, run_name="okeyproxy_connection_test")
+    # Keeps reports/ within its size budget like the other suites; failing runs are kept longer
+    RetentionManager(report_dir).attach(step_report)
+    step_report.start()
+    progress_monitor = ProgressMonitor(step_report).start()
     
     # Step 1: Login once
     if not login_to_okeyproxy():
         print("[ERROR] Login failed. Cannot proceed with tests.")
+        progress_monitor.stop()
+        step_report.add_execution_error("Login failed. Cannot proceed with tests.")
+        step_report.complete()
         return False
     
     # Track test results
@@ -596,16 +458,27 @@ def run_comprehensive_connection_test():
     
     # Run all test cases
     for test_case_key, test_case_info in TEST_CASES.items():
-        result_data = run_single_test_case(test_case_key, test_case_info)
+        test_case = create_test_case(test_case_key, test_case_info['name'])
+        test_case.start()
+        step_report.add_test_case(test_case)
+        result_data = run_single_test_case(test_case_key, test_case_info, test_case)
+        add_result_details(test_case, test_case_info, result_data)
+        test_case.complete(success=result_data['passed'], error_message=result_data['error'] or None)
         test_results[test_case_key] = result_data
         if result_data['passed']:
             passed_tests += 1
         
         # Small delay between tests
         time.sleep(2)
+    progress_monitor.stop()
     
-    # Generate HTML report
-    generate_html_report(test_results, report_path)
+    # Generate the HTML report, with each test's command and output next to its steps, and the text report
+    step_report.complete()
+    step_report.generate_html_report(report_name, title="OkeyProxy Comprehensive Connection Test Report")
+    print(f"[SUCCESS] HTML report generated: {report_path}")
+    step_report.generate_text_report(filename=report_name)
+    if interval_capture_enabled():
+        print(f"[SUCCESS] Trace generated: {step_report.export_trace(f'{report_name}_trace')}")
     
     # Print final results
     print("\n" + "=" * 80)
@@ -632,7 +505,8 @@ def run_comprehensive_connection_test():
 if __name__ == "__main__":
     try:
         success = run_comprehensive_connection_test()
-        sys.exit(0 if success else 1)
+        # Step duration regressions fail the process even when every test passed
+        sys.exit(regression_exit_code() if success else 1)
     except KeyboardInterrupt:
         print("\n[INFO] Test interrupted by user")
         sys.exit(1)
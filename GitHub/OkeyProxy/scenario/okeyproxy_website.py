@@ -4,7 +4,6 @@ from selenium import webdriver
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import pytest
@@ -15,14 +14,35 @@ import logging
 import sys
 import traceback
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from test_report import TestReport, TestCase, TestStep, track_step, create_test_case
+from test_report import TestReport, TestCase, TestStep, track_step, create_test_case, ProgressMonitor
+from step_profiler import instrument_driver, install_timing_hooks, interval_capture_enabled
+from report_regression import regression_exit_code
+from artifact_store import ArtifactStore, attach_artifact
+from dom_snapshot import save_page_state
+from report_retention import RetentionManager
+from selector_validator import preflight_selectors
+import in_page_conditions as EC
+from in_page_conditions import InPageWait
+from selector_registry import SelectorRegistry, LocatorTable
+from flight_recorder import attach_flight_recorder, dump_flight_recording, report_flight_recording
+from page_helpers import attach_page_helpers, get_page_helpers
+
+# Stored page sources catch drifted selectors in seconds, before the browser starts
+if __name__ == "__main__" and not preflight_selectors(__file__):
+    sys.exit(1)
 
 # ===== Global Configuration =====
 driver = webdriver.Chrome()
-wait = WebDriverWait(driver, 20)
+instrument_driver(driver)
+page_helpers = attach_page_helpers(driver)
+wait = InPageWait(driver, 20)
 driver.maximize_window()
 
 report_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports")
+HISTORY_DB = os.path.join(report_dir, "history.db")
+# Created by setup_run_services() when a run starts, so importing this module writes nothing
+artifact_store = None
+report_retention = None
 
 # ===== OkeyProxy Configuration =====
 # PHASED APPROACH: Following proxy_payment_tests-copy.py pattern
@@ -83,6 +103,32 @@ OKEYPROXY_SELECTORS = {
     }
 }
 
+# ===== Fallback Selectors =====
+# Alternative locators per element; the selector registry tries the one that matched last time first
+FALLBACK_SELECTORS = {
+    "wallet_success_message": [
+        OKEYPROXY_SELECTORS["success_error"]["success_message"],
+        "//div[@class='payment-success-title' and contains(text(), 'Your order has been processed')]",
+        "//div[@class='payment-success-title' and contains(text(), 'Your order was processed successfully')]",
+        "//div[@class='payment-success-title' and contains(text(), 'Machine allocation failed')]",
+        "//div[contains(@class, 'payment-success')]//div[contains(text(), 'processed')]",
+        "//div[contains(@class, 'payment-success')]//div[contains(text(), 'allocation')]"
+    ],
+    "chat_close_button": [
+        "//button[contains(@class, 'chat-close')]",
+        "//button[contains(@class, 'close')]",
+        "//div[contains(@class, 'chat')]//button",
+        "//iframe[@id='s-chat-plugin']//..//button",
+        "//*[contains(@class, 'chat')]//*[contains(@class, 'close')]"
+    ],
+    "paypal_success_message": [
+        "//div[@class='payment-success-title']",
+        "//div[contains(@class, 'payment-success')]",
+        "//div[contains(text(), 'processed')]",
+        "//div[contains(text(), 'success')]"
+    ]
+}
+
 # ===== OkeyProxy Proxy Type Configuration =====
 OKEYPROXY_PROXY_TYPES = {
     "rotating_residential": {
@@ -121,13 +167,33 @@ OKEYPROXY_PROXY_TYPES = {
 
 OKEYPROXY_PAYMENT_METHODS = ["wallet_with_balance", "wallet_without_balance", "paypal"]
 
+# Created by setup_run_services() when the scenario runs, so importing it writes nothing
+selector_registry = None
+# Logical names resolve to the CSS translations selector_benchmark.py verified, else to the XPaths above
+locators = LocatorTable({"OKEYPROXY_SELECTORS": OKEYPROXY_SELECTORS},
+                        os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_overrides.json"))
+
 # ===== Utility Functions =====
-def wait_for_page_load(driver, wait):
-    """Wait for page to fully load"""
-    try:
-        wait.until(lambda driver: driver.execute_script("return document.readyState") == "complete")
-    except TimeoutException:
-        print("Warning: Page load timeout, continuing...")
+def setup_run_services():
+    """Install the timing hooks, create the artifact store, report retention and selector registry of this run
+    and attach the flight recorder"""
+    global artifact_store, report_retention, selector_registry
+    if artifact_store is not None:
+        return
+    install_timing_hooks()
+    # Screenshots and page sources of all runs, stored once per distinct content
+    artifact_store = ArtifactStore(os.path.join(report_dir, "artifacts"))
+    # Keeps reports/ within its size budget; failing runs are kept longer
+    report_retention = RetentionManager(report_dir)
+    # One file per scenario, since the scenarios run concurrently and rank different pages
+    selector_registry = SelectorRegistry(os.path.join(report_dir, "selector_registry_website.json"), FALLBACK_SELECTORS)
+    attach_flight_recorder(driver, artifact_store=artifact_store)
+
+def wait_for_page_load(driver):
+    """Wait until the page has loaded and no network request has been active for a moment"""
+    result = get_page_helpers(driver).wait_for_network_idle()
+    if not result["ok"]:
+        print(f"Warning: Page still loading after timeout, continuing... (pending: {', '.join(result['pending']) or 'none'})")
 
 def create_report():
     """Creates a unique report directory with timestamp"""
@@ -137,10 +203,12 @@ def create_report():
     return test_dir
 
 def take_screenshot(test_case, step_name):
-    """Take screenshot and save to test directory"""
+    """Take screenshot and store it in the artifact store"""
     try:
-        screenshot_path = os.path.join(test_case.test_dir, f"{step_name}_{int(time.time())}.png")
-        driver.save_screenshot(screenshot_path)
+        # Frames from the seconds before the failure, then the failure itself
+        dump_flight_recording(driver, artifact_store, test_case, step_name)
+        digest, screenshot_path = artifact_store.add_screenshot(driver.get_screenshot_as_png())
+        attach_artifact(test_case, "screenshot", step_name, digest, screenshot_path)
         print(f"Screenshot saved: {screenshot_path}")
         return screenshot_path
     except Exception as e:
@@ -148,11 +216,10 @@ def take_screenshot(test_case, step_name):
         return None
 
 def save_page_source(test_case, step_name):
-    """Save page source HTML"""
+    """Save a DOM snapshot (or the page source HTML), compressed, in the artifact store"""
     try:
-        html_path = os.path.join(test_case.test_dir, f"{step_name}_{int(time.time())}.html")
-        with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
+        kind, digest, html_path = save_page_state(driver, artifact_store)
+        attach_artifact(test_case, kind, step_name, digest, html_path)
         print(f"Page source saved: {html_path}")
         return html_path
     except Exception as e:
@@ -160,93 +227,17 @@ def save_page_source(test_case, step_name):
         return None
 
 def handle_iframe_interference():
-    """Handle iframe interference by closing chat widgets and aggressively hiding iframes"""
+    """Close the chat widget and hide chat iframes and their containers in a single page call"""
     try:
         print("Handling iframe interference...")
-        
-        # Try to close any chat widgets or overlays
-        chat_close_selectors = [
-            "//button[contains(@class, 'chat-close')]",
-            "//button[contains(@class, 'close')]",
-            "//div[contains(@class, 'chat')]//button",
-            "//iframe[@id='s-chat-plugin']//..//button",
-            "//*[contains(@class, 'chat')]//*[contains(@class, 'close')]"
-        ]
-        
-        for selector in chat_close_selectors:
-            try:
-                close_button = driver.find_element(By.XPATH, selector)
-                if close_button.is_displayed():
-                    driver.execute_script("arguments[0].click();", close_button)
-                    print("✅ Closed chat widget/iframe")
-                    time.sleep(1)
-                    break
-            except:
-                continue
-                
-        # Aggressively hide iframe and all related elements
-        try:
-            driver.execute_script("""
-                // Hide the specific chat iframe that's causing issues
-                var specificChat = document.getElementById('s-chat-plugin');
-                if (specificChat) {
-                    specificChat.style.display = 'none';
-                    specificChat.style.visibility = 'hidden';
-                    specificChat.style.zIndex = '-9999';
-                    specificChat.style.opacity = '0';
-                    specificChat.style.position = 'absolute';
-                    specificChat.style.left = '-9999px';
-                    specificChat.style.top = '-9999px';
-                    specificChat.style.width = '0px';
-                    specificChat.style.height = '0px';
-                }
-                
-                // Hide all chat-related iframes
-                var iframes = document.querySelectorAll('iframe[title*="Contact"], iframe[id*="chat"], iframe[title*="chat"], iframe[id="s-chat-plugin"]');
-                for (var i = 0; i < iframes.length; i++) {
-                    iframes[i].style.display = 'none';
-                    iframes[i].style.visibility = 'hidden';
-                    iframes[i].style.zIndex = '-9999';
-                    iframes[i].style.opacity = '0';
-                    iframes[i].style.position = 'absolute';
-                    iframes[i].style.left = '-9999px';
-                    iframes[i].style.top = '-9999px';
-                    iframes[i].style.width = '0px';
-                    iframes[i].style.height = '0px';
-                }
-                
-                // Hide any parent containers
-                var containers = document.querySelectorAll('[class*="chat"], [id*="chat"]');
-                for (var i = 0; i < containers.length; i++) {
-                    if (containers[i].querySelector('iframe')) {
-                        containers[i].style.display = 'none';
-                        containers[i].style.visibility = 'hidden';
-                        containers[i].style.zIndex = '-9999';
-                        containers[i].style.opacity = '0';
-                    }
-                }
-                
-                // Hide any fixed positioned elements that might interfere
-                var fixedElements = document.querySelectorAll('[style*="position: fixed"], [style*="position:fixed"]');
-                for (var i = 0; i < fixedElements.length; i++) {
-                    var element = fixedElements[i];
-                    if (element.id === 's-chat-plugin' || element.title === 'Contact us' || element.title === 'Contact') {
-                        element.style.display = 'none';
-                        element.style.visibility = 'hidden';
-                        element.style.zIndex = '-9999';
-                        element.style.opacity = '0';
-                        element.style.position = 'absolute';
-                        element.style.left = '-9999px';
-                        element.style.top = '-9999px';
-                    }
-                }
-            """)
-            print("✅ Aggressively hidden chat iframes and containers")
-        except Exception as e:
-            print(f"⚠️ Error hiding iframes: {str(e)}")
-            
-        # Additional wait to ensure iframe is completely hidden
-        time.sleep(2)
+        close_locators = selector_registry.ranked("chat_close_button")
+        result = page_helpers.hide_overlays(close_locators)
+        closed = result["closed"]
+        selector_registry.record("chat_close_button", close_locators[:result["tried"]],
+                                 close_locators[closed] if closed is not None else None)
+        if closed is not None:
+            print("✅ Closed chat widget/iframe")
+        print(f"✅ Hidden {result['hidden']} chat iframes and containers")
             
     except Exception as e:
         print(f"Warning: Could not handle iframe interference: {str(e)}")
@@ -258,98 +249,33 @@ def okeyproxy_login(test_case, account_type):
         try:
             print(f"Logging in to OkeyProxy with {account_type} account...")
             driver.get(OKEYPROXY_LOGIN_URL)
-            wait_for_page_load(driver, wait)
+            wait_for_page_load(driver)
             
-            # Enter email
+            # Enter email and password, one page call each
             print("Waiting for email field...")
-            email_field = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["login"]["email_input"]))
-            )
-            time.sleep(1)  # Additional wait
+            page_helpers.fill(locators["OKEYPROXY_SELECTORS.login.email_input"], OKEYPROXY_ACCOUNTS[account_type]["email"])
+            print(f"✅ Email entered successfully: {OKEYPROXY_ACCOUNTS[account_type]['email']}")
             
-            # Try multiple methods to enter email
-            try:
-                email_field.clear()
-                time.sleep(0.5)
-                email_field.send_keys(OKEYPROXY_ACCOUNTS[account_type]["email"])
-                time.sleep(1)
-                
-                # Verify email was entered
-                if email_field.get_attribute("value") == OKEYPROXY_ACCOUNTS[account_type]["email"]:
-                    print(f"✅ Email entered successfully: {OKEYPROXY_ACCOUNTS[account_type]['email']}")
-                else:
-                    print("⚠️ Email not entered properly, trying JavaScript method...")
-                    driver.execute_script("arguments[0].value = arguments[1];", email_field, OKEYPROXY_ACCOUNTS[account_type]["email"])
-                    time.sleep(1)
-                    print(f"✅ Email entered via JavaScript: {OKEYPROXY_ACCOUNTS[account_type]['email']}")
-                    
-            except Exception as e:
-                print(f"⚠️ Error entering email: {str(e)}, trying JavaScript method...")
-                driver.execute_script("arguments[0].value = arguments[1];", email_field, OKEYPROXY_ACCOUNTS[account_type]["email"])
-                time.sleep(1)
-                print(f"✅ Email entered via JavaScript: {OKEYPROXY_ACCOUNTS[account_type]['email']}")
-            
-            # Enter password
             print("Waiting for password field...")
-            password_field = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["login"]["password_input"]))
-            )
-            time.sleep(1)  # Additional wait
-            
-            # Try multiple methods to enter password
-            try:
-                password_field.clear()
-                time.sleep(0.5)
-                password_field.send_keys(OKEYPROXY_ACCOUNTS[account_type]["password"])
-                time.sleep(1)
-                print("✅ Password entered successfully")
-            except Exception as e:
-                print(f"⚠️ Error entering password: {str(e)}, trying JavaScript method...")
-                driver.execute_script("arguments[0].value = arguments[1];", password_field, OKEYPROXY_ACCOUNTS[account_type]["password"])
-                time.sleep(1)
-                print("✅ Password entered via JavaScript")
+            page_helpers.fill(locators["OKEYPROXY_SELECTORS.login.password_input"], OKEYPROXY_ACCOUNTS[account_type]["password"])
+            print("✅ Password entered successfully")
             
-            # Click login button
-            login_button = None
+            # Find, scroll to and click the first matching login button in one page call
             login_selectors = [
-                OKEYPROXY_SELECTORS["login"]["login_button"],
+                locators["OKEYPROXY_SELECTORS.login.login_button"],
                 "//button[contains(@class, 'custom-button')]//span[contains(text(), 'Login')]/..",
                 "//button[contains(@class, 'el-button')]//span[contains(text(), 'Login')]/..",
                 "//button//span[contains(text(), 'Login')]/..",
                 "//button[contains(text(), 'Login')]"
             ]
-            
-            for selector in login_selectors:
-                try:
-                    login_button = wait.until(EC.element_to_be_clickable((By.XPATH, selector)))
-                    break
-                except:
-                    continue
-            
-            if login_button:
-                print("Clicking login button...")
-                
-                # Scroll the button into view
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", login_button)
-                time.sleep(1)
-                
-                # Try JavaScript click first to avoid any interference
-                try:
-                    driver.execute_script("arguments[0].click();", login_button)
-                    print("✅ Login button clicked using JavaScript")
-                except:
-                    # Fallback to regular click
-                    login_button.click()
-                    print("✅ Login button clicked using regular click")
-                
-                time.sleep(3)  # Wait for login processing
-            else:
-                raise Exception("Could not find login button with any selector")
+            print("Clicking login button...")
+            page_helpers.click(login_selectors)
+            print("✅ Login button clicked")
             
             # Wait for redirect to dashboard
             print("Waiting for redirect to dashboard...")
-            wait.until(lambda driver: OKEYPROXY_DASHBOARD_URL in driver.current_url)
-            time.sleep(2)  # Additional wait for page to fully load
+            wait.until(EC.url_contains(OKEYPROXY_DASHBOARD_URL))
+            wait_for_page_load(driver)
             print(f"✅ Successfully logged in to OkeyProxy with {account_type} account")
             return True
             
@@ -368,22 +294,22 @@ def okeyproxy_perform_pre_payment_steps(test_case, proxy_type):
             
             # Search for country/city
             search_input = wait.until(
-                EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["pre_payment"]["country_search"]))
+                EC.presence_of_element_located(locators["OKEYPROXY_SELECTORS.pre_payment.country_search"])
             )
             search_input.clear()
             search_input.send_keys(OKEYPROXY_PROXY_TYPES[proxy_type]["search_term"])
             
             # Click search button
             search_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["pre_payment"]["search_button"]))
+                EC.element_to_be_clickable(locators["OKEYPROXY_SELECTORS.pre_payment.search_button"])
             )
             search_button.click()
-            time.sleep(3)  # Wait for search results
+            wait_for_page_load(driver)  # Wait for search results
             
             # Set quantity (if needed)
             try:
                 quantity_input = wait.until(
-                    EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["pre_payment"]["quantity_input"]))
+                    EC.presence_of_element_located(locators["OKEYPROXY_SELECTORS.pre_payment.quantity_input"])
                 )
                 quantity_input.clear()
                 quantity_input.send_keys("1")
@@ -393,7 +319,7 @@ def okeyproxy_perform_pre_payment_steps(test_case, proxy_type):
             # Select 1 day option
             try:
                 days_option = wait.until(
-                    EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["pre_payment"]["days_option"]))
+                    EC.element_to_be_clickable(locators["OKEYPROXY_SELECTORS.pre_payment.days_option"])
                 )
                 days_option.click()
             except:
@@ -402,25 +328,11 @@ def okeyproxy_perform_pre_payment_steps(test_case, proxy_type):
             # Handle iframe interference before clicking Buy Now button
             handle_iframe_interference()
             
-            # Click Buy Now button with enhanced click handling
-            buy_now_button = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["pre_payment"]["buy_now_button"]))
-            )
+            # Click Buy Now button, scrolled into view, in one page call
+            page_helpers.click(locators["OKEYPROXY_SELECTORS.pre_payment.buy_now_button"])
+            print("✅ Buy Now button clicked")
             
-            # Scroll the button into view to avoid iframe interference
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", buy_now_button)
-            time.sleep(1)
-            
-            # Try JavaScript click first to avoid iframe interception
-            try:
-                driver.execute_script("arguments[0].click();", buy_now_button)
-                print("✅ Buy Now button clicked using JavaScript")
-            except:
-                # Fallback to regular click
-                buy_now_button.click()
-                print("✅ Buy Now button clicked using regular click")
-            
-            time.sleep(3)  # Wait for payment page to load
+            wait_for_page_load(driver)  # Wait for payment page to load
             
             print(f"✅ Pre-payment steps completed for {proxy_type}")
             return True
@@ -441,46 +353,15 @@ def okeyproxy_process_wallet_payment(test_case, account_type):
             # Handle iframe interference first
             handle_iframe_interference()
             
-            # Click payment button
-            payment_button = wait.until(
-                EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["payment"]["payment_button"]))
-            )
-            
-            # Scroll the button into view to avoid iframe interference
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", payment_button)
-            time.sleep(1)
+            # Click payment button, scrolled into view, in one page call
+            page_helpers.click(locators["OKEYPROXY_SELECTORS.payment.payment_button"], displayed=False, enabled=False)
+            print("✅ Payment button clicked")
             
-            # Try JavaScript click first to avoid iframe interception
-            try:
-                driver.execute_script("arguments[0].click();", payment_button)
-                print("✅ Payment button clicked using JavaScript")
-            except:
-                # Fallback to regular click
-                payment_button.click()
-                print("✅ Payment button clicked using regular click")
-            
-            time.sleep(3)
+            wait_for_page_load(driver)
             
             if account_type == "with_balance":
                 # Check for success message with multiple variations
-                success_selectors = [
-                    OKEYPROXY_SELECTORS["success_error"]["success_message"],
-                    "//div[@class='payment-success-title' and contains(text(), 'Your order has been processed')]",
-                    "//div[@class='payment-success-title' and contains(text(), 'Your order was processed successfully')]",
-                    "//div[@class='payment-success-title' and contains(text(), 'Machine allocation failed')]",
-                    "//div[contains(@class, 'payment-success')]//div[contains(text(), 'processed')]",
-                    "//div[contains(@class, 'payment-success')]//div[contains(text(), 'allocation')]"
-                ]
-                
-                success_message = None
-                for selector in success_selectors:
-                    try:
-                        success_message = wait.until(
-                            EC.presence_of_element_located((By.XPATH, selector))
-                        )
-                        break
-                    except:
-                        continue
+                success_message = selector_registry.find(driver, "wallet_success_message", timeout=20)
                 
                 if success_message:
                     message_text = success_message.text
@@ -500,13 +381,13 @@ def okeyproxy_process_wallet_payment(test_case, account_type):
                 # Check for insufficient balance popup
                 try:
                     popup = wait.until(
-                        EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["success_error"]["insufficient_balance_popup"]))
+                        EC.presence_of_element_located(locators["OKEYPROXY_SELECTORS.success_error.insufficient_balance_popup"])
                     )
                     print("✅ Insufficient balance popup appeared as expected")
                     
                     # Verify the popup contains "Insufficient balance!" text
                     try:
-                        balance_text = driver.find_element(By.XPATH, OKEYPROXY_SELECTORS["success_error"]["insufficient_balance_text"])
+                        balance_text = driver.find_element(*locators["OKEYPROXY_SELECTORS.success_error.insufficient_balance_text"])
                         if "Insufficient balance" in balance_text.text:
                             print(f"✅ Confirmed insufficient balance message: {balance_text.text}")
                         else:
@@ -516,7 +397,7 @@ def okeyproxy_process_wallet_payment(test_case, account_type):
                     
                     # Click Later button to close popup
                     later_button = wait.until(
-                        EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["success_error"]["later_button"]))
+                        EC.element_to_be_clickable(locators["OKEYPROXY_SELECTORS.success_error.later_button"])
                     )
                     later_button.click()
                     print("✅ Popup closed with Later button")
@@ -551,31 +432,14 @@ def okeyproxy_process_paypal_payment(test_case, account_type, proxy_type):
             handle_iframe_interference()
             
             # Select PayPal option
-            paypal_option = wait.until(
-                EC.element_to_be_clickable((By.XPATH, OKEYPROXY_SELECTORS["payment"]["paypal_option"]))
-            )
-            paypal_option.click()
-            time.sleep(2)
-            
-            # Click payment button
-            payment_button = wait.until(
-                EC.presence_of_element_located((By.XPATH, OKEYPROXY_SELECTORS["payment"]["payment_button"]))
-            )
+            page_helpers.click(locators["OKEYPROXY_SELECTORS.payment.paypal_option"])
+            wait_for_page_load(driver)
             
-            # Scroll the button into view to avoid iframe interference
-            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", payment_button)
-            time.sleep(1)
+            # Click payment button, scrolled into view, in one page call
+            page_helpers.click(locators["OKEYPROXY_SELECTORS.payment.payment_button"], displayed=False, enabled=False)
+            print("✅ PayPal payment button clicked")
             
-            # Try JavaScript click first to avoid iframe interception
-            try:
-                driver.execute_script("arguments[0].click();", payment_button)
-                print("✅ PayPal payment button clicked using JavaScript")
-            except:
-                # Fallback to regular click
-                payment_button.click()
-                print("✅ PayPal payment button clicked using regular click")
-            
-            time.sleep(5)  # Wait for PayPal redirect
+            wait_for_page_load(driver)  # Wait for PayPal redirect
             
             # Handle PayPal flow based on proxy type
             if proxy_type == "rotating_residential":
@@ -590,7 +454,7 @@ def okeyproxy_process_paypal_payment(test_case, account_type, proxy_type):
                     
                     # Verify we're on the PayPal sandbox page
                     wait.until(
-                        lambda driver: "https://www.sandbox.paypal.com/checkoutnow?" in driver.current_url
+                        EC.url_contains("https://www.sandbox.paypal.com/checkoutnow?")
                     )
                     print(f"Successfully redirected to PayPal sandbox: {driver.current_url}")
                     
@@ -613,7 +477,7 @@ def okeyproxy_process_paypal_payment(test_case, account_type, proxy_type):
                     
                     # Wait for password field to be present and interactable
                     print("Waiting for password field...")
-                    time.sleep(3)  # Additional wait for page transition
+                    wait_for_page_load(driver)  # Wait for the page transition
                     
                     # Try to find password field in main content and iframes
                     password_field = None
@@ -659,70 +523,29 @@ def okeyproxy_process_paypal_payment(test_case, account_type, proxy_type):
                         # Wait for payment review page and click Continue
                         print("Waiting for payment review page...")
                         wait.until(
-                            lambda driver: "https://www.sandbox.paypal.com/webapps/hermes?" in driver.current_url
+                            EC.url_contains("https://www.sandbox.paypal.com/webapps/hermes?")
                         )
-                        time.sleep(3)  # Additional wait for page to fully load
+                        wait_for_page_load(driver)
                         
                         print("Clicking Continue button...")
                         with track_step(test_case, "Click Continue Button", "Click Continue button in PayPal"):
-                            # Try multiple selectors for the Continue button
-                            continue_button = None
-                            try:
-                                # First try the new XPath
-                                continue_button = wait.until(
-                                    EC.element_to_be_clickable((By.XPATH, "//*[@id='hermione-container']/div[1]/main/div[3]/div[2]/button"))
-                                )
-                            except:
-                                try:
-                                    # Fallback to the old XPath
-                                    continue_button = wait.until(
-                                        EC.element_to_be_clickable((By.XPATH, "//*[@id='button']/button"))
-                                    )
-                                except:
-                                    # Try finding by text content
-                                    continue_button = wait.until(
-                                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Continue')]"))
-                                    )
-                            
-                            if continue_button:
-                                # Scroll the button into view
-                                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", continue_button)
-                                time.sleep(1)
-                                # Try JavaScript click first
-                                try:
-                                    driver.execute_script("arguments[0].click();", continue_button)
-                                except:
-                                    # Fallback to regular click
-                                    continue_button.click()
-                                
-                            else:
-                                raise Exception("Could not find Continue button with any selector")
+                            # The first clickable Continue button (new XPath, old XPath, then by text), clicked in one page call
+                            page_helpers.click([
+                                "//*[@id='hermione-container']/div[1]/main/div[3]/div[2]/button",
+                                "//*[@id='button']/button",
+                                "//button[contains(text(), 'Continue')]"
+                            ])
                         
                         # Wait for success page
                         print("Waiting for payment success page...")
                         with track_step(test_case, "Verify Payment Success", "Verify payment success page"):
                             # Wait for redirect back to OkeyProxy
                             wait.until(
-                                lambda driver: "test-ipglobal.cd.xiaoxigroup.net" in driver.current_url
+                                EC.url_contains("test-ipglobal.cd.xiaoxigroup.net")
                             )
                             
                             # Check for success message
-                            success_selectors = [
-                                "//div[@class='payment-success-title']",
-                                "//div[contains(@class, 'payment-success')]",
-                                "//div[contains(text(), 'processed')]",
-                                "//div[contains(text(), 'success')]"
-                            ]
-                            
-                            success_element = None
-                            for selector in success_selectors:
-                                try:
-                                    success_element = wait.until(
-                                        EC.presence_of_element_located((By.XPATH, selector))
-                                    )
-                                    break
-                                except:
-                                    continue
+                            success_element = selector_registry.find(driver, "paypal_success_message", timeout=20)
                             
                             if success_element:
                                 print("✅ OkeyProxy PayPal payment completed successfully!")
@@ -749,55 +572,29 @@ def okeyproxy_process_paypal_payment(test_case, account_type, proxy_type):
                     # Verify redirect to sandbox.paypal.com (more flexible)
                     print("Verifying redirect to PayPal sandbox...")
                     wait.until(
-                        lambda driver: "sandbox.paypal.com" in driver.current_url
+                        EC.url_contains("sandbox.paypal.com")
                     )
                     print(f"Successfully redirected to PayPal sandbox: {driver.current_url}")
                     
                     # Wait for page to load and click "Continue to Review Order"
                     print("Waiting for page to load and clicking Continue to Review Order...")
-                    time.sleep(3)  # Wait for page to fully load
+                    wait_for_page_load(driver)
                     
                     with track_step(test_case, "Click Continue to Review Order", "Click Continue to Review Order button"):
-                        # Look for the specific button with the provided selector
-                        continue_button = wait.until(
-                            EC.element_to_be_clickable((By.XPATH, "//button[@data-id='payment-submit-btn' and @data-testid='submit-button-initial']"))
-                        )
-                        
-                        if continue_button:
-                            # Scroll the button into view
-                            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", continue_button)
-                            time.sleep(1)
-                            # Click the button
-                            driver.execute_script("arguments[0].click();", continue_button)
-                            print("✅ Clicked 'Continue to Review Order' button")
-                        else:
-                            raise Exception("Could not find 'Continue to Review Order' button")
+                        # Find, scroll into view and click the specific button in one page call
+                        page_helpers.click("//button[@data-id='payment-submit-btn' and @data-testid='submit-button-initial']")
+                        print("✅ Clicked 'Continue to Review Order' button")
                     
                     # Wait for success page
                     print("Waiting for payment success page...")
                     with track_step(test_case, "Verify Payment Success", "Verify payment success page"):
                         # Wait for redirect back to OkeyProxy
                         wait.until(
-                            lambda driver: "test-ipglobal.cd.xiaoxigroup.net" in driver.current_url
+                            EC.url_contains("test-ipglobal.cd.xiaoxigroup.net")
                         )
                         
                         # Check for success message
-                        success_selectors = [
-                            "//div[@class='payment-success-title']",
-                            "//div[contains(@class, 'payment-success')]",
-                            "//div[contains(text(), 'processed')]",
-                            "//div[contains(text(), 'success')]"
-                        ]
-                        
-                        success_element = None
-                        for selector in success_selectors:
-                            try:
-                                success_element = wait.until(
-                                    EC.presence_of_element_located((By.XPATH, selector))
-                                )
-                                break
-                            except:
-                                continue
+                        success_element = selector_registry.find(driver, "paypal_success_message", timeout=20)
                         
                         if success_element:
                             print("✅ OkeyProxy PayPal payment completed successfully!")
@@ -846,7 +643,7 @@ def run_okeyproxy_test_case(proxy_type, payment_method):
         # Step 2: Navigate to proxy type page
         with track_step(test_case, "Navigate to OkeyProxy Page", f"Navigate to {proxy_type} page"):
             driver.get(OKEYPROXY_PROXY_TYPES[proxy_type]["url"])
-            wait_for_page_load(driver, wait)
+            wait_for_page_load(driver)
             print(f"✅ Navigated to OkeyProxy {proxy_type} page")
         
         # Step 3: Perform pre-payment steps if required
@@ -911,7 +708,7 @@ def run_okeyproxy_test_case_without_login(proxy_type, payment_method, session_te
         # Step 1: Navigate to proxy type page
         with track_step(session_test_case, "Navigate to OkeyProxy Page", f"Navigate to {proxy_type} page"):
             driver.get(OKEYPROXY_PROXY_TYPES[proxy_type]["url"])
-            wait_for_page_load(driver, wait)
+            wait_for_page_load(driver)
             print(f"✅ Navigated to OkeyProxy {proxy_type} page")
         
         # Step 2: Perform pre-payment steps if required
@@ -945,6 +742,7 @@ def run_all_okeyproxy_tests():
     print("Starting OkeyProxy Payment Automation Tests...")
     print(f"Base URL: {OKEYPROXY_BASE_URL}")
     print(f"Test Accounts: {OKEYPROXY_ACCOUNTS}")
+    setup_run_services()
     
     # Create a single test case for the entire session
     session_test_case = create_test_case(
@@ -953,6 +751,17 @@ def run_all_okeyproxy_tests():
     )
     session_test_case.test_dir = create_report()
     
+    # Steps stream to the report's event log as they run, so an interrupted run stays reportable
+    report = TestReport(session_test_case.test_dir, history_db=HISTORY_DB, run_name="okeyproxy_website")
+    report.on_complete(lambda: report_flight_recording(driver, report))
+    report.on_complete(lambda: selector_registry.add_report_section(report))
+    report.on_complete(artifact_store.flush)
+    report_retention.attach(report)
+    report.start()
+    report.add_test_case(session_test_case)
+    session_test_case.start()
+    progress_monitor = ProgressMonitor(report).start()
+    
     test_results = []
     
     # ===== PHASE 1: WALLET WITH BALANCE TESTS =====
@@ -963,6 +772,7 @@ def run_all_okeyproxy_tests():
     # Login with balance account
     if not okeyproxy_login(session_test_case, "with_balance"):
         print("❌ Failed to login with balance account. Cannot proceed with Phase 1.")
+        progress_monitor.stop()
         return []
     
     # Run all wallet_with_balance tests
@@ -1103,6 +913,19 @@ def run_all_okeyproxy_tests():
         status_icon = "✅" if result["result"] == "PASSED" else "❌"
         print(f"{status_icon} {result['proxy_type']} - {result['payment_method']}: {result['result']}")
     
+    # Generate HTML and text reports from the session
+    progress_monitor.stop()
+    try:
+        session_test_case.complete()
+        report.complete()
+        report_file = report.generate_html_report("okeyproxy_website_report")
+        report.generate_text_report(filename="okeyproxy_website_report")
+        print(f"\n✅ HTML Report generated: {report_file}")
+        if interval_capture_enabled():
+            print(f"✅ Trace generated: {report.export_trace('okeyproxy_website_trace')}")
+    except Exception as e:
+        print(f"⚠️ Failed to generate HTML report: {e}")
+    
     return test_results
 
 # ===== Main Execution =====
@@ -1129,6 +952,11 @@ if __name__ == "__main__":
         else:
             print("Success Rate: 0.0%")
         
+        # Step duration regressions fail the process even when every test passed
+        if regression_exit_code():
+            print("⚠️ Step duration regressions detected, see the Step Duration Regressions report section")
+            sys.exit(regression_exit_code())
+        
     except KeyboardInterrupt:
         print("\n⚠️ Tests interrupted by user")
     except Exception as e:
@@ -0,0 +1,296 @@
+"""
+Selector Benchmark Module for Selenium Test Automation
+Translates XPath locators to CSS where the semantics allow, checks that both match the same elements
+on stored pages, times them offline and in a live browser, and writes the chosen locators to an
+overrides file that the scenarios read behind the same logical names.
+
+Usage: python selector_benchmark.py <scenario .py> [pages dir] [--live <url>] [--write]
+"""
+
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from selector_validator import extract_selectors, is_xpath, load_pages
+
+try:
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    etree = None
+
+# Overrides are written next to the scenario, where the scenario's LocatorTable reads them
+OVERRIDES_FILE = "selector_overrides.json"
+OFFLINE_REPEATS = 20
+LIVE_REPEATS = 50
+# A translation must be at least this much faster in the browser to be chosen
+MIN_LIVE_SPEEDUP = 1.1
+
+_NAME = re.compile(r"^(\*|[A-Za-z][\w-]*)")
+_IDENT = re.compile(r"^-?[A-Za-z_][\w-]*$")
+_QUOTED = r"""('[^']*'|"[^"]*")"""
+_ATTRIBUTE_EQUALS = re.compile(rf"^@([\w-]+)\s*=\s*{_QUOTED}$")
+_ATTRIBUTE_EXISTS = re.compile(r"^@([\w-]+)$")
+_ATTRIBUTE_FUNCTION = re.compile(rf"^(contains|starts-with)\(\s*@([\w-]+)\s*,\s*{_QUOTED}\s*\)$")
+_CSS_FUNCTION_OPERATORS = {"contains": "*=", "starts-with": "^="}
+
+def _split_outside(text, separator):
+    """Split text on separator where it is outside quotes, brackets and parentheses."""
+    parts, depth, quote, start, index = [], 0, None, 0, 0
+    while index < len(text):
+        char = text[index]
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, index):
+            parts.append(text[start:index])
+            index += len(separator)
+            start = index
+            continue
+        index += 1
+    parts.append(text[start:])
+    return parts
+
+def _closing_bracket(text):
+    """Get the index of the "]" closing the "[" that text starts with, or None."""
+    depth, quote = 0, None
+    for index, char in enumerate(text):
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                return index
+    return None
+
+def _css_string(quoted):
+    value = quoted[1:-1]
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def _translate_predicate(predicate, tag):
+    """Translate one [...] predicate to CSS, or return None if CSS cannot express it."""
+    predicate = predicate.strip()
+    if predicate.isdigit():
+        return f":nth-child({predicate})" if tag == "*" else f":nth-of-type({predicate})"
+    css = ""
+    for term in _split_outside(predicate, " and "):
+        term = term.strip()
+        match = _ATTRIBUTE_EQUALS.match(term)
+        if match:
+            name, value = match.group(1), match.group(2)
+            css += f"#{value[1:-1]}" if name == "id" and _IDENT.match(value[1:-1]) else f"[{name}={_css_string(value)}]"
+            continue
+        match = _ATTRIBUTE_EXISTS.match(term)
+        if match:
+            css += f"[{match.group(1)}]"
+            continue
+        match = _ATTRIBUTE_FUNCTION.match(term)
+        if match:
+            css += f"[{match.group(2)}{_CSS_FUNCTION_OPERATORS[match.group(1)]}{_css_string(match.group(3))}]"
+            continue
+        # text(), or, not(), parent steps and the like have no CSS equivalent
+        return None
+    return css
+
+def xpath_to_css(xpath):
+    """Translate an absolute XPath made of child/descendant steps, attribute tests and positions to CSS, or None."""
+    if not xpath.startswith("/") or xpath.startswith("(") or "|" in xpath:
+        return None
+    steps = _split_outside(xpath, "/")[1:]
+    parts = []
+    descendant = False
+    for step in steps:
+        if step == "":
+            descendant = True
+            continue
+        match = _NAME.match(step)
+        if not match or "::" in step:
+            return None
+        tag = match.group(1)
+        predicates = step[match.end():]
+        css = "" if tag == "*" else tag.lower()
+        position_seen = False
+        while predicates:
+            if not predicates.startswith("["):
+                return None
+            end = _closing_bracket(predicates)
+            if end is None:
+                return None
+            predicate, predicates = predicates[1:end], predicates[end + 1:]
+            # A position after a filter counts among the filtered nodes, which CSS cannot express
+            if position_seen or (predicate.strip().isdigit() and css not in ("", tag.lower())):
+                return None
+            position_seen = predicate.strip().isdigit()
+            translated = _translate_predicate(predicate, tag)
+            if translated is None:
+                return None
+            css += translated
+        css = css or "*"
+        # A leading single "/" anchors at the document root, where CSS would match at any depth
+        if not parts and not descendant:
+            css += ":root"
+        if parts:
+            parts.append(" " if descendant else " > ")
+        parts.append(css)
+        descendant = False
+    return "".join(parts) if parts else None
+
+def _time_offline(compiled, pages, repeats=OFFLINE_REPEATS):
+    """Get the median milliseconds to evaluate compiled over all pages."""
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for page_name, tree in pages:
+            compiled(tree)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def compare_offline(xpath, css, pages):
+    """Check that both locators select the same elements on every page; returns (equivalent, pages matched)."""
+    xpath_compiled, css_compiled = etree.XPath(xpath), CSSSelector(css)
+    matched = 0
+    for page_name, tree in pages:
+        xpath_matches, css_matches = xpath_compiled(tree), css_compiled(tree)
+        if set(xpath_matches) != set(css_matches):
+            return False, matched
+        matched += bool(xpath_matches)
+    return True, matched
+
+LIVE_TIMING_SCRIPT = """
+const [xpath, css, repeats] = arguments;
+function evaluateXPath() {
+    const result = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const nodes = [];
+    for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+    return nodes;
+}
+function time(query) {
+    const start = performance.now();
+    for (let i = 0; i < repeats; i++) query();
+    return (performance.now() - start) / repeats;
+}
+const xpathNodes = evaluateXPath();
+const cssNodes = Array.from(document.querySelectorAll(css));
+const same = xpathNodes.length === cssNodes.length && xpathNodes.every((node, i) => node === cssNodes[i]);
+return {xpath_ms: time(evaluateXPath), css_ms: time(() => document.querySelectorAll(css)), matches: xpathNodes.length, same: same};
+"""
+
+def benchmark_live(driver, candidates, repeats=LIVE_REPEATS):
+    """Time each (name, xpath, css) in the page with the browser's own engines; returns {name: timing}."""
+    timings = {}
+    for name, xpath, css in candidates:
+        try:
+            timings[name] = driver.execute_script(LIVE_TIMING_SCRIPT, xpath, css, repeats)
+        except Exception as e:
+            print(f"⚠️ Live timing failed for {name}: {e}")
+    return timings
+
+def benchmark_selectors(selectors, pages, live_timings=None):
+    """Translate and compare every XPath locator; returns one result dict per locator."""
+    results = []
+    for name, xpath in selectors.items():
+        if not is_xpath(xpath):
+            continue
+        css = xpath_to_css(xpath)
+        result = {"name": name, "xpath": xpath, "css": css, "equivalent": None, "pages_matched": 0,
+                  "xpath_ms": None, "css_ms": None, "live": None, "chosen": False}
+        results.append(result)
+        if css is None:
+            continue
+        try:
+            result["equivalent"], result["pages_matched"] = compare_offline(xpath, css, pages)
+        except Exception as e:
+            print(f"⚠️ Could not compare {name}: {e}")
+            result["equivalent"] = False
+            continue
+        result["xpath_ms"] = _time_offline(etree.XPath(xpath), pages)
+        result["css_ms"] = _time_offline(CSSSelector(css), pages)
+        live = (live_timings or {}).get(name)
+        result["live"] = live
+        # Equivalence needs evidence: identical matches offline on a page that has the element, or live
+        verified = result["equivalent"] and (result["pages_matched"] > 0 or (live and live["same"] and live["matches"] > 0))
+        if live:
+            verified = verified and live["same"]
+            faster = live["css_ms"] * MIN_LIVE_SPEEDUP <= live["xpath_ms"]
+        else:
+            # lxml runs CSS through cssselect's XPath translation, so offline timing cannot rank
+            # the engines; browsers' native querySelectorAll is the faster default
+            faster = True
+        result["chosen"] = bool(verified and faster)
+    return results
+
+def print_benchmark(results):
+    translated = [result for result in results if result["css"]]
+    print(f"📊 Selector benchmark: {len(results)} XPath locators, {len(translated)} translatable to CSS, "
+          f"{sum(result['chosen'] for result in results)} chosen")
+    for result in translated:
+        live = result["live"]
+        live_text = f"live {live['xpath_ms'] * 1000:.0f} vs {live['css_ms'] * 1000:.0f} µs" if live else "no live timing"
+        offline_text = f"offline {result['xpath_ms']:.2f} vs {result['css_ms']:.2f} ms" if result["xpath_ms"] is not None else "not compared"
+        state = "CHOSEN" if result["chosen"] else ("DIFFERS" if result["equivalent"] is False else "kept")
+        print(f"   {state:<8} {result['name']}: {offline_text}, {live_text}")
+        print(f"            {result['css']}")
+
+def write_overrides(results, path):
+    """Write the chosen CSS locators, keyed by logical name, for the scenarios' LocatorTable."""
+    overrides = {
+        result["name"]: {
+            "by": "css selector",
+            "value": result["css"],
+            "xpath": result["xpath"],
+            "live_speedup": round(result["live"]["xpath_ms"] / result["live"]["css_ms"], 2)
+            if result["live"] and result["live"]["css_ms"] else None
+        }
+        for result in results if result["chosen"]
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(overrides, f, indent=1, ensure_ascii=False)
+    return overrides
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--write"]
+    live_url = None
+    if "--live" in arguments:
+        live_index = arguments.index("--live")
+        live_url = arguments[live_index + 1]
+        del arguments[live_index:live_index + 2]
+    if not arguments:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    if etree is None:
+        print("❌ lxml and cssselect are required for the selector benchmark")
+        sys.exit(1)
+
+    scenario_path = arguments[0]
+    scenario_dir = os.path.dirname(os.path.abspath(scenario_path))
+    scenario_selectors = extract_selectors(scenario_path)
+    stored_pages = load_pages(arguments[1] if len(arguments) > 1 else os.path.join(scenario_dir, "reports"))
+    live_results = None
+    if live_url:
+        from selenium import webdriver
+        live_driver = webdriver.Chrome()
+        try:
+            live_driver.get(live_url)
+            live_results = benchmark_live(live_driver, [
+                (name, xpath, xpath_to_css(xpath)) for name, xpath in scenario_selectors.items()
+                if is_xpath(xpath) and xpath_to_css(xpath)
+            ])
+        finally:
+            live_driver.quit()
+    benchmark_results = benchmark_selectors(scenario_selectors, stored_pages, live_results)
+    print_benchmark(benchmark_results)
+    if "--write" in sys.argv:
+        overrides_path = os.path.join(scenario_dir, OVERRIDES_FILE)
+        print(f"✅ Wrote {len(write_overrides(benchmark_results, overrides_path))} overrides to {overrides_path}")
@@ -0,0 +1,170 @@
+"""
+Selector Registry Module for Selenium Test Automation
+Looks up logical elements through ranked fallback locators, trying the one that matched last time first.
+
+Rankings and per-locator hit rates and lookup latencies persist in a JSON file between runs,
+so dead fallbacks stop costing time and can be pruned on data.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+class SelectorRegistry:
+    """Ranked fallback locators per logical element, with lookup statistics persisted to path."""
+
+    def __init__(self, path=None, candidates=None, by=By.XPATH):
+        self.path = path
+        self.by = by
+        self.candidates = {}
+        # name -> {"preferred": locator, "locators": {locator: {"attempts", "hits", "lookups", "lookup_time"}}}
+        self.state = {}
+        self._lock = threading.Lock()
+        # Set once a lookup is counted, so runs that never used the registry leave the file alone
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Ignoring unreadable selector registry {path}: {e}")
+        for name, locators in (candidates or {}).items():
+            self.register(name, locators)
+        atexit.register(self.save)
+
+    def register(self, name, locators):
+        """Declare the fallback locators of a logical element, in their default order."""
+        self.candidates[name] = list(locators)
+        element = self.state.setdefault(name, {"preferred": None, "locators": {}})
+        for locator in locators:
+            element["locators"].setdefault(locator, {"attempts": 0, "hits": 0, "lookups": 0, "lookup_time": 0.0})
+
+    def ranked(self, name):
+        """Get the element's locators: last match first, then by hit rate, then in declared order."""
+        element = self.state[name]
+        order = {locator: index for index, locator in enumerate(self.candidates[name])}
+
+        def rank(locator):
+            stats = element["locators"][locator]
+            hit_rate = stats["hits"] / stats["attempts"] if stats["attempts"] else 0.0
+            return (locator != element["preferred"], -hit_rate, order[locator])
+        return sorted(self.candidates[name], key=rank)
+
+    def _lookup(self, driver, name, locators, attempted, displayed):
+        """Try each locator once in rank order and return the first matching element, or None."""
+        element_state = self.state[name]["locators"]
+        for locator in locators:
+            attempted.add(locator)
+            start = time.perf_counter()
+            try:
+                matches = driver.find_elements(self.by, locator)
+                if displayed:
+                    matches = [match for match in matches if match.is_displayed()]
+            except WebDriverException:
+                matches = []
+            finally:
+                stats = element_state[locator]
+                stats["lookups"] += 1
+                stats["lookup_time"] += time.perf_counter() - start
+                self._dirty = True
+            if matches:
+                return locator, matches[0]
+        return None
+
+    def find(self, driver, name, timeout=0, displayed=False):
+        """Find a logical element, polling all its locators together for up to timeout seconds.
+
+        Returns the element, or None if no locator matched in time.
+        """
+        locators = self.ranked(name)
+        attempted = set()
+        try:
+            if timeout:
+                found = WebDriverWait(driver, timeout).until(
+                    lambda d: self._lookup(d, name, locators, attempted, displayed))
+            else:
+                found = self._lookup(driver, name, locators, attempted, displayed)
+        except TimeoutException:
+            found = None
+        self.record(name, attempted, found[0] if found else None)
+        return found[1] if found else None
+
+    def record(self, name, attempted, locator=None):
+        """Count a lookup that tried the attempted locators and matched locator (None when nothing matched).
+
+        For lookups done outside find(), e.g. inside the page.
+        """
+        with self._lock:
+            element = self.state[name]
+            for attempted_locator in attempted:
+                element["locators"][attempted_locator]["attempts"] += 1
+            if locator is not None:
+                element["locators"][locator]["hits"] += 1
+                element["preferred"] = locator
+            self._dirty = True
+
+    def save(self):
+        """Write rankings and statistics to the registry file, if any lookup was counted since the last save."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            self._dirty = False
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=1, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+
+    def get_rows(self):
+        """Get one row per registered locator in rank order: element, rank, locator, hits, attempts, hit rate, avg lookup."""
+        rows = []
+        for name in self.candidates:
+            for rank, locator in enumerate(self.ranked(name), 1):
+                stats = self.state[name]["locators"][locator]
+                hit_rate = f"{stats['hits'] / stats['attempts'] * 100:.0f}%" if stats["attempts"] else "N/A"
+                lookup_ms = f"{stats['lookup_time'] / stats['lookups'] * 1000:.1f}" if stats["lookups"] else "N/A"
+                rows.append([name, rank, locator, stats["hits"], stats["attempts"], hit_rate, lookup_ms])
+        return rows
+
+    def add_report_section(self, report):
+        """Add the locator statistics to the report and persist them."""
+        report.add_section(
+            "Selector Fallbacks",
+            ["Element", "Rank", "Locator", "Hits", "Attempts", "Hit Rate", "Avg Lookup (ms)"],
+            self.get_rows()
+        )
+        self.save()
+
+class LocatorTable:
+    """Resolves logical names like "OKEYPROXY_SELECTORS.login.email_input" to Selenium locators.
+
+    Names default to their XPath in the selector dicts; entries of the overrides file written by
+    selector_benchmark.py replace them with a verified, faster equivalent (usually CSS).
+    """
+
+    def __init__(self, selector_dicts, overrides_path=None):
+        self.selector_dicts = selector_dicts
+        self.overrides = {}
+        if overrides_path and os.path.exists(overrides_path):
+            try:
+                with open(overrides_path, 'r', encoding='utf-8') as f:
+                    self.overrides = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Ignoring unreadable selector overrides {overrides_path}: {e}")
+
+    def __getitem__(self, name):
+        dict_name, *keys = name.split(".")
+        xpath = self.selector_dicts[dict_name]
+        for key in keys:
+            xpath = xpath[key]
+        override = self.overrides.get(name)
+        # An override recorded for an older XPath no longer proves equivalence
+        if override and override.get("xpath") == xpath:
+            return override["by"], override["value"]
+        return By.XPATH, xpath
@@ -0,0 +1,260 @@
+"""
+Selector Validation Module for Selenium Test Automation
+Evaluates every locator of a scenario against stored page sources and DOM snapshots without a browser,
+reporting missing, ambiguous and slow selectors.
+
+Usage: python selector_validator.py <scenario .py> [pages dir, default: <scenario dir>/reports]
+"""
+
+import ast
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = None
+
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+# Module-level dicts holding locators, read from the scenario source so validation never starts a browser
+SELECTOR_DICTS = ("OKEYPROXY_SELECTORS", "ADMIN_SELECTORS", "PROXY_TYPES", "FALLBACK_SELECTORS")
+# Entries that are text to look for rather than locators
+NON_SELECTOR_SUFFIXES = ("_keyword",)
+# Locators meant to match several elements
+PLURAL_SELECTOR_SUFFIXES = ("_rows", "_header")
+# Groups whose entries are alternative outcomes that never show on the same page
+ALTERNATIVE_GROUPS = ("success_error", "success_message")
+# Dicts of fallback lists, whose entries are alternatives by design
+ALTERNATIVE_DICTS = ("FALLBACK_SELECTORS",)
+# A never-matching selector is only reported missing after this many pages captured its group's page state,
+# since a single failure dump may show the page in an unexpected state
+MIN_GROUP_PAGES = 2
+# "strict" fails the run on missing or invalid selectors, "warn" only reports them, "off" skips the preflight
+SELECTOR_PREFLIGHT_MODE = os.environ.get("OKEYPROXY_SELECTOR_PREFLIGHT", "strict")
+# Average evaluation time above which a selector is reported as slow
+SLOW_SELECTOR_MS = 2.0
+# Only the most recent stored pages are parsed
+MAX_PAGES = 200
+# Page dumps live in the artifact store under the reports directory, apart from the rendered reports of each run
+ARTIFACT_DIR = "artifacts"
+
+def _evaluate(node, namespace):
+    """Evaluate a literal that may index into already extracted dicts, e.g. OKEYPROXY_SELECTORS["login"]["email_input"]."""
+    if isinstance(node, ast.Dict):
+        return {_evaluate(key, namespace): _evaluate(value, namespace) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, ast.List):
+        return [_evaluate(element, namespace) for element in node.elts]
+    if isinstance(node, ast.Subscript):
+        return _evaluate(node.value, namespace)[_evaluate(node.slice, namespace)]
+    if isinstance(node, ast.Name):
+        return namespace[node.id]
+    return ast.literal_eval(node)
+
+def extract_selectors(module_path, dict_names=SELECTOR_DICTS):
+    """Get {"DICT.group.key": selector} for the selector dicts of a scenario module, without importing it."""
+    with open(module_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), module_path)
+    namespace = {}
+    for statement in tree.body:
+        if (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name) and statement.targets[0].id in dict_names):
+            try:
+                namespace[statement.targets[0].id] = _evaluate(statement.value, namespace)
+            except (KeyError, ValueError, TypeError):
+                continue
+
+    selectors = {}
+    def flatten(prefix, value, proxy_types):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                flatten(f"{prefix}.{key}", child, proxy_types)
+        elif isinstance(value, list):
+            for index, child in enumerate(value):
+                flatten(f"{prefix}.{index}", child, proxy_types)
+        elif isinstance(value, str) and not prefix.endswith(NON_SELECTOR_SUFFIXES):
+            # PROXY_TYPES mixes display names with locators
+            if not proxy_types or prefix.endswith("_xpath"):
+                selectors[prefix] = value
+    for name, value in namespace.items():
+        flatten(name, value, name == "PROXY_TYPES")
+    return selectors
+
+def is_xpath(selector):
+    return selector.startswith(("/", "(", "./"))
+
+def compile_selector(selector):
+    """Compile a locator to a callable that returns the matching elements of a tree."""
+    if is_xpath(selector):
+        return etree.XPath(selector)
+    if CSSSelector is None:
+        raise ValueError("cssselect is not installed")
+    return CSSSelector(selector)
+
+def _snapshot_trees(snapshot):
+    """Rebuild one element tree per document (main page and iframes) of a DevTools DOM snapshot."""
+    strings = snapshot["strings"]
+    for document in snapshot["documents"]:
+        nodes = document["nodes"]
+        elements = {}
+        root = None
+        for index, parent in enumerate(nodes["parentIndex"]):
+            node_type = nodes["nodeType"][index]
+            parent_element = elements.get(parent)
+            if node_type == 1:
+                tag = strings[nodes["nodeName"][index]].lower()
+                try:
+                    element = etree.Element(tag) if parent_element is None else etree.SubElement(parent_element, tag)
+                except ValueError:
+                    continue
+                attributes = nodes["attributes"][index]
+                for i in range(0, len(attributes), 2):
+                    try:
+                        element.set(strings[attributes[i]], strings[attributes[i + 1]])
+                    except ValueError:
+                        continue
+                elements[index] = element
+                if root is None:
+                    root = element
+            elif node_type == 3 and parent_element is not None:
+                text = strings[nodes["nodeValue"][index]]
+                if len(parent_element):
+                    last = parent_element[-1]
+                    last.tail = (last.tail or "") + text
+                else:
+                    parent_element.text = (parent_element.text or "") + text
+            elif node_type == 11 and parent_element is not None:
+                # Shadow roots are flattened into their host
+                elements[index] = parent_element
+        if root is not None:
+            yield etree.ElementTree(root)
+
+def load_pages(pages_dir, max_pages=MAX_PAGES):
+    """Parse the newest stored page sources (.html, .html.gz) and DOM snapshots (.json.gz) under pages_dir.
+
+    For a reports directory only its artifact store is read, so rendered HTML reports are never taken for pages.
+    """
+    artifact_dir = os.path.join(pages_dir, ARTIFACT_DIR)
+    if os.path.isdir(artifact_dir):
+        pages_dir = artifact_dir
+    paths = []
+    for root, dirs, files in os.walk(pages_dir):
+        for name in files:
+            if name.endswith((".html", ".html.gz", ".json.gz")):
+                paths.append(os.path.join(root, name))
+    paths.sort(key=os.path.getmtime, reverse=True)
+
+    pages = []
+    for path in paths[:max_pages]:
+        try:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, 'rb') as f:
+                content = f.read()
+            if path.endswith(".json.gz"):
+                for index, tree in enumerate(_snapshot_trees(json.loads(content))):
+                    pages.append((f"{path}#{index}", tree))
+            elif content.strip():
+                pages.append((path, lxml_html.fromstring(content).getroottree()))
+        except Exception as e:
+            print(f"⚠️ Skipping unreadable page {path}: {e}")
+    return pages
+
+def validate_selectors(selectors, pages):
+    """Evaluate every selector on every page and classify it.
+
+    A selector that never matches is "missing" when MIN_GROUP_PAGES pages show at least half
+    of the other selectors of its group (the pages were captured in the state the group
+    targets), and "unverified" otherwise. Alternative-outcome groups are never reported missing.
+    """
+    results = {}
+    matched_pages = {}
+    for name, selector in selectors.items():
+        result = {"name": name, "selector": selector, "kind": "xpath" if is_xpath(selector) else "css",
+                  "pages_matched": 0, "max_matches": 0, "avg_ms": None, "status": "ok", "error": None}
+        results[name] = result
+        matched_pages[name] = set()
+        try:
+            compiled = compile_selector(selector)
+        except Exception as e:
+            result["status"], result["error"] = "invalid", str(e)
+            continue
+        durations = []
+        for page_name, tree in pages:
+            start = time.perf_counter()
+            try:
+                matches = len(compiled(tree))
+            except Exception as e:
+                result["status"], result["error"] = "invalid", str(e)
+                break
+            durations.append((time.perf_counter() - start) * 1000)
+            if matches:
+                matched_pages[name].add(page_name)
+                result["pages_matched"] += 1
+                result["max_matches"] = max(result["max_matches"], matches)
+        if durations:
+            result["avg_ms"] = statistics.mean(durations)
+
+    groups = {}
+    for name in results:
+        groups.setdefault(name.rsplit(".", 1)[0], []).append(name)
+    for group, names in groups.items():
+        for name in names:
+            result = results[name]
+            if result["status"] == "invalid":
+                continue
+            if result["pages_matched"] == 0:
+                siblings = [other for other in names if other != name]
+                group_pages = [page_name for page_name, tree in pages
+                               if siblings and sum(page_name in matched_pages[other] for other in siblings) * 2 >= len(siblings)]
+                alternative = group.rsplit(".", 1)[-1] in ALTERNATIVE_GROUPS or group.split(".", 1)[0] in ALTERNATIVE_DICTS
+                result["status"] = "missing" if len(group_pages) >= MIN_GROUP_PAGES and not alternative else "unverified"
+            elif result["max_matches"] > 1 and not name.endswith(PLURAL_SELECTOR_SUFFIXES):
+                result["status"] = "ambiguous"
+            elif result["avg_ms"] is not None and result["avg_ms"] > SLOW_SELECTOR_MS:
+                result["status"] = "slow"
+    return list(results.values())
+
+def print_results(results, page_count):
+    problems = [result for result in results if result["status"] not in ("ok", "unverified")]
+    unverified = sum(result["status"] == "unverified" for result in results)
+    print(f"📊 Selector validation: {len(results)} selectors on {page_count} stored pages, {len(problems)} flagged, "
+          f"{unverified} unverified (no stored page shows their page)")
+    for result in sorted(problems, key=lambda result: (result["status"], result["name"])):
+        timing = f"{result['avg_ms']:.2f} ms" if result["avg_ms"] is not None else "-"
+        detail = result["error"] or f"{result['pages_matched']} pages, up to {result['max_matches']} matches, {timing}"
+        print(f"   {result['status'].upper():<10} {result['name']}: {detail}")
+
+def preflight_selectors(module_path, pages_dir=None):
+    """Validate a scenario's selectors before it starts; returns False if any is missing or invalid in strict mode.
+
+    Passes (with a warning) when lxml is not installed or no pages are stored yet.
+    """
+    if SELECTOR_PREFLIGHT_MODE == "off":
+        return True
+    if etree is None:
+        print("⚠️ lxml is not installed, skipping selector preflight")
+        return True
+    pages_dir = pages_dir or os.path.join(os.path.dirname(os.path.abspath(module_path)), "reports")
+    start = time.perf_counter()
+    pages = load_pages(pages_dir) if os.path.isdir(pages_dir) else []
+    if not pages:
+        print(f"⚠️ No stored pages under {pages_dir}, skipping selector preflight")
+        return True
+    results = validate_selectors(extract_selectors(module_path), pages)
+    print_results(results, len(pages))
+    failed = [result for result in results if result["status"] in ("missing", "invalid")]
+    print(f"{'❌' if failed else '✅'} Selector preflight finished in {time.perf_counter() - start:.2f}s")
+    return not failed or SELECTOR_PREFLIGHT_MODE != "strict"
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__.strip().split("\n\n")[-1])
+        sys.exit(2)
+    sys.exit(0 if preflight_selectors(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None) else 1)
@@ -0,0 +1,164 @@
+"""
+Step Profiling Module for Selenium Test Automation
+Attributes the time spent inside each test step to sleeps, waits, WebDriver commands and subprocesses.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.webdriver.support.wait import WebDriverWait
+
+from test_report import current_step
+
+_original_sleep = time.sleep
+_original_until = WebDriverWait.until
+_original_until_not = WebDriverWait.until_not
+_original_subprocess_run = subprocess.run
+
+# Sleeps and commands issued while polling inside a wait belong to the wait; per thread, so a wait in the
+# test thread does not hide the work of the artifact writer or progress monitor threads
+_waits = threading.local()
+_hooks_installed = False
+# Commands the tooling issues for itself (e.g. flight recorder captures) are not part of any step's work
+_unprofiled = threading.local()
+# Called as callback(driver, "start" | "end") around each outermost wait, e.g. to capture the page
+_wait_listeners = []
+# Individual intervals are only kept for timeline export; the buckets are always summed
+_capture_intervals = False
+
+def interval_capture_enabled():
+    """Whether sleeps, waits, commands and subprocesses are recorded as individual intervals."""
+    return _capture_intervals
+
+@contextmanager
+def unprofiled():
+    """Issue WebDriver commands on this thread without attributing them to the active step."""
+    depth = getattr(_unprofiled, "depth", 0)
+    _unprofiled.depth = depth + 1
+    try:
+        yield
+    finally:
+        _unprofiled.depth = depth
+
+def add_wait_listener(callback):
+    """Call callback(driver, phase) when an outermost wait starts and ends; driver is None if unknown."""
+    _wait_listeners.append(callback)
+
+def _notify_wait(driver, phase):
+    for callback in _wait_listeners:
+        try:
+            callback(driver, phase)
+        except Exception as e:
+            print(f"⚠️ Wait listener failed: {e}")
+
+def _in_wait():
+    return getattr(_waits, "depth", 0) > 0
+
+def _record(bucket, start_ns, name):
+    step = current_step()
+    if step is None:
+        return
+    end_ns = time.perf_counter_ns()
+    step.record_time(bucket, (end_ns - start_ns) / 1e9)
+    if _capture_intervals:
+        step.record_interval(bucket, name, start_ns, end_ns)
+
+def instrument_driver(driver):
+    """Wrap the driver's command executor to record count, type and latency of every WebDriver call."""
+    executor = driver.command_executor
+    if getattr(executor, "_step_profiler_instrumented", False):
+        return driver
+
+    original_execute = executor.execute
+
+    def execute(command, params):
+        if getattr(_unprofiled, "depth", 0):
+            return original_execute(command, params)
+        start_ns = time.perf_counter_ns()
+        try:
+            return original_execute(command, params)
+        finally:
+            step = current_step()
+            if step is not None:
+                end_ns = time.perf_counter_ns()
+                duration = (end_ns - start_ns) / 1e9
+                step.record_command(command, duration)
+                if not _in_wait():
+                    step.record_time("command", duration)
+                if _capture_intervals:
+                    step.record_interval("command", command, start_ns, end_ns, getattr(driver, "session_id", None))
+
+    executor.execute = execute
+    executor._step_profiler_instrumented = True
+    return driver
+
+def _profiled_sleep(seconds):
+    start_ns = time.perf_counter_ns()
+    try:
+        _original_sleep(seconds)
+    finally:
+        if not _in_wait():
+            _record("sleep", start_ns, f"sleep({seconds})")
+
+def _condition_name(method):
+    # expected_conditions are closures such as "element_to_be_clickable.<locals>._predicate"
+    return getattr(method, "__qualname__", type(method).__name__).split(".")[0]
+
+@contextmanager
+def profiled_wait(name, driver=None):
+    """Attribute a wait, and the commands and sleeps issued inside it, to wait_success or wait_timeout.
+
+    The wait counts as timed out when the block raises or sets the yielded outcome's "timed_out".
+    """
+    depth = getattr(_waits, "depth", 0)
+    if depth == 0:
+        _notify_wait(driver, "start")
+    start_ns = time.perf_counter_ns()
+    outcome = {"timed_out": False}
+    _waits.depth = depth + 1
+    try:
+        yield outcome
+    except BaseException:
+        outcome["timed_out"] = True
+        raise
+    finally:
+        _waits.depth = depth
+        if depth == 0:
+            _record("wait_timeout" if outcome["timed_out"] else "wait_success", start_ns, name)
+            _notify_wait(driver, "end")
+
+def _profile_wait(original):
+    def until(self, method, message=""):
+        with profiled_wait(f"wait {_condition_name(method)}", getattr(self, "_driver", None)):
+            return original(self, method, message)
+    return until
+
+def _profiled_subprocess_run(*args, **kwargs):
+    start_ns = time.perf_counter_ns()
+    try:
+        return _original_subprocess_run(*args, **kwargs)
+    finally:
+        command = args[0] if args else kwargs.get("args", "")
+        if not isinstance(command, str):
+            command = " ".join(str(part) for part in command)
+        _record("subprocess", start_ns, command[:80])
+
+def install_timing_hooks(capture_intervals=None):
+    """Patch time.sleep, WebDriverWait and subprocess.run so their time is attributed to the active step.
+
+    Interval capture for trace export is off unless requested or OKEYPROXY_TRACE is set.
+    """
+    global _hooks_installed, _capture_intervals
+    if capture_intervals is None:
+        capture_intervals = bool(os.environ.get("OKEYPROXY_TRACE"))
+    _capture_intervals = _capture_intervals or capture_intervals
+    if _hooks_installed:
+        return
+    time.sleep = _profiled_sleep
+    WebDriverWait.until = _profile_wait(_original_until)
+    WebDriverWait.until_not = _profile_wait(_original_until_not)
+    subprocess.run = _profiled_subprocess_run
+    _hooks_installed = True
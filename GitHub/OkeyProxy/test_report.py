@@ -3,62 +3,408 @@ Test Reporting Module for Selenium Test Automation
 Provides classes and functions for tracking test execution and generating reports.
 """
 
+import atexit
+import json
 import os
+import sys
+import threading
 import time
 import traceback
 from datetime import datetime
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+# Buckets that the time spent inside a step is attributed to; "other" is the remainder
+TIME_BUCKETS = ("sleep", "wait_success", "wait_timeout", "command", "subprocess")
+TIME_BUCKET_LABELS = {
+    "sleep": "Sleep",
+    "wait_success": "Wait (success)",
+    "wait_timeout": "Wait (timeout)",
+    "command": "WebDriver Commands",
+    "subprocess": "Subprocess",
+    "other": "Other"
+}
+
+class EventLog:
+    """Append-only JSONL event log that is flushed and fsynced in batches."""
+    
+    def __init__(self, path, batch_size=50, sync_interval=1.0, append=True):
+        self.path = path
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        atexit.register(self.close)
+    
+    def append(self, event):
+        """Append one event, syncing when the batch is full or the interval elapsed."""
+        if self._file is None:
+            return
+        self._file.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        self._pending += 1
+        if self._pending >= self.batch_size or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+    
+    def sync(self):
+        """Flush pending events and fsync them to disk."""
+        if self._file is None or self._pending == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+    
+    def close(self):
+        """Sync and close the log."""
+        if self._file is None:
+            return
+        self.sync()
+        self._file.close()
+        self._file = None
+
+def read_events(path):
+    """Yield the events of a JSONL event log, skipping a torn last line."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+# Steps and cases are timed with perf_counter_ns; wall-clock times are derived
+# from this single anchor so clock adjustments cannot corrupt durations
+CLOCK_ANCHOR = {"wall_ns": time.time_ns(), "perf_ns": time.perf_counter_ns()}
+
+# Names of the threads that ran steps, kept for trace export after worker threads exit
+THREAD_NAMES = {}
+
+# Nested steps running in worker threads may finish at the same time
+_child_spans_lock = threading.Lock()
+
+# Steps that ran on the main thread, the common case, keep no thread id of their own
+_MAIN_THREAD_ID = threading.main_thread().ident
+
+def to_wall_time(perf_ns):
+    """Convert a perf_counter_ns reading to epoch seconds using the clock anchor."""
+    if perf_ns is None:
+        return None
+    return (CLOCK_ANCHOR["wall_ns"] + perf_ns - CLOCK_ANCHOR["perf_ns"]) / 1e9
+
+def to_perf_ns(wall_time):
+    """Convert epoch seconds back to the perf_counter_ns timeline of the clock anchor."""
+    if wall_time is None:
+        return None
+    return CLOCK_ANCHOR["perf_ns"] + round(wall_time * 1e9) - CLOCK_ANCHOR["wall_ns"]
+
+def duration_seconds(start_ns, end_ns):
+    """Get the seconds between two perf_counter_ns readings, or None if either is missing."""
+    if start_ns is None or end_ns is None:
+        return None
+    return (end_ns - start_ns) / 1e9
+
+class StepDetails:
+    """The less common parts of a step, kept out of TestStep until a step needs one of them."""
+    
+    __slots__ = ("error_message", "stack_trace", "command_count", "command_time", "command_types", "time_buckets",
+                 "child_time", "child_spans", "parent_id", "depth", "thread_id", "intervals", "artifacts")
+    
+    def __init__(self):
+        self.error_message = None
+        self.stack_trace = None
+        self.command_count = 0
+        self.command_time = 0.0
+        # Most steps never issue commands or hit a timed bucket, so both dicts are created on first use
+        self.command_types = None
+        self.time_buckets = None
+        self.child_time = 0.0
+        # Merged (start_ns, end_ns) spans of nested steps, so concurrent children are not counted twice
+        self.child_spans = None
+        # Step id of the enclosing step in the same test case, or None for a top-level step
+        self.parent_id = None
+        self.depth = 0
+        self.thread_id = _MAIN_THREAD_ID
+        # (kind, name, start_ns, end_ns, track) tuples, only filled when interval capture is enabled
+        self.intervals = None
+        # Screenshots and page sources captured during the step, from the artifact store
+        self.artifacts = None
+
+def _detail_property(field):
+    """Expose a StepDetails field on TestStep; reads fall back to the default and default writes allocate nothing."""
+    default = getattr(_DEFAULT_DETAILS, field)
+    
+    def get(step):
+        details = step._details
+        return getattr(details if details is not None else _DEFAULT_DETAILS, field)
+    
+    def set(step, value):
+        if step._details is None:
+            if value == default:
+                return
+            step._details = StepDetails()
+        setattr(step._details, field, value)
+    
+    return property(get, set)
+
+_DEFAULT_DETAILS = StepDetails()
 
 class TestStep:
-    """Represents a single test step with timing and status information."""
+    """Represents a single test step with timing and status information.
+    
+    Long monitoring runs keep every step in memory, so a passing step on the
+    main thread is only its name, description, timing and status; errors,
+    profiling, nesting and artifacts live in a StepDetails created by the
+    first step that needs one.
+    """
+    
+    __slots__ = ("name", "description", "start_ns", "end_ns", "status", "_details")
     
     def __init__(self, name, description):
         self.name = name
         self.description = description
-        self.start_time = None
-        self.end_time = None
+        self.start_ns = None
+        self.end_ns = None
         self.status = "NOT_STARTED"
-        self.error_message = None
+        self._details = None
+    
+    error_message = _detail_property("error_message")
+    stack_trace = _detail_property("stack_trace")
+    command_count = _detail_property("command_count")
+    command_time = _detail_property("command_time")
+    child_time = _detail_property("child_time")
+    parent_id = _detail_property("parent_id")
+    depth = _detail_property("depth")
+    thread_id = _detail_property("thread_id")
+    intervals = _detail_property("intervals")
+    artifacts = _detail_property("artifacts")
+    
+    def _get_details(self):
+        if self._details is None:
+            self._details = StepDetails()
+        return self._details
+    
+    @property
+    def start_time(self):
+        return to_wall_time(self.start_ns)
+    
+    @start_time.setter
+    def start_time(self, value):
+        self.start_ns = to_perf_ns(value)
+    
+    @property
+    def end_time(self):
+        return to_wall_time(self.end_ns)
+    
+    @end_time.setter
+    def end_time(self, value):
+        self.end_ns = to_perf_ns(value)
+    
+    @property
+    def command_types(self):
+        command_types = self._details.command_types if self._details is not None else None
+        return command_types if command_types is not None else {}
+    
+    @command_types.setter
+    def command_types(self, value):
+        if value:
+            self._get_details().command_types = dict(value)
+        elif self._details is not None:
+            self._details.command_types = None
+    
+    @property
+    def time_buckets(self):
+        time_buckets = self._details.time_buckets if self._details is not None else None
+        return time_buckets if time_buckets is not None else dict.fromkeys(TIME_BUCKETS, 0.0)
+    
+    @time_buckets.setter
+    def time_buckets(self, value):
+        if value and any(value.values()):
+            self._get_details().time_buckets = dict(value)
+        elif self._details is not None:
+            self._details.time_buckets = None
     
     def start(self):
         """Start timing the test step."""
-        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.thread_id = threading.get_ident()
+        if self.thread_id not in THREAD_NAMES:
+            THREAD_NAMES[self.thread_id] = threading.current_thread().name
         self.status = "RUNNING"
     
     def complete(self, success=True, error_message=None, stack_trace=None):
         """Complete the test step with success/failure status."""
-        self.end_time = time.time()
+        self.end_ns = time.perf_counter_ns()
         self.status = "PASSED" if success else "FAILED"
         self.error_message = error_message
         self.stack_trace = stack_trace
     
+    def fail(self, error_message):
+        """Complete the step as failed without raising, for helpers that report failure by return value."""
+        self.complete(success=False, error_message=error_message)
+    
     def get_duration(self):
         """Get the duration of the test step in seconds."""
-        if self.start_time and self.end_time:
-            return self.end_time - self.start_time
-        return None
+        return duration_seconds(self.start_ns, self.end_ns)
+    
+    def get_exclusive_duration(self):
+        """Get the step's own duration in seconds, excluding time spent in nested steps."""
+        duration = self.get_duration()
+        if duration is None:
+            return None
+        return max(0.0, duration - self.child_time)
+    
+    def add_child_span(self, start_ns, end_ns):
+        """Exclude a nested step's span from this step's own time; overlapping children count once."""
+        with _child_spans_lock:
+            details = self._get_details()
+            merged = []
+            for span_start, span_end in details.child_spans or []:
+                if span_end < start_ns or span_start > end_ns:
+                    merged.append((span_start, span_end))
+                else:
+                    start_ns, end_ns = min(start_ns, span_start), max(end_ns, span_end)
+            merged.append((start_ns, end_ns))
+            merged.sort()
+            details.child_spans = merged
+            details.child_time = sum(span_end - span_start for span_start, span_end in merged) / 1e9
+    
+    def record_command(self, command, duration):
+        """Record one WebDriver round trip issued while this step was active."""
+        details = self._get_details()
+        details.command_count += 1
+        details.command_time += duration
+        if details.command_types is None:
+            details.command_types = {}
+        details.command_types[command] = details.command_types.get(command, 0) + 1
+    
+    def record_time(self, bucket, duration):
+        """Attribute time spent inside this step to one of TIME_BUCKETS."""
+        details = self._get_details()
+        if details.time_buckets is None:
+            details.time_buckets = dict.fromkeys(TIME_BUCKETS, 0.0)
+        details.time_buckets[bucket] += duration
+    
+    def add_artifact(self, artifact):
+        """Link a stored screenshot or page source to this step."""
+        details = self._get_details()
+        if details.artifacts is None:
+            details.artifacts = []
+        details.artifacts.append(artifact)
+    
+    def record_interval(self, kind, name, start_ns, end_ns, track=None):
+        """Record one timed sleep, wait, command or subprocess for timeline export."""
+        details = self._get_details()
+        if details.intervals is None:
+            details.intervals = []
+        details.intervals.append((kind, name, start_ns, end_ns, track))
+    
+    def get_time_breakdown(self):
+        """Get this step's own time per bucket, excluding nested steps, with the remainder as "other"."""
+        breakdown = self.time_buckets.copy()
+        duration = self.get_duration()
+        if duration is None:
+            breakdown["other"] = 0.0
+        else:
+            breakdown["other"] = max(0.0, duration - self.child_time - sum(self.time_buckets.values()))
+        return breakdown
+    
+    def to_event(self):
+        """Get the completed step's results as an event payload."""
+        return {
+            "status": self.status,
+            "end_time": self.end_time,
+            "error_message": self.error_message,
+            "stack_trace": self.stack_trace,
+            "command_count": self.command_count,
+            "command_time": self.command_time,
+            "command_types": self.command_types,
+            "time_buckets": self.time_buckets,
+            "child_time": self.child_time,
+            "artifacts": self.artifacts,
+            "thread_id": self.thread_id,
+            "thread_name": THREAD_NAMES.get(self.thread_id),
+            # Interval times are stored as wall-clock seconds so a rebuilt report can map them to its own clock
+            "intervals": [[kind, name, to_wall_time(start_ns), to_wall_time(end_ns), track]
+                          for kind, name, start_ns, end_ns, track in self.intervals] if self.intervals else None
+        }
+    
+    def apply_event(self, event):
+        """Restore the step's results from a step_end event payload."""
+        for field in ("status", "end_time", "error_message", "stack_trace", "command_count",
+                      "command_time", "command_types", "time_buckets", "child_time", "artifacts", "thread_id"):
+            if field in event:
+                setattr(self, field, event[field])
+        if event.get("thread_name") is not None:
+            THREAD_NAMES.setdefault(self.thread_id, event["thread_name"])
+        if event.get("intervals"):
+            self.intervals = [(kind, name, to_perf_ns(start), to_perf_ns(end), track)
+                              for kind, name, start, end, track in event["intervals"]]
 
 class TestCase:
     """Represents a complete test case with multiple steps."""
     
+    __slots__ = ("name", "description", "steps", "start_ns", "end_ns", "_status", "error_message", "stack_trace",
+                 "case_id", "event_log", "retain_steps", "step_count", "step_counts", "test_dir",
+                 "report", "artifacts", "details", "_running_step_ids")
+    
     def __init__(self, name, description):
         self.name = name
         self.description = description
         self.steps = []
-        self.start_time = None
-        self.end_time = None
-        self.status = "NOT_STARTED"
+        self.start_ns = None
+        self.end_ns = None
+        self.report = None
+        self._status = "NOT_STARTED"
         self.error_message = None
         self.stack_trace = None
+        self.case_id = None
+        self.event_log = None
+        self.retain_steps = True
+        self.step_count = 0
+        self.step_counts = {}
+        self.test_dir = None
+        self.artifacts = None
+        self.details = None
+        # Ids of the steps still running, for their step_end events and their children's parent ids;
+        # a step's id is its index in steps, so finished steps need not keep one
+        self._running_step_ids = {}
+    
+    @property
+    def status(self):
+        return self._status
+    
+    @status.setter
+    def status(self, value):
+        # Runners also set the status directly, so the report's counters follow every change
+        if self.report is not None and value != self._status:
+            self.report._case_status_changed(self._status, value)
+        self._status = value
+    
+    @property
+    def start_time(self):
+        return to_wall_time(self.start_ns)
+    
+    @start_time.setter
+    def start_time(self, value):
+        self.start_ns = to_perf_ns(value)
+    
+    @property
+    def end_time(self):
+        return to_wall_time(self.end_ns)
+    
+    @end_time.setter
+    def end_time(self, value):
+        self.end_ns = to_perf_ns(value)
     
     def start(self):
         """Start the test case."""
-        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
         self.status = "RUNNING"
+        self._emit({"event": "case_start", "start_time": self.start_time})
     
     def complete(self, success=None, error_message=None, stack_trace=None):
         """Complete the test case with success/failure status."""
-        self.end_time = time.time()
+        self.end_ns = time.perf_counter_ns()
         
         # If success is explicitly provided, use it
         if success is not None:
@@ -69,38 +415,91 @@ class TestCase:
         
         self.error_message = error_message
         self.stack_trace = stack_trace
+        self._emit({
+            "event": "case_end",
+            "status": self.status,
+            "end_time": self.end_time,
+            "error_message": self.error_message,
+            "stack_trace": self.stack_trace
+        })
+    
+    def add_artifact(self, artifact):
+        """Link a stored screenshot or page source captured outside any step to this test case."""
+        if self.artifacts is None:
+            self.artifacts = []
+        self.artifacts.append(artifact)
+        self._emit({"event": "case_artifact", "artifact": artifact})
+    
+    def add_detail(self, label, text):
+        """Add a labelled block of text, e.g. a command and its output, shown with the test case in the report."""
+        if self.details is None:
+            self.details = []
+        self.details.append((label, text))
+        self._emit({"event": "case_detail", "label": label, "text": text})
     
     def add_step(self, step):
         """Add a test step to this test case."""
-        self.steps.append(step)
+        step_id = self.step_count
+        self._running_step_ids[step] = step_id
+        self.step_count += 1
+        if self.retain_steps:
+            self.steps.append(step)
+        if self.report is not None:
+            self.report.step_count += 1
+            self.report.running_steps[step] = None
+        self._emit_step_start(step, step_id)
+    
+    def step_completed(self, step):
+        """Record a completed step's result in the running counters and stream it to the event log."""
+        self.step_counts[step.status] = self.step_counts.get(step.status, 0) + 1
+        if self.report is not None:
+            self.report._step_status_counted(step.status)
+            self.report.running_steps.pop(step, None)
+        self._emit(dict(step.to_event(), event="step_end", step=self._running_step_ids.pop(step, None)))
+    
+    def running_step_id(self, step):
+        """Get the id of a step of this test case that has not completed yet."""
+        return self._running_step_ids.get(step)
+    
+    def _emit_step_start(self, step, step_id):
+        self._emit({
+            "event": "step_start",
+            "step": step_id,
+            "name": step.name,
+            "description": step.description,
+            "start_time": step.start_time,
+            "parent": step.parent_id,
+            "depth": step.depth
+        })
+    
+    def _emit(self, event):
+        if self.event_log is not None:
+            event["case"] = self.case_id
+            self.event_log.append(event)
     
     def get_duration(self):
         """Get the total duration of the test case in seconds."""
-        if self.start_time and self.end_time:
-            return self.end_time - self.start_time
-        return None
+        return duration_seconds(self.start_ns, self.end_ns)
     
     def get_passed_steps(self):
         """Get the number of passed steps."""
-        return sum(1 for step in self.steps if step.status == "PASSED")
+        return self.step_counts.get("PASSED", 0)
     
     def get_failed_steps(self):
         """Get the number of failed steps."""
-        return sum(1 for step in self.steps if step.status == "FAILED")
+        return self.step_counts.get("FAILED", 0)
     
     def _determine_status_from_steps(self):
         """Determine test case status based on step results."""
-        if not self.steps:
+        if self.step_count == 0:
             return "NOT_STARTED"
         
         # Check if any steps failed
-        failed_steps = [step for step in self.steps if step.status == "FAILED"]
-        if failed_steps:
+        if self.step_counts.get("FAILED", 0):
             return "FAILED"
         
         # Check if all steps passed
-        passed_steps = [step for step in self.steps if step.status == "PASSED"]
-        if len(passed_steps) == len(self.steps):
+        if self.step_counts.get("PASSED", 0) == self.step_count:
             return "PASSED"
         
         # If some steps are still running or not started
@@ -122,266 +521,423 @@ class TestCase:
 class TestReport:
     """Manages test execution reporting and generates reports."""
     
-    def __init__(self, report_dir):
+    def __init__(self, report_dir, event_log_name="events.jsonl", retain_steps=True, history_db=None, run_name=None):
         self.report_dir = report_dir
+        self.history_db = history_db
+        self.run_name = run_name or os.path.basename(os.path.normpath(report_dir))
+        self.history_run_id = None
+        # Extra tables (title, headers, rows, css_class) added by checks such as regression detection
+        self.sections = []
+        self.completion_hooks = []
         self.test_cases = []
-        self.start_time = None
-        self.end_time = None
+        self.start_ns = None
+        self.end_ns = None
+        self.clock_anchor = CLOCK_ANCHOR
         self.execution_errors = []
+        self.retain_steps = retain_steps
+        # Running counters keep summaries and progress O(1) while the run grows
+        self.case_counts = {}
+        self.step_count = 0
+        self.step_counts = {}
+        # Insertion-ordered set of started steps, read by progress polling from another thread
+        self.running_steps = {}
+        self.event_log = None
+        if event_log_name:
+            os.makedirs(report_dir, exist_ok=True)
+            self.event_log = EventLog(os.path.join(report_dir, event_log_name))
+    
+    @property
+    def start_time(self):
+        return to_wall_time(self.start_ns)
+    
+    @start_time.setter
+    def start_time(self, value):
+        self.start_ns = to_perf_ns(value)
+    
+    @property
+    def end_time(self):
+        return to_wall_time(self.end_ns)
+    
+    @end_time.setter
+    def end_time(self, value):
+        self.end_ns = to_perf_ns(value)
     
     def start(self):
         """Start the test report."""
-        self.start_time = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self._emit({"event": "report_start", "start_time": self.start_time, "clock_anchor": self.clock_anchor})
+    
+    def on_complete(self, callback):
+        """Run callback when the report completes, e.g. to flush artifacts that are still being written."""
+        self.completion_hooks.append(callback)
     
     def complete(self):
         """Complete the test report."""
-        self.end_time = time.time()
+        for callback in self.completion_hooks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Report completion hook failed: {e}")
+        self.end_ns = time.perf_counter_ns()
+        self._emit({"event": "report_end", "end_time": self.end_time})
+        if self.event_log is not None:
+            self.event_log.sync()
+        if self.history_db:
+            self.history_run_id = self.save_to_history(self.history_db)
+            if self.history_run_id is not None:
+                from report_regression import check_report_for_regressions
+                check_report_for_regressions(self, self.history_db, exclude_run_id=self.history_run_id)
+    
+    def add_section(self, title, headers, rows, css_class="summary"):
+        """Add a table section that the HTML and text reports show after the summary."""
+        self.sections.append((title, headers, rows, css_class))
+    
+    def save_to_history(self, history_db):
+        """Write the run, its test cases and steps to the SQLite history database."""
+        from report_history import HistoryStore
+        report = self
+        if not self.retain_steps and self.event_log is not None:
+            report = TestReport.from_event_log(self.event_log.path, self.report_dir)
+        try:
+            with HistoryStore(history_db) as store:
+                return store.record_run(report, self.run_name)
+        except Exception as e:
+            print(f"⚠️ Failed to save run to history {history_db}: {e}")
+            return None
     
     def add_test_case(self, test_case):
         """Add a test case to the report."""
+        test_case.case_id = len(self.test_cases)
         self.test_cases.append(test_case)
+        test_case.report = self
+        self._case_status_changed(None, test_case.status)
+        self.step_count += test_case.step_count
+        for status, count in test_case.step_counts.items():
+            self.step_counts[status] = self.step_counts.get(status, 0) + count
+        if self.event_log is not None:
+            test_case.event_log = self.event_log
+            test_case.retain_steps = self.retain_steps
+            self._emit({
+                "event": "case_added",
+                "case": test_case.case_id,
+                "name": test_case.name,
+                "description": test_case.description,
+                "status": test_case.status,
+                "start_time": test_case.start_time
+            })
+            # Steps recorded before the case joined the report
+            for step_id, step in enumerate(test_case.steps):
+                test_case._emit_step_start(step, step_id)
+                if step.end_ns is not None:
+                    test_case._emit(dict(step.to_event(), event="step_end", step=step_id))
     
     def add_execution_error(self, error_message, stack_trace=None):
         """Add an execution error to the report."""
-        self.execution_errors.append({
+        error = {
             'message': error_message,
             'stack_trace': stack_trace,
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
+        }
+        self.execution_errors.append(error)
+        self._emit(dict(error, event="execution_error"))
+    
+    def _emit(self, event):
+        if self.event_log is not None:
+            self.event_log.append(event)
+    
+    def _case_status_changed(self, old_status, new_status):
+        if old_status is not None:
+            self.case_counts[old_status] -= 1
+        self.case_counts[new_status] = self.case_counts.get(new_status, 0) + 1
+    
+    def _step_status_counted(self, status):
+        self.step_counts[status] = self.step_counts.get(status, 0) + 1
+    
+    @classmethod
+    def from_event_log(cls, path, report_dir=None):
+        """Rebuild a report from an event log, e.g. after a crash or for a run that did not retain steps."""
+        return cls.from_events(read_events(path), report_dir or os.path.dirname(os.path.abspath(path)))
+    
+    @classmethod
+    def from_events(cls, events, report_dir):
+        """Rebuild a report from an iterable of report events."""
+        report = cls(report_dir, event_log_name=None)
+        steps = {}
+        for event in events:
+            kind = event.get("event")
+            if kind == "report_start":
+                report.start_time = event["start_time"]
+            elif kind == "report_end":
+                report.end_time = event["end_time"]
+            elif kind == "case_added":
+                test_case = TestCase(event["name"], event["description"])
+                test_case.status = event["status"]
+                test_case.start_time = event["start_time"]
+                report.add_test_case(test_case)
+            elif kind == "case_start":
+                test_case = report.test_cases[event["case"]]
+                test_case.start_time = event["start_time"]
+                test_case.status = "RUNNING"
+            elif kind == "case_end":
+                test_case = report.test_cases[event["case"]]
+                test_case.status = event["status"]
+                test_case.end_time = event["end_time"]
+                test_case.error_message = event["error_message"]
+                test_case.stack_trace = event["stack_trace"]
+            elif kind == "case_artifact":
+                report.test_cases[event["case"]].add_artifact(event["artifact"])
+            elif kind == "case_detail":
+                report.test_cases[event["case"]].add_detail(event["label"], event["text"])
+            elif kind == "step_start":
+                test_case = report.test_cases[event["case"]]
+                step = TestStep(event["name"], event["description"])
+                step.start_time = event["start_time"]
+                step.status = "RUNNING"
+                step.parent_id = event.get("parent")
+                step.depth = event.get("depth", 0)
+                test_case.add_step(step)
+                steps[(event["case"], event["step"])] = step
+            elif kind == "step_end":
+                step = steps.pop((event["case"], event["step"]))
+                step.apply_event(event)
+                report.test_cases[event["case"]].step_completed(step)
+            elif kind == "execution_error":
+                report.execution_errors.append({
+                    'message': event["message"],
+                    'stack_trace': event["stack_trace"],
+                    'timestamp': event["timestamp"]
+                })
+        
+        # Steps still in the map never finished (crashed run) and stay RUNNING
+        return report
     
     def get_summary(self):
         """Get a summary of all test results."""
-        total_tests = len(self.test_cases)
-        passed_tests = sum(1 for tc in self.test_cases if tc.status == "PASSED")
-        failed_tests = sum(1 for tc in self.test_cases if tc.status == "FAILED")
-        
-        total_steps = sum(len(tc.steps) for tc in self.test_cases)
-        passed_steps = sum(tc.get_passed_steps() for tc in self.test_cases)
-        failed_steps = sum(tc.get_failed_steps() for tc in self.test_cases)
-        
         return {
-            "total_tests": total_tests,
-            "passed_tests": passed_tests,
-            "failed_tests": failed_tests,
-            "total_steps": total_steps,
-            "passed_steps": passed_steps,
-            "failed_steps": failed_steps,
+            "total_tests": len(self.test_cases),
+            "passed_tests": self.case_counts.get("PASSED", 0),
+            "failed_tests": self.case_counts.get("FAILED", 0),
+            "total_steps": self.step_count,
+            "passed_steps": self.step_counts.get("PASSED", 0),
+            "failed_steps": self.step_counts.get("FAILED", 0),
             "duration": self.get_duration(),
             "execution_errors": len(self.execution_errors)
         }
     
+    def get_progress(self):
+        """Get a live snapshot of the run's progress, cheap enough to poll while tests execute."""
+        completed_steps = self.step_counts.get("PASSED", 0) + self.step_counts.get("FAILED", 0)
+        running_steps = list(self.running_steps)
+        step = running_steps[-1] if running_steps else None
+        elapsed_ns = (self.end_ns or time.perf_counter_ns()) - self.start_ns if self.start_ns is not None else None
+        return {
+            "elapsed": elapsed_ns / 1e9 if elapsed_ns is not None else None,
+            "total_tests": len(self.test_cases),
+            "running_tests": self.case_counts.get("RUNNING", 0),
+            "passed_tests": self.case_counts.get("PASSED", 0),
+            "failed_tests": self.case_counts.get("FAILED", 0),
+            "total_steps": self.step_count,
+            "running_steps": self.step_count - completed_steps,
+            "passed_steps": self.step_counts.get("PASSED", 0),
+            "failed_steps": self.step_counts.get("FAILED", 0),
+            "current_step": step.name if step is not None else None
+        }
+    
     def get_duration(self):
         """Get the total duration of all tests in seconds."""
-        if self.start_time and self.end_time:
-            return self.end_time - self.start_time
-        return None
+        return duration_seconds(self.start_ns, self.end_ns)
     
-    def generate_html_report(self, filename="test_report"):
-        """Generate an HTML report of the test results."""
-        html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Test Execution Report</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 20px; }}
-        .header {{ background-color: #f0f0f0; padding: 20px; border-radius: 5px; }}
-        .summary {{ background-color: #e8f5e8; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-        .test-case {{ border: 1px solid #ddd; margin: 10px 0; border-radius: 5px; }}
-        .test-case-header {{ background-color: #f9f9f9; padding: 10px; border-bottom: 1px solid #ddd; }}
-        .test-step {{ margin: 5px 10px; padding: 5px; border-left: 3px solid #ddd; }}
-        .passed {{ border-left-color: #4CAF50; }}
-        .failed {{ border-left-color: #f44336; }}
-        .running {{ border-left-color: #2196F3; }}
-        .not-started {{ border-left-color: #9E9E9E; }}
-        .error-details {{ background-color: #ffebee; padding: 10px; margin: 5px 0; border-radius: 3px; }}
-        .stack-trace {{ background-color: #f5f5f5; padding: 10px; margin: 5px 0; font-family: monospace; font-size: 12px; white-space: pre-wrap; }}
-        .execution-errors {{ background-color: #fff3cd; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>Test Execution Report</h1>
-        <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-    </div>
-"""
-        
-        # Add summary
-        summary = self.get_summary()
-        duration_str = f"{summary['duration']:.2f}" if summary['duration'] is not None else "N/A"
-        html_content += f"""
-    <div class="summary">
-        <h2>Summary</h2>
-        <p><strong>Total Tests:</strong> {summary['total_tests']}</p>
-        <p><strong>Passed:</strong> {summary['passed_tests']}</p>
-        <p><strong>Failed:</strong> {summary['failed_tests']}</p>
-        <p><strong>Total Steps:</strong> {summary['total_steps']}</p>
-        <p><strong>Passed Steps:</strong> {summary['passed_steps']}</p>
-        <p><strong>Failed Steps:</strong> {summary['failed_steps']}</p>
-        <p><strong>Duration:</strong> {duration_str} seconds</p>
-        <p><strong>Execution Errors:</strong> {summary['execution_errors']}</p>
-    </div>
-"""
-        
-        # Add execution errors if any
-        if self.execution_errors:
-            html_content += """
-    <div class="execution-errors">
-        <h2>Execution Errors</h2>
-"""
-            for error in self.execution_errors:
-                html_content += f"""
-        <div class="error-details">
-            <p><strong>Time:</strong> {error['timestamp']}</p>
-            <p><strong>Error:</strong> {error['message']}</p>
-"""
-                if error['stack_trace']:
-                    html_content += f"""
-            <div class="stack-trace">{error['stack_trace']}</div>
-"""
-                html_content += "</div>"
-            html_content += "</div>"
-        
-        # Add test cases
+    def get_time_breakdown(self):
+        """Get the time of all steps summed per bucket."""
+        totals = dict.fromkeys(TIME_BUCKET_LABELS, 0.0)
         for test_case in self.test_cases:
-            status_class = test_case.status.lower()
-            duration_str = f"{test_case.get_duration():.2f}" if test_case.get_duration() is not None else "N/A"
-            html_content += f"""
-    <div class="test-case">
-        <div class="test-case-header">
-            <h3>{test_case.name}</h3>
-            <p><strong>Status:</strong> {test_case.status}</p>
-            <p><strong>Description:</strong> {test_case.description}</p>
-            <p><strong>Duration:</strong> {duration_str} seconds</p>
-"""
-            
-            # Add test case error details if any
-            if test_case.error_message:
-                html_content += f"""
-            <div class="error-details">
-                <p><strong>Test Case Error:</strong> {test_case.error_message}</p>
-"""
-                if test_case.stack_trace:
-                    html_content += f"""
-                <div class="stack-trace">{test_case.stack_trace}</div>
-"""
-                html_content += "</div>"
-            
-            html_content += "</div>"
-            
             for step in test_case.steps:
-                step_class = step.status.lower().replace('_', '-')
-                duration_str = f"{step.get_duration():.2f}" if step.get_duration() is not None else "N/A"
-                html_content += f"""
-        <div class="test-step {step_class}">
-            <p><strong>{step.name}</strong> - {step.description}</p>
-            <p>Status: {step.status}</p>
-            <p>Duration: {duration_str} seconds</p>
-"""
-                if step.error_message:
-                    html_content += f"""
-            <div class="error-details">
-                <p><strong>Step Error:</strong> {step.error_message}</p>
-"""
-                    if step.stack_trace:
-                        html_content += f"""
-                <div class="stack-trace">{step.stack_trace}</div>
-"""
-                    html_content += "</div>"
-                html_content += "</div>"
-            
-            html_content += "</div>"
-        
-        html_content += """
-</body>
-</html>
-"""
-        
-        # Write to file
-        report_file = os.path.join(self.report_dir, f"{filename}.html")
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+                for bucket, duration in step.get_time_breakdown().items():
+                    totals[bucket] += duration
+        return totals
+    
+    def get_fix_first_steps(self, limit=10):
+        """Get the steps losing the most time to fixed sleeps and wait timeouts."""
+        steps = []
+        for test_case in self.test_cases:
+            for step in test_case.steps:
+                wasted = step.time_buckets["sleep"] + step.time_buckets["wait_timeout"]
+                if wasted > 0:
+                    steps.append((wasted, test_case, step))
+        steps.sort(key=lambda item: item[0], reverse=True)
+        return steps[:limit]
+    
+    def get_chattiest_steps(self, limit=10):
+        """Get the steps that issued the most WebDriver commands."""
+        steps = [(test_case, step) for test_case in self.test_cases for step in test_case.steps if step.command_count]
+        steps.sort(key=lambda item: item[1].command_count, reverse=True)
+        return steps[:limit]
+    
+    def generate_html_report(self, filename="test_report", title="Test Execution Report"):
+        """Generate an HTML report of the test results."""
+        if not self.retain_steps and self.event_log is not None:
+            self.event_log.sync()
+            recovered_report = TestReport.from_event_log(self.event_log.path, self.report_dir)
+            recovered_report.sections = self.sections
+            return recovered_report.generate_html_report(filename, title)
         
-        return report_file
+        # Imported here because report_renderer imports this module
+        from report_renderer import render_html_report
+        return render_html_report(self, os.path.join(self.report_dir, f"{filename}.html"), title=title)
 
     def generate_text_report(self, console_output="", filename="test_report"):
         """Generate a text report with console output format."""
-        report_content = f"""
-Test Execution Report
-Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-{console_output}
-
-============================================================
-FINAL TEST SUMMARY
-============================================================
-"""
+        if not self.retain_steps and self.event_log is not None:
+            self.event_log.sync()
+            recovered_report = TestReport.from_event_log(self.event_log.path, self.report_dir)
+            recovered_report.sections = self.sections
+            return recovered_report.generate_text_report(console_output, filename)
         
-        # Add test case results
-        for test_case in self.test_cases:
-            status_icon = "✓" if test_case.status == "PASSED" else "✗" if test_case.status == "FAILED" else "⚠"
-            report_content += f"{status_icon} {test_case.name}: {test_case.status}\n"
-            
-            # Add error details for failed tests
-            if test_case.status == "FAILED":
-                if test_case.error_message:
-                    report_content += f"   Error: {test_case.error_message}\n"
-                failed_steps = test_case.get_failed_step_details()
-                if failed_steps:
-                    report_content += "   Failed Steps:\n"
-                    for step_detail in failed_steps:
-                        report_content += f"     Step {step_detail['step_number']}: {step_detail['step_name']}\n"
-                        if step_detail['error_message']:
-                            report_content += f"       Error: {step_detail['error_message']}\n"
-        
-        # Add execution errors if any
-        if self.execution_errors:
-            report_content += "\nExecution Errors:\n"
-            for error in self.execution_errors:
-                report_content += f"  {error['timestamp']}: {error['message']}\n"
-        
-        # Add overall results
-        summary = self.get_summary()
-        passed_count = summary['passed_tests']
-        failed_count = summary['failed_tests']
-        skipped_count = 0  # Not currently tracked
-        total_count = summary['total_tests']
+        from report_renderer import render_text_report
+        return render_text_report(self, os.path.join(self.report_dir, f"{filename}.txt"), console_output)
+    
+    def export_trace(self, filename="trace"):
+        """Export the run as a Chrome trace-event JSON file for chrome://tracing or Perfetto."""
+        if not self.retain_steps and self.event_log is not None:
+            self.event_log.sync()
+            return TestReport.from_event_log(self.event_log.path, self.report_dir).export_trace(filename)
         
-        report_content += f"""
-Overall Results:
-  Passed: {passed_count}
-  Failed: {failed_count}
-  Skipped: {skipped_count}
-  Total: {total_count}
+        from trace_export import write_chrome_trace
+        return write_chrome_trace(self, os.path.join(self.report_dir, f"{filename}.json"))
 
-Test reports saved in: {self.report_dir}
-"""
-        
-        # Write to file
-        report_file = os.path.join(self.report_dir, f"{filename}.txt")
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(report_content)
-        
-        return report_file
+# Innermost (step, test_case) being tracked; a ContextVar keeps concurrent asyncio tasks apart
+_active_step = ContextVar("active_step", default=None)
+# Callbacks run when a tracked step fails, e.g. to write the flight recording
+_step_failure_listeners = []
 
 def create_test_case(name, description):
     """Create a new test case."""
     return TestCase(name, description)
 
+def current_step():
+    """Get the innermost step currently being tracked, or None."""
+    active = _active_step.get()
+    return active[0] if active is not None else None
+
+def _begin_step(test_case, step_name, step_description):
+    parent = _active_step.get()
+    step = TestStep(step_name, step_description)
+    if parent is not None:
+        step.depth = parent[0].depth + 1
+        # Steps of another test case stay top-level there but still count as the parent's child time
+        if parent[1] is test_case:
+            step.parent_id = test_case.running_step_id(parent[0])
+    step.start()
+    test_case.add_step(step)
+    return step, parent, _active_step.set((step, test_case))
+
+def _fail_step(step, step_name, e):
+    error_message = str(e)
+    stack_trace = traceback.format_exc()
+    step.complete(success=False, error_message=error_message, stack_trace=stack_trace)
+    print(f"❌ Step '{step_name}' failed: {error_message}")
+    print(f"Stack trace: {stack_trace}")
+
+def add_step_failure_listener(callback):
+    """Call callback(test_case, step) whenever a tracked step completes as failed, while it is still active."""
+    _step_failure_listeners.append(callback)
+
+def _end_step(test_case, step, parent, token):
+    # Listeners run before the step is closed, so what they attach lands on the failed step
+    if step.status == "FAILED":
+        for listener in _step_failure_listeners:
+            try:
+                listener(test_case, step)
+            except Exception as e:
+                print(f"⚠️ Step failure listener failed: {e}")
+    _active_step.reset(token)
+    # A step interrupted by KeyboardInterrupt stays RUNNING in the event log
+    if step.end_ns is not None:
+        test_case.step_completed(step)
+    # Nested step time is excluded from the parent's own breakdown
+    if parent is not None and step.get_duration() is not None:
+        parent[0].add_child_span(step.start_ns, step.end_ns)
+
 @contextmanager
 def track_step(test_case, step_name, step_description):
     """Context manager for tracking a test step with enhanced error handling."""
-    step = TestStep(step_name, step_description)
-    test_case.add_step(step)
-    step.start()
-    
+    step, parent, token = _begin_step(test_case, step_name, step_description)
     try:
         yield step
-        step.complete(success=True)
+        # A step already failed through step.fail() keeps its status
+        if step.status == "RUNNING":
+            step.complete(success=True)
     except Exception as e:
-        error_message = str(e)
-        stack_trace = traceback.format_exc()
-        step.complete(success=False, error_message=error_message, stack_trace=stack_trace)
-        print(f"❌ Step '{step_name}' failed: {error_message}")
-        print(f"Stack trace: {stack_trace}")
-        raise 
\ No newline at end of file
+        _fail_step(step, step_name, e)
+        raise
+    finally:
+        _end_step(test_case, step, parent, token)
+
+@asynccontextmanager
+async def track_step_async(test_case, step_name, step_description):
+    """Async context manager for tracking a test step; concurrent tasks each get their own parent chain."""
+    step, parent, token = _begin_step(test_case, step_name, step_description)
+    try:
+        yield step
+        # A step already failed through step.fail() keeps its status
+        if step.status == "RUNNING":
+            step.complete(success=True)
+    except Exception as e:
+        _fail_step(step, step_name, e)
+        raise
+    finally:
+        _end_step(test_case, step, parent, token)
+
+def print_progress(progress):
+    """Print a one-line progress update."""
+    elapsed = f"{progress['elapsed']:.0f}s" if progress['elapsed'] is not None else "-"
+    line = (f"📊 [{elapsed}] Tests: {progress['passed_tests']} passed, {progress['failed_tests']} failed, "
+            f"{progress['running_tests']} running | Steps: {progress['passed_steps']} passed, "
+            f"{progress['failed_steps']} failed, {progress['running_steps']} running")
+    if progress['current_step']:
+        line += f" | Current: {progress['current_step']}"
+    print(line)
+
+class ProgressMonitor:
+    """Background thread that polls a report's progress at a fixed interval."""
+    
+    def __init__(self, report, interval=1.0, callback=print_progress):
+        self.report = report
+        self.interval = interval
+        self.callback = callback
+        self._stopped = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start polling in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name="report-progress", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop polling and wait for the thread to finish."""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+    
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.callback(self.report.get_progress())
+            except Exception as e:
+                print(f"⚠️ Progress callback failed: {e}")
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+if __name__ == "__main__":
+    # Render the HTML and text reports of an interrupted run from its event log
+    if len(sys.argv) != 2:
+        print("Usage: python test_report.py <report_dir>/events.jsonl")
+        sys.exit(2)
+    recovered_report = TestReport.from_event_log(sys.argv[1])
+    print(f"HTML report: {recovered_report.generate_html_report()}")
+    print(f"Text report: {recovered_report.generate_text_report()}")
@@ -0,0 +1,111 @@
+"""
+Trace Export Module for Selenium Test Automation
+Writes a TestReport as Chrome trace-event JSON, viewable in chrome://tracing or ui.perfetto.dev.
+"""
+
+import json
+
+from report_renderer import ChunkedWriter
+from test_report import THREAD_NAMES
+
+# Test cases, steps, sleeps, waits and subprocesses share the thread that ran them;
+# WebDriver commands get one track per browser session
+STEPS_PID = 1
+BROWSERS_PID = 2
+
+class TraceWriter:
+    """Streams trace events into a JSON array without holding the run's events in memory."""
+
+    def __init__(self, path):
+        self._out = ChunkedWriter(path)
+        self._out.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        self._first = True
+
+    def write_event(self, event):
+        """Append one trace event."""
+        if not self._first:
+            self._out.write(",\n")
+        self._out.write(json.dumps(event, ensure_ascii=False, default=str))
+        self._first = False
+
+    def write_span(self, name, category, start_ns, end_ns, origin_ns, pid, tid, args=None):
+        """Append a complete ("X") event; timestamps are microseconds from the run start."""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - origin_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": pid,
+            "tid": tid
+        }
+        if args:
+            event["args"] = args
+        self.write_event(event)
+
+    def write_name(self, kind, pid, tid, name):
+        """Append a process_name or thread_name metadata event."""
+        self.write_event({"name": kind, "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+
+    def close(self):
+        self._out.write("\n]}\n")
+        self._out.close()
+
+def _run_origin(report):
+    if report.start_ns is not None:
+        return report.start_ns
+    starts = [step.start_ns for test_case in report.test_cases for step in test_case.steps if step.start_ns is not None]
+    return min(starts) if starts else 0
+
+def write_chrome_trace(report, trace_file):
+    """Write the report's test cases, steps and captured intervals as a Chrome trace file."""
+    origin_ns = _run_origin(report)
+    thread_names = dict(THREAD_NAMES)
+    step_tracks = {}
+    browser_tracks = {}
+
+    def step_track(thread_id):
+        if thread_id not in step_tracks:
+            step_tracks[thread_id] = len(step_tracks) + 1
+            name = thread_names.get(thread_id) or ("Recorded steps" if thread_id is None else f"Worker {thread_id}")
+            writer.write_name("thread_name", STEPS_PID, step_tracks[thread_id], name)
+        return step_tracks[thread_id]
+
+    def browser_track(session):
+        if session not in browser_tracks:
+            browser_tracks[session] = len(browser_tracks) + 1
+            writer.write_name("thread_name", BROWSERS_PID, browser_tracks[session], f"Browser {str(session)[:8]}")
+        return browser_tracks[session]
+
+    writer = TraceWriter(trace_file)
+    try:
+        writer.write_name("process_name", STEPS_PID, 0, "Test Steps")
+        writer.write_name("process_name", BROWSERS_PID, 0, "WebDriver Sessions")
+
+        for test_case in report.test_cases:
+            case_tid = None
+            for step in test_case.steps:
+                if step.start_ns is None or step.end_ns is None:
+                    continue
+                tid = step_track(step.thread_id)
+                case_tid = case_tid or tid
+                writer.write_span(step.name, "step", step.start_ns, step.end_ns, origin_ns, STEPS_PID, tid, {
+                    "case": test_case.name,
+                    "status": step.status,
+                    "error": step.error_message,
+                    "commands": step.command_count,
+                    "exclusive_s": step.get_exclusive_duration()
+                })
+                for kind, name, start_ns, end_ns, track in step.intervals or ():
+                    if kind == "command":
+                        writer.write_span(name, kind, start_ns, end_ns, origin_ns, BROWSERS_PID, browser_track(track), {"step": step.name})
+                    else:
+                        writer.write_span(name, kind, start_ns, end_ns, origin_ns, STEPS_PID, tid)
+
+            # The case span sits on the track of its first step so its steps nest beneath it
+            if test_case.start_ns is not None and test_case.end_ns is not None:
+                writer.write_span(test_case.name, "case", test_case.start_ns, test_case.end_ns, origin_ns,
+                                  STEPS_PID, case_tid or step_track(None), {"status": test_case.status})
+    finally:
+        writer.close()
+    return trace_file